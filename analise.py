@@ -0,0 +1,565 @@
+"""Métricas de SLA e tempo de resolução em tabelas de resumo diárias.
+
+Os resumos (ResumoPrioridade, ResumoTecnico, ResumoTransicao e
+BacklogDiario, em models.py) são atualizados de forma incremental a partir
+do histórico dos chamados: cada execução lê só os registros de
+HistoricoChamado depois da marca (id) deixada pela anterior.
+
+- 'criacao' conta em criados, por dia e prioridade;
+- "Status alterado de X para Y" conta uma transição X -> Y, com o tempo
+  desde a mudança de status anterior (ou a criação). Para 'resolvido', conta
+  em resolvidos (por prioridade e por técnico) com o tempo desde a criação;
+  saindo de 'resolvido', em reabertos.
+
+Cada execução também fotografa o backlog (abertos e em andamento) e a idade
+desses chamados na linha do dia corrente. `flask reconstruir-analise` refaz
+os resumos a partir de todo o histórico e reconstrói o backlog dos dias
+anteriores pelas datas de criação e resolução.
+
+Percentis de tempo usam as contagens por faixa de horas (FAIXAS_HORAS)
+somadas no período, com interpolação dentro da faixa. A contagem por faixa,
+a soma das faixas e os percentis da idade do backlog são vetorizados com
+NumPy quando instalado; sem ele, o mesmo cálculo roda em Python puro.
+
+Relatórios e o dashboard leem apenas as tabelas de resumo.
+"""
+import re
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from cache import criar_cache
+from lote_chamados import PRIORIDADES
+from models import (db, Usuario, Chamado, HistoricoChamado, ResumoPrioridade, ResumoTecnico,
+                    ResumoTransicao, BacklogDiario, MarcaAnalise)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Limites superiores (horas) das faixas de tempo; a última faixa é aberta.
+# Mudar as faixas exige `flask reconstruir-analise`
+FAIXAS_HORAS = (0.25, 0.5, 1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 720)
+QUANTIDADE_FAIXAS = len(FAIXAS_HORAS) + 1
+
+MARCA_HISTORICO = 'historico'
+CHAVE_VERSAO = 'analise:versao'
+STATUS_BACKLOG = ('aberto', 'em_andamento')
+AGRUPAMENTOS = ('prioridade', 'tecnico', 'transicao')
+
+_TRANSICAO = re.compile(r'Status alterado de (\w+) para (\w+)')
+
+
+# Faixas e percentis
+
+def contar_faixas(horas):
+    """Contagens por faixa de uma sequência de durações em horas"""
+    if np is not None:
+        indices = np.searchsorted(FAIXAS_HORAS, np.asarray(horas, dtype=float))
+        return np.bincount(indices, minlength=QUANTIDADE_FAIXAS).tolist()
+    contagens = [0] * QUANTIDADE_FAIXAS
+    for valor in horas:
+        contagens[bisect_left(FAIXAS_HORAS, valor)] += 1
+    return contagens
+
+
+def somar_faixas(listas):
+    listas = list(listas)
+    if not listas:
+        return [0] * QUANTIDADE_FAIXAS
+    if np is not None:
+        return np.asarray(listas, dtype=np.int64).sum(axis=0).tolist()
+    return [sum(coluna) for coluna in zip(*listas)]
+
+
+def _ler_faixas(texto):
+    return [int(valor) for valor in texto.split(',')] if texto else [0] * QUANTIDADE_FAIXAS
+
+
+def _gravar_faixas(contagens):
+    return ','.join(str(valor) for valor in contagens)
+
+
+def percentil_faixas(contagens, p):
+    """Percentil `p` (0-100) estimado pelas contagens por faixa; None sem dados.
+    
+    Na faixa aberta (acima da última), devolve o limite inferior dela.
+    """
+    total = sum(contagens)
+    if not total:
+        return None
+    alvo = total * p / 100
+    acumulado = 0
+    for i, quantidade in enumerate(contagens):
+        if quantidade and acumulado + quantidade >= alvo:
+            inicio = FAIXAS_HORAS[i - 1] if i else 0
+            if i == len(FAIXAS_HORAS):
+                return float(inicio)
+            return inicio + (FAIXAS_HORAS[i] - inicio) * (alvo - acumulado) / quantidade
+        acumulado += quantidade
+    return float(FAIXAS_HORAS[-1])
+
+
+def percentis(valores, ps):
+    """Percentis exatos de `valores` (interpolação linear, como numpy.percentile)"""
+    if not len(valores):
+        return [None] * len(ps)
+    if np is not None:
+        return np.percentile(np.asarray(valores, dtype=float), ps).tolist()
+    ordenados = sorted(valores)
+    resultado = []
+    for p in ps:
+        posicao = (len(ordenados) - 1) * p / 100
+        i = int(posicao)
+        proximo = ordenados[min(i + 1, len(ordenados) - 1)]
+        resultado.append(ordenados[i] + (proximo - ordenados[i]) * (posicao - i))
+    return resultado
+
+
+def _idades_horas(datas, referencia):
+    """Horas entre cada data de `datas` e `referencia`"""
+    if np is not None:
+        return (np.datetime64(referencia, 'us') - np.array(datas, dtype='datetime64[us]')) / np.timedelta64(1, 'h')
+    return [(referencia - data).total_seconds() / 3600 for data in datas]
+
+
+def _horas(inicio, fim):
+    return max((fim - inicio).total_seconds() / 3600, 0.0)
+
+
+def formatar_horas(horas):
+    """Filtro `horas` dos templates: 45 min, 5,5 h, 3,2 d"""
+    if horas is None:
+        return '-'
+    if horas < 1:
+        return f'{horas * 60:.0f} min'
+    if horas < 48:
+        return f'{horas:.1f} h'.replace('.', ',')
+    return f'{horas / 24:.1f} d'.replace('.', ',')
+
+
+def periodo(args, dias_padrao=30):
+    """(de, ate) dos parâmetros AAAA-MM-DD; padrão: os últimos `dias_padrao` dias.
+    
+    Levanta ValueError para datas inválidas ou período invertido.
+    """
+    try:
+        ate = date.fromisoformat(args['ate']) if args.get('ate') else datetime.utcnow().date()
+        de = date.fromisoformat(args['de']) if args.get('de') else ate - timedelta(days=dias_padrao - 1)
+    except ValueError:
+        raise ValueError('Data inválida: use AAAA-MM-DD')
+    if de > ate:
+        raise ValueError('Período inválido: "de" depois de "ate"')
+    return de, ate
+
+
+def _ordem_prioridade(prioridade):
+    return PRIORIDADES.index(prioridade) if prioridade in PRIORIDADES else len(PRIORIDADES)
+
+
+def _dias(de, ate):
+    return [de + timedelta(days=i) for i in range((ate - de).days + 1)]
+
+
+class AnaliseChamados:
+    """Atualização incremental dos resumos diários e consultas dos relatórios"""
+    
+    def __init__(self, app=None):
+        self.cache = None
+        self.execucoes = 0
+        self.registros = 0
+        self.duracao = 0.0
+        self._proxima = 0.0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.intervalo = app.config['ANALISE_INTERVALO']
+        self.lote = app.config['ANALISE_LOTE']
+        self.margem = timedelta(seconds=app.config['ANALISE_MARGEM'])
+        if self.cache is None:
+            self.cache = criar_cache(app.config['CACHE_URL'], ttl=self.intervalo or 300,
+                                     max_itens=app.config['CACHE_MAX_ITENS'])
+        app.add_template_filter(formatar_horas, 'horas')
+        app.add_template_global(self.versao, 'versao_analise')
+        app.extensions['analise'] = self
+    
+    # Atualização incremental
+    
+    def atualizar_se_devido(self):
+        """Chamado a cada volta do worker: atualiza no máximo a cada ANALISE_INTERVALO segundos"""
+        if not self.intervalo or time.monotonic() < self._proxima:
+            return None
+        self._proxima = time.monotonic() + self.intervalo
+        return self.atualizar()
+    
+    def atualizar(self, agora=None):
+        """Inclui nos resumos o histórico novo e fotografa o backlog de hoje.
+        
+        Retorna quantos registros de histórico foram processados.
+        """
+        inicio = time.perf_counter()
+        agora = agora or datetime.utcnow()
+        total = 0
+        completo = False
+        while not completo:
+            processados, completo = self._processar_lote(agora - self.margem, agora)
+            total += processados
+        self._fotografar_backlog(agora)
+        
+        self.cache.definir(CHAVE_VERSAO, agora)
+        self.execucoes += 1
+        self.registros += total
+        self.duracao += time.perf_counter() - inicio
+        return total
+    
+    def _marca(self):
+        valor = db.session.scalar(select(MarcaAnalise.valor).where(MarcaAnalise.nome == MARCA_HISTORICO))
+        if valor is not None:
+            return valor
+        try:
+            db.session.add(MarcaAnalise(nome=MARCA_HISTORICO, valor=0))
+            db.session.commit()
+        except IntegrityError:
+            # Outro processo criou a marca ao mesmo tempo
+            db.session.rollback()
+        return self._marca()
+    
+    def _processar_lote(self, corte, agora):
+        """Processa até ANALISE_LOTE registros depois da marca; retorna (processados, terminou)"""
+        marca = self._marca()
+        linhas = db.session.execute(
+            select(HistoricoChamado.id, HistoricoChamado.chamado_id, HistoricoChamado.acao,
+                   HistoricoChamado.descricao, HistoricoChamado.data_acao,
+                   Chamado.prioridade, Chamado.tecnico_id, Chamado.data_criacao)
+            .join(Chamado, Chamado.id == HistoricoChamado.chamado_id)
+            .where(HistoricoChamado.id > marca)
+            .order_by(HistoricoChamado.id)
+            .limit(self.lote)
+        ).all()
+        terminou = len(linhas) < self.lote
+        # Registros recentes ficam para a próxima execução: no PostgreSQL, uma
+        # transação ainda aberta pode gravar ids menores que os já visíveis.
+        # Datas no futuro (relógio adiantado, importações) não seguram o lote
+        for i, linha in enumerate(linhas):
+            if corte <= linha.data_acao <= agora:
+                linhas, terminou = linhas[:i], True
+                break
+        if not linhas:
+            db.session.rollback()
+            return 0, True
+        
+        # A marca avança antes de tudo: com vários workers, o segundo espera o
+        # lock da linha e não encontra mais o valor antigo
+        avancou = db.session.execute(
+            update(MarcaAnalise)
+            .where(MarcaAnalise.nome == MARCA_HISTORICO, MarcaAnalise.valor == marca)
+            .values(valor=linhas[-1].id, atualizado_em=datetime.utcnow()),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if not avancou:
+            db.session.rollback()
+            return 0, True
+        
+        self._mesclar(*self._resumir(linhas, marca))
+        db.session.commit()
+        return len(linhas), terminou
+    
+    def _status_anterior(self, chamado_ids, marca):
+        """Data da última mudança de status (ou criação) já processada de cada chamado"""
+        anteriores = {}
+        ids = sorted(chamado_ids)
+        for inicio in range(0, len(ids), 500):
+            anteriores.update(db.session.execute(
+                select(HistoricoChamado.chamado_id, func.max(HistoricoChamado.data_acao))
+                .where(HistoricoChamado.chamado_id.in_(ids[inicio:inicio + 500]),
+                       HistoricoChamado.id <= marca,
+                       or_(HistoricoChamado.acao == 'criacao',
+                           HistoricoChamado.descricao.like('Status alterado de %')))
+                .group_by(HistoricoChamado.chamado_id)
+            ).all())
+        return anteriores
+    
+    def _resumir(self, linhas, marca):
+        """Contagens e durações (horas) por chave de cada tabela de resumo"""
+        prioridades = {}
+        tecnicos = {}
+        transicoes = {}
+        
+        mudancas = [(linha, _TRANSICAO.match(linha.descricao or '')) for linha in linhas]
+        pendentes = {linha.chamado_id for linha, transicao in mudancas if transicao}
+        ultimo_status = self._status_anterior(pendentes, marca) if pendentes else {}
+        
+        for linha, transicao in mudancas:
+            dia = linha.data_acao.date()
+            resumo = prioridades.setdefault((dia, linha.prioridade),
+                                            {'criados': 0, 'resolvidos': 0, 'reabertos': 0, 'horas': []})
+            if linha.acao == 'criacao':
+                resumo['criados'] += 1
+                ultimo_status[linha.chamado_id] = linha.data_acao
+            if not transicao:
+                continue
+            
+            de, para = transicao.groups()
+            desde = ultimo_status.get(linha.chamado_id, linha.data_criacao)
+            transicoes.setdefault((dia, de, para), []).append(_horas(desde, linha.data_acao))
+            ultimo_status[linha.chamado_id] = linha.data_acao
+            if para == 'resolvido':
+                resolucao = _horas(linha.data_criacao, linha.data_acao)
+                resumo['resolvidos'] += 1
+                resumo['horas'].append(resolucao)
+                if linha.tecnico_id is not None:
+                    tecnicos.setdefault((dia, linha.tecnico_id), []).append(resolucao)
+            elif de == 'resolvido':
+                resumo['reabertos'] += 1
+        return prioridades, tecnicos, transicoes
+    
+    @staticmethod
+    def _existentes(modelo, chaves):
+        """Linhas de resumo já gravadas para as chaves, pela chave primária"""
+        colunas = modelo.__table__.primary_key.columns.keys()
+        linhas = db.session.scalars(select(modelo).where(modelo.dia.in_({chave[0] for chave in chaves})))
+        return {tuple(getattr(linha, coluna) for coluna in colunas): linha for linha in linhas}
+    
+    def _mesclar(self, prioridades, tecnicos, transicoes):
+        existentes = self._existentes(ResumoPrioridade, prioridades)
+        for (dia, prioridade), resumo in prioridades.items():
+            linha = existentes.get((dia, prioridade))
+            if linha is None:
+                linha = ResumoPrioridade(dia=dia, prioridade=prioridade, criados=0, resolvidos=0,
+                                         reabertos=0, horas_resolucao=0.0, faixas_resolucao='')
+                db.session.add(linha)
+            linha.criados += resumo['criados']
+            linha.resolvidos += resumo['resolvidos']
+            linha.reabertos += resumo['reabertos']
+            if resumo['horas']:
+                linha.horas_resolucao += sum(resumo['horas'])
+                linha.faixas_resolucao = _gravar_faixas(somar_faixas(
+                    [_ler_faixas(linha.faixas_resolucao), contar_faixas(resumo['horas'])]))
+        
+        existentes = self._existentes(ResumoTecnico, tecnicos)
+        for (dia, tecnico_id), horas in tecnicos.items():
+            linha = existentes.get((dia, tecnico_id))
+            if linha is None:
+                linha = ResumoTecnico(dia=dia, tecnico_id=tecnico_id, resolvidos=0,
+                                      horas_resolucao=0.0, faixas_resolucao='')
+                db.session.add(linha)
+            linha.resolvidos += len(horas)
+            linha.horas_resolucao += sum(horas)
+            linha.faixas_resolucao = _gravar_faixas(somar_faixas(
+                [_ler_faixas(linha.faixas_resolucao), contar_faixas(horas)]))
+        
+        existentes = self._existentes(ResumoTransicao, transicoes)
+        for (dia, de, para), horas in transicoes.items():
+            linha = existentes.get((dia, de, para))
+            if linha is None:
+                linha = ResumoTransicao(dia=dia, de=de, para=para, quantidade=0, horas=0.0, faixas='')
+                db.session.add(linha)
+            linha.quantidade += len(horas)
+            linha.horas += sum(horas)
+            linha.faixas = _gravar_faixas(somar_faixas([_ler_faixas(linha.faixas), contar_faixas(horas)]))
+    
+    # Backlog
+    
+    def _gravar_backlog(self, dia, idades_por_prioridade):
+        """Linhas do backlog de `dia` a partir das idades (horas) dos chamados abertos"""
+        db.session.execute(delete(BacklogDiario).where(BacklogDiario.dia == dia))
+        for prioridade, idades in idades_por_prioridade.items():
+            if not len(idades):
+                continue
+            p50, p90, maximo = percentis(idades, [50, 90, 100])
+            db.session.add(BacklogDiario(dia=dia, prioridade=prioridade, abertos=len(idades),
+                                         idade_p50_horas=p50, idade_p90_horas=p90, idade_max_horas=maximo))
+    
+    def _fotografar_backlog(self, agora):
+        """Backlog atual na linha de hoje (a última fotografia do dia fica)"""
+        por_prioridade = {}
+        for prioridade, criacao in db.session.execute(
+                select(Chamado.prioridade, Chamado.data_criacao).where(Chamado.status.in_(STATUS_BACKLOG))):
+            por_prioridade.setdefault(prioridade, []).append(criacao)
+        self._gravar_backlog(agora.date(), {prioridade: _idades_horas(criacoes, agora)
+                                            for prioridade, criacoes in por_prioridade.items()})
+        db.session.execute(update(MarcaAnalise).where(MarcaAnalise.nome == MARCA_HISTORICO)
+                           .values(atualizado_em=agora), execution_options={'synchronize_session': False})
+        db.session.commit()
+    
+    def _reconstruir_backlog(self, dias, agora):
+        """Backlog no fim de cada um dos `dias` dias anteriores, pelas datas dos chamados.
+        
+        Aproximação: chamados abertos hoje contam como abertos desde a criação
+        (reaberturas não são vistas) e os fechados sem data de resolução,
+        como fechados na última atualização.
+        """
+        hoje = agora.date()
+        primeiro = hoje - timedelta(days=dias)
+        inicio_hoje = datetime.combine(hoje, datetime.min.time())
+        linhas = db.session.execute(
+            select(Chamado.prioridade, Chamado.status, Chamado.data_criacao,
+                   Chamado.data_resolucao, Chamado.data_atualizacao)
+            .where(Chamado.data_criacao < inicio_hoje)
+        ).all()
+        
+        grupos = {}
+        for prioridade, status, criacao, resolucao, atualizacao in linhas:
+            fechamento = None if status in STATUS_BACKLOG else (resolucao or atualizacao or criacao)
+            if fechamento is not None and fechamento < datetime.combine(primeiro, datetime.min.time()):
+                continue
+            grupo = grupos.setdefault(prioridade, ([], []))
+            grupo[0].append(criacao)
+            grupo[1].append(fechamento)
+        if np is not None:
+            # Uma conversão por prioridade; cada dia é só uma máscara
+            grupos = {prioridade: (np.array(criacoes, dtype='datetime64[us]'),
+                                   np.array([f or datetime.max for f in fechamentos], dtype='datetime64[us]'))
+                      for prioridade, (criacoes, fechamentos) in grupos.items()}
+        
+        for dia in _dias(primeiro, hoje - timedelta(days=1)):
+            fim = datetime.combine(dia + timedelta(days=1), datetime.min.time())
+            idades = {}
+            for prioridade, (criacoes, fechamentos) in grupos.items():
+                if np is not None:
+                    limite = np.datetime64(fim, 'us')
+                    abertos = criacoes[(criacoes < limite) & (fechamentos >= limite)]
+                    idades[prioridade] = (limite - abertos) / np.timedelta64(1, 'h')
+                else:
+                    idades[prioridade] = [_horas(criacao, fim) for criacao, fechamento in zip(criacoes, fechamentos)
+                                          if criacao < fim and (fechamento is None or fechamento >= fim)]
+            self._gravar_backlog(dia, idades)
+        db.session.commit()
+    
+    def reconstruir(self, dias_backlog=90, agora=None):
+        """Apaga os resumos e refaz tudo a partir do histórico.
+        
+        O backlog dos `dias_backlog` dias anteriores é reconstruído pelas
+        datas dos chamados. Retorna quantos registros de histórico foram
+        processados.
+        """
+        agora = agora or datetime.utcnow()
+        self._marca()
+        for modelo in (ResumoPrioridade, ResumoTecnico, ResumoTransicao, BacklogDiario):
+            db.session.execute(delete(modelo))
+        db.session.execute(update(MarcaAnalise).where(MarcaAnalise.nome == MARCA_HISTORICO)
+                           .values(valor=0, atualizado_em=agora),
+                           execution_options={'synchronize_session': False})
+        db.session.commit()
+        
+        total = self.atualizar(agora)
+        if dias_backlog:
+            self._reconstruir_backlog(dias_backlog, agora)
+            self.cache.definir(CHAVE_VERSAO, datetime.utcnow())
+        return total
+    
+    # Consultas (somente tabelas de resumo)
+    
+    def versao(self):
+        """Instante da última atualização dos resumos (chave de fragmentos em cache)"""
+        versao = self.cache.obter(CHAVE_VERSAO)
+        if versao is None:
+            versao = db.session.scalar(
+                select(MarcaAnalise.atualizado_em).where(MarcaAnalise.nome == MARCA_HISTORICO)) or 0
+            self.cache.definir(CHAVE_VERSAO, versao)
+        return versao
+    
+    def relatorio(self, de, ate, agrupar='prioridade'):
+        """Totais, média e percentis de tempo do período [de, ate] por grupo"""
+        if agrupar == 'prioridade':
+            linhas = db.session.scalars(select(ResumoPrioridade).where(ResumoPrioridade.dia.between(de, ate)))
+            grupos = {}
+            for linha in linhas:
+                grupo = grupos.setdefault(linha.prioridade, {'criados': 0, 'resolvidos': 0, 'reabertos': 0,
+                                                             'horas': 0.0, 'faixas': []})
+                grupo['criados'] += linha.criados
+                grupo['resolvidos'] += linha.resolvidos
+                grupo['reabertos'] += linha.reabertos
+                grupo['horas'] += linha.horas_resolucao
+                grupo['faixas'].append(_ler_faixas(linha.faixas_resolucao))
+            return [self._resultado({'prioridade': prioridade, 'criados': grupo['criados'],
+                                     'resolvidos': grupo['resolvidos'], 'reabertos': grupo['reabertos']},
+                                    grupo['resolvidos'], grupo['horas'], grupo['faixas'])
+                    for prioridade, grupo in sorted(grupos.items(), key=lambda item: _ordem_prioridade(item[0]))]
+        
+        if agrupar == 'tecnico':
+            linhas = db.session.execute(
+                select(ResumoTecnico, Usuario.nome)
+                .join(Usuario, Usuario.id == ResumoTecnico.tecnico_id)
+                .where(ResumoTecnico.dia.between(de, ate))
+            ).all()
+            grupos = {}
+            for linha, nome in linhas:
+                grupo = grupos.setdefault((linha.tecnico_id, nome), {'resolvidos': 0, 'horas': 0.0, 'faixas': []})
+                grupo['resolvidos'] += linha.resolvidos
+                grupo['horas'] += linha.horas_resolucao
+                grupo['faixas'].append(_ler_faixas(linha.faixas_resolucao))
+            resultado = [self._resultado({'tecnico_id': tecnico_id, 'tecnico': nome,
+                                          'resolvidos': grupo['resolvidos']},
+                                         grupo['resolvidos'], grupo['horas'], grupo['faixas'])
+                         for (tecnico_id, nome), grupo in grupos.items()]
+            return sorted(resultado, key=lambda item: -item['resolvidos'])
+        
+        if agrupar == 'transicao':
+            linhas = db.session.scalars(select(ResumoTransicao).where(ResumoTransicao.dia.between(de, ate)))
+            grupos = {}
+            for linha in linhas:
+                grupo = grupos.setdefault((linha.de, linha.para), {'quantidade': 0, 'horas': 0.0, 'faixas': []})
+                grupo['quantidade'] += linha.quantidade
+                grupo['horas'] += linha.horas
+                grupo['faixas'].append(_ler_faixas(linha.faixas))
+            return [self._resultado({'de': de_status, 'para': para, 'quantidade': grupo['quantidade']},
+                                    grupo['quantidade'], grupo['horas'], grupo['faixas'])
+                    for (de_status, para), grupo in sorted(grupos.items())]
+        
+        raise ValueError(f'Agrupamento inválido: use {", ".join(AGRUPAMENTOS)}')
+    
+    @staticmethod
+    def _resultado(item, quantidade, horas, faixas):
+        contagens = somar_faixas(faixas)
+        item['horas_media'] = horas / quantidade if quantidade else None
+        item['horas_p50'] = percentil_faixas(contagens, 50)
+        item['horas_p90'] = percentil_faixas(contagens, 90)
+        return item
+    
+    def serie_backlog(self, de, ate):
+        """Backlog no fim de cada dia do período: total, por prioridade e maior idade p90"""
+        por_dia = {}
+        for linha in db.session.scalars(select(BacklogDiario).where(BacklogDiario.dia.between(de, ate))
+                                        .order_by(BacklogDiario.dia)):
+            dia = por_dia.setdefault(linha.dia, {'dia': linha.dia.isoformat(), 'abertos': 0,
+                                                 'por_prioridade': {}, 'idade_p90_horas': None})
+            dia['abertos'] += linha.abertos
+            dia['por_prioridade'][linha.prioridade] = linha.abertos
+            if linha.idade_p90_horas is not None:
+                dia['idade_p90_horas'] = max(dia['idade_p90_horas'] or 0, linha.idade_p90_horas)
+        return list(por_dia.values())
+    
+    def painel(self, dias=30):
+        """Card do dashboard: tempos de resolução dos últimos `dias` dias e o
+        backlog mais recente, uma linha por prioridade (da mais urgente)
+        """
+        de, ate = periodo({}, dias)
+        tempos = {item['prioridade']: item for item in self.relatorio(de, ate)}
+        ultimo = select(func.max(BacklogDiario.dia)).scalar_subquery()
+        backlog = {linha.prioridade: linha for linha in db.session.scalars(
+            select(BacklogDiario).where(BacklogDiario.dia == ultimo))}
+        
+        linhas = []
+        for prioridade in reversed(PRIORIDADES):
+            if prioridade not in tempos and prioridade not in backlog:
+                continue
+            linha = tempos.get(prioridade) or {'prioridade': prioridade, 'resolvidos': 0, 'reabertos': 0,
+                                               'horas_p50': None, 'horas_p90': None}
+            atual = backlog.get(prioridade)
+            linha['abertos'] = atual.abertos if atual else 0
+            linha['idade_p90_horas'] = atual.idade_p90_horas if atual else None
+            linhas.append(linha)
+        return linhas
+    
+    def metricas(self):
+        return {
+            'execucoes': self.execucoes,
+            'registros': self.registros,
+            'duracao': self.duracao
+        }
@@ -0,0 +1,183 @@
+"""Perfil de produção do SQLite: pragmas por conexão e fila única de escrita.
+
+Com vários workers (gunicorn) sobre o mesmo arquivo, o modo de journal
+padrão faz leitores e escritores se bloquearem e commits concorrentes
+falharem com "database is locked". `configurar_sqlite` liga em cada conexão
+nova o WAL (leitores não bloqueiam o escritor), synchronous=NORMAL (sem
+fsync a cada commit; seguro com WAL), mmap, cache maior e busy_timeout.
+
+`FilaEscrita` serializa as escritas de um processo em uma thread com sessão
+própria e faz group commit: as escritas que chegam enquanto a anterior
+grava entram juntas na próxima transação, e o lock de escrita do arquivo é
+disputado uma vez por grupo, não uma vez por requisição. Se uma escrita do
+grupo falha, o grupo é desfeito e as escritas são refeitas uma a uma, para
+que só a que falhou receba o erro. Fora do SQLite (ou com
+SQLITE_FILA_ESCRITA=False) a escrita roda na própria requisição.
+
+A requisição espera no máximo SQLITE_ESCRITA_ESPERA segundos e recebe
+`EscritaExpirada`; uma thread de escrita que morre é recriada na próxima
+escrita e as que estavam na fila dela falham em vez de esperar para sempre.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+from models import db
+
+
+class EscritaExpirada(Exception):
+    """A fila de escrita não confirmou a escrita em SQLITE_ESCRITA_ESPERA segundos"""
+
+
+def _arquivo_sqlite(app):
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    return uri.startswith('sqlite') and ':memory:' not in uri and not uri.rstrip('/').endswith(':')
+
+
+def configurar_sqlite(app):
+    """Aplica os pragmas de SQLITE_* a cada conexão nova com o arquivo SQLite"""
+    if not app.config['SQLITE_OTIMIZADO'] or not _arquivo_sqlite(app):
+        return
+    pragmas = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        f"PRAGMA mmap_size={app.config['SQLITE_MMAP_MB'] * 1024 * 1024}",
+        # Valor negativo: tamanho em KiB, não em páginas
+        f"PRAGMA cache_size=-{app.config['SQLITE_CACHE_MB'] * 1024}",
+        f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}",
+    )
+    
+    with app.app_context():
+        engine = db.engine
+    
+    @event.listens_for(engine, 'connect')
+    def _aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class FilaEscrita:
+    """Thread única de escrita com group commit (um processo, um escritor)"""
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.ativa = False
+        self.grupos = 0
+        self.escritas = 0
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.ativa = app.config['SQLITE_FILA_ESCRITA'] and _arquivo_sqlite(app)
+        self.tamanho_grupo = app.config['SQLITE_ESCRITA_GRUPO']
+        self.espera = app.config['SQLITE_ESCRITA_ESPERA']
+        app.extensions['fila_escrita'] = self
+    
+    def executar(self, funcao, *args, **kwargs):
+        """Executa `funcao`, que escreve em `db.session`, e faz o commit.
+        
+        Retorna o resultado da função ou levanta a exceção dela. A função roda
+        em outra thread (sem `current_user` nem objetos da requisição): receba
+        ids e valores e devolva valores simples, não objetos do ORM.
+        
+        Sem resposta em SQLITE_ESCRITA_ESPERA segundos levanta `EscritaExpirada`:
+        a escrita que ainda estava na fila é descartada, a que já começou pode
+        ser gravada depois.
+        """
+        if not self.ativa:
+            try:
+                resultado = funcao(*args, **kwargs)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            return resultado
+        
+        self._iniciar()
+        futuro = Future()
+        self._fila.put((futuro, funcao, args, kwargs))
+        try:
+            return futuro.result(timeout=self.espera)
+        except TimeoutError:
+            if futuro.done():
+                raise  # TimeoutError levantado pela própria função
+            futuro.cancel()
+            raise EscritaExpirada()
+    
+    def _iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._escrever, name='fila-escrita', daemon=True)
+                self._thread.start()
+    
+    def _escrever(self):
+        grupo = []
+        try:
+            with self.app.app_context():
+                while True:
+                    grupo = [self._fila.get()]
+                    while len(grupo) < self.tamanho_grupo:
+                        try:
+                            grupo.append(self._fila.get_nowait())
+                        except queue.Empty:
+                            break
+                    # Escritas canceladas por quem desistiu de esperar não são gravadas
+                    grupo = [escrita for escrita in grupo if escrita[0].set_running_or_notify_cancel()]
+                    if not grupo:
+                        continue
+                    try:
+                        self._gravar_grupo(grupo)
+                    finally:
+                        # Sem identity map entre grupos: cada escrita relê o que precisa
+                        db.session.remove()
+        finally:
+            # A thread vai morrer: ninguém fica esperando por ela
+            erro = RuntimeError('Fila de escrita encerrada')
+            for futuro, *_ in grupo + self._drenar():
+                if not futuro.done():
+                    futuro.set_exception(erro)
+    
+    def _drenar(self):
+        pendentes = []
+        while True:
+            try:
+                pendentes.append(self._fila.get_nowait())
+            except queue.Empty:
+                return pendentes
+    
+    def _gravar_grupo(self, grupo):
+        resultados = []
+        try:
+            for futuro, funcao, args, kwargs in grupo:
+                resultados.append(funcao(*args, **kwargs))
+            db.session.commit()
+        except Exception as erro:
+            db.session.rollback()
+            if len(grupo) == 1:
+                grupo[0][0].set_exception(erro)
+                return
+            # Refaz uma a uma: só a escrita que falhou recebe o erro
+            for escrita in grupo:
+                self._gravar_grupo([escrita])
+            return
+        
+        self.grupos += 1
+        self.escritas += len(grupo)
+        for (futuro, *_), resultado in zip(grupo, resultados):
+            futuro.set_result(resultado)
+    
+    def metricas(self):
+        return {
+            'grupos': self.grupos,
+            'escritas': self.escritas,
+            'pendentes': self._fila.qsize()
+        }
@@ -0,0 +1,563 @@
+"""Benchmark e teste de carga dos fluxos de chamados.
+
+Uso:
+    # Popular um banco de teste
+    python benchmark.py semear --banco sqlite:////tmp/bench.db --usuarios 1000 --chamados 100000
+
+    # Rodar os cenários pelo cliente de teste do Flask (sequencial)
+    python benchmark.py executar --banco sqlite:////tmp/bench.db --saida base.json
+
+    # Carga HTTP concorrente (servidor embutido ou --url de um servidor já rodando)
+    python benchmark.py executar --banco sqlite:////tmp/bench.db --modo http --concorrencia 16
+
+    # Escritas concorrentes vindas de vários processos (como workers do gunicorn)
+    python benchmark.py executar --banco sqlite:////tmp/bench.db --modo http --processos 4 \
+        --concorrencia 32 --cenarios novo_chamado,atualizar_chamado
+
+    # Comparar com uma execução anterior e falhar se o p95 piorar mais de 20%
+    python benchmark.py executar --banco sqlite:////tmp/bench.db --comparar base.json --tolerancia 1.2
+
+    # Partida a frio: importação, create_app e primeira requisição em processos novos
+    python benchmark.py partida --banco sqlite:////tmp/bench.db --repeticoes 10
+
+As senhas de todos os usuários semeados são SENHA_BENCHMARK; o admin é
+admin@empresa.com.
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+SENHA_BENCHMARK = 'bench123'
+EMAIL_ADMIN = 'admin@empresa.com'
+STATUS = ('aberto', 'em_andamento', 'resolvido', 'fechado')
+PRIORIDADES = ('baixa', 'media', 'alta', 'urgente')
+
+
+def _configurar_ambiente(banco):
+    os.environ['DATABASE_URL'] = banco
+    os.environ.setdefault('EMAIL_WORKER_INTERNO', 'False')
+    os.environ.setdefault('SQL_LENTA_MS', '0')
+
+
+def carregar_app(banco):
+    """Cria a aplicação apontando para o banco do benchmark"""
+    _configurar_ambiente(banco)
+    from app import create_app
+    return create_app({'WTF_CSRF_ENABLED': False})
+
+
+# Semeadura
+
+def semear(banco, usuarios, chamados, historico, lote=10000, semente=42):
+    aplicacao = carregar_app(banco)
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import db, Usuario, Chamado, HistoricoChamado
+    from comandos import inicializar_banco
+
+    aleatorio = random.Random(semente)
+    agora = datetime.utcnow()
+    inicio = time.perf_counter()
+
+    with aplicacao.app_context():
+        inicializar_banco()
+        admin = Usuario.query.filter_by(email=EMAIL_ADMIN).first()
+        metodo = aplicacao.config['SENHA_METODO']
+        admin.senha_hash = generate_password_hash(SENHA_BENCHMARK, method=metodo)
+        db.session.commit()
+
+        senha_hash = generate_password_hash(SENHA_BENCHMARK, method=metodo)
+        primeiro_id = (db.session.query(db.func.max(Usuario.id)).scalar() or 0) + 1
+        linhas = [{
+            'nome': f'Usuário {i}',
+            'email': f'bench{primeiro_id + i}@empresa.com',
+            'senha_hash': senha_hash,
+            'is_admin': False,
+            'is_tecnico': i % 20 == 0,
+            'ativo': True,
+            'data_cadastro': agora - timedelta(days=aleatorio.randint(0, 720)),
+        } for i in range(usuarios)]
+        for i in range(0, len(linhas), lote):
+            db.session.execute(insert(Usuario), linhas[i:i + lote])
+        db.session.commit()
+
+        ids_usuarios = [id for (id,) in db.session.query(Usuario.id).filter(Usuario.ativo.is_(True))]
+        ids_tecnicos = [id for (id,) in db.session.query(Usuario.id).filter_by(is_tecnico=True)]
+
+        primeiro_chamado = (db.session.query(db.func.max(Chamado.id)).scalar() or 0) + 1
+        total_historico = 0
+        for i in range(0, chamados, lote):
+            linhas = []
+            linhas_historico = []
+            for n in range(i, min(i + lote, chamados)):
+                criado = agora - timedelta(minutes=aleatorio.randint(0, 525600))
+                status = aleatorio.choice(STATUS)
+                linhas.append({
+                    'titulo': f'Chamado de teste {n}',
+                    'descricao': f'Descrição do chamado {n}: impressora, rede ou sistema',
+                    'status': status,
+                    'prioridade': aleatorio.choice(PRIORIDADES),
+                    'data_criacao': criado,
+                    'data_atualizacao': criado,
+                    'data_resolucao': criado + timedelta(hours=aleatorio.randint(1, 200))
+                                      if status in ('resolvido', 'fechado') else None,
+                    'usuario_id': aleatorio.choice(ids_usuarios),
+                    'tecnico_id': aleatorio.choice(ids_tecnicos)
+                                  if ids_tecnicos and status != 'aberto' else None,
+                    'localizacao': f'{aleatorio.randint(1, 12)}º andar',
+                })
+                for h in range(historico):
+                    linhas_historico.append({
+                        'chamado_id': primeiro_chamado + n,
+                        'usuario_id': aleatorio.choice(ids_usuarios),
+                        'acao': 'criacao' if h == 0 else 'atualizacao',
+                        'descricao': 'Chamado criado' if h == 0 else f'Comentário {h}',
+                        'data_acao': criado + timedelta(hours=h),
+                    })
+                if linhas[-1]['data_resolucao'] is not None:
+                    # Resolução no histórico, como na atualização pela página (resumos de SLA)
+                    linhas_historico.append({
+                        'chamado_id': primeiro_chamado + n,
+                        'usuario_id': linhas[-1]['tecnico_id'] or aleatorio.choice(ids_usuarios),
+                        'acao': 'atualizacao',
+                        'descricao': 'Status alterado de em_andamento para resolvido',
+                        'data_acao': linhas[-1]['data_resolucao'],
+                    })
+            db.session.execute(insert(Chamado), linhas)
+            if linhas_historico:
+                db.session.execute(insert(HistoricoChamado), linhas_historico)
+                total_historico += len(linhas_historico)
+            db.session.commit()
+
+        aplicacao.extensions['contadores'].reconstruir()
+        aplicacao.extensions['busca'].reconstruir()
+
+    print(f"Semeados {usuarios} usuários, {chamados} chamados e {total_historico} "
+          f"registros de histórico em {time.perf_counter() - inicio:.1f}s")
+
+
+# Cenários: (nome, método, função que gera a URL, função que gera o formulário)
+
+def _cenarios(max_chamado, ids_tecnicos):
+    def id_aleatorio():
+        return random.randint(1, max_chamado)
+
+    return [
+        ('login', 'POST', lambda: '/login',
+         lambda: {'email': EMAIL_ADMIN, 'senha': SENHA_BENCHMARK}),
+        ('dashboard', 'GET', lambda: '/dashboard', None),
+        ('listar_chamados', 'GET', lambda: '/chamados', None),
+        ('buscar_chamados', 'GET',
+         lambda: f"/chamados?q={random.choice(('impressora', 'rede', 'sistema', 'teste 1'))}", None),
+        ('listar_chamados_filtros', 'GET',
+         lambda: f'/chamados?status={random.choice(STATUS)}&prioridade={random.choice(PRIORIDADES)}', None),
+        ('detalhe_chamado', 'GET', lambda: f'/chamados/{id_aleatorio()}', None),
+        ('novo_chamado', 'POST', lambda: '/chamados/novo',
+         lambda: {'titulo': 'Chamado do benchmark', 'descricao': 'Gerado pelo benchmark',
+                  'prioridade': random.choice(PRIORIDADES), 'localizacao': '', 'equipamento': ''}),
+        ('atualizar_chamado', 'POST', lambda: f'/chamados/{id_aleatorio()}/atualizar',
+         lambda: {'status': random.choice(STATUS), 'prioridade': random.choice(PRIORIDADES),
+                  'tecnico_id': str(random.choice(ids_tecnicos)) if ids_tecnicos else '',
+                  'comentario': 'benchmark'}),
+        ('api_chamados', 'GET', lambda: '/api/chamados?limite=100', None),
+    ]
+
+
+def _filtrar(todos, nomes):
+    if not nomes:
+        return todos
+    desconhecidos = set(nomes) - {cenario[0] for cenario in todos}
+    if desconhecidos:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+    return [cenario for cenario in todos if cenario[0] in nomes]
+
+
+def _dados_cenarios(aplicacao):
+    from models import db, Usuario, Chamado
+    with aplicacao.app_context():
+        max_chamado = db.session.query(db.func.max(Chamado.id)).scalar() or 1
+        ids_tecnicos = [id for (id,) in db.session.query(Usuario.id)
+                                                  .filter_by(is_tecnico=True, ativo=True).limit(50)]
+    return max_chamado, ids_tecnicos
+
+
+def percentil(valores, p):
+    """Percentil pelo posto mais próximo (o menor valor com p% das amostras até ele)"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p * len(ordenados) / 100) - 1))
+    return ordenados[indice]
+
+
+def resumir(duracoes, erros, tempo_total):
+    return {
+        'requisicoes': len(duracoes),
+        'erros': erros,
+        'throughput_rps': round(len(duracoes) / tempo_total, 2) if tempo_total else None,
+        'media_ms': round(sum(duracoes) / len(duracoes) * 1000, 3) if duracoes else None,
+        'p50_ms': round(percentil(duracoes, 50) * 1000, 3) if duracoes else None,
+        'p95_ms': round(percentil(duracoes, 95) * 1000, 3) if duracoes else None,
+        'p99_ms': round(percentil(duracoes, 99) * 1000, 3) if duracoes else None,
+    }
+
+
+# Execução pelo cliente de teste do Flask
+
+def executar_cliente(aplicacao, requisicoes, aquecimento, cenarios):
+    max_chamado, ids_tecnicos = _dados_cenarios(aplicacao)
+    resultados = {}
+
+    cliente = aplicacao.test_client()
+    cliente.post('/login', data={'email': EMAIL_ADMIN, 'senha': SENHA_BENCHMARK})
+
+    for nome, metodo, url, formulario in _filtrar(_cenarios(max_chamado, ids_tecnicos), cenarios):
+        duracoes = []
+        erros = 0
+        inicio_cenario = time.perf_counter()
+        for n in range(aquecimento + requisicoes):
+            # login precisa de uma sessão nova a cada requisição
+            atual = aplicacao.test_client() if nome == 'login' else cliente
+            inicio = time.perf_counter()
+            resposta = atual.open(url(), method=metodo, data=formulario() if formulario else None)
+            resposta.get_data()
+            resposta.close()
+            duracao = time.perf_counter() - inicio
+            if n == aquecimento:
+                inicio_cenario = inicio
+            if n >= aquecimento:
+                duracoes.append(duracao)
+                if resposta.status_code >= 400:
+                    erros += 1
+        resultados[nome] = resumir(duracoes, erros, time.perf_counter() - inicio_cenario)
+    return resultados
+
+
+# Execução por HTTP concorrente
+
+class SessaoHTTP:
+    """Cliente HTTP simples com cookies e token CSRF (um por thread)"""
+
+    def __init__(self, base):
+        self.base = base.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.csrf = None
+
+    def requisitar(self, metodo, caminho, dados=None):
+        corpo = None
+        if dados is not None:
+            if self.csrf:
+                dados = dict(dados, csrf_token=self.csrf)
+            corpo = urllib.parse.urlencode(dados).encode()
+        pedido = urllib.request.Request(self.base + caminho, data=corpo, method=metodo)
+        try:
+            with self.abridor.open(pedido, timeout=60) as resposta:
+                conteudo = resposta.read()
+                return resposta.status, conteudo
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def obter_csrf(self, caminho):
+        _, conteudo = self.requisitar('GET', caminho)
+        encontrado = re.search(rb'name="csrf_token" type="hidden" value="([^"]+)"', conteudo)
+        self.csrf = encontrado.group(1).decode() if encontrado else None
+
+    def entrar(self):
+        self.obter_csrf('/login')
+        self.requisitar('POST', '/login', {'email': EMAIL_ADMIN, 'senha': SENHA_BENCHMARK})
+        self.obter_csrf('/chamados/novo')
+
+
+def _iniciar_servidor(aplicacao, porta=0):
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    servidor = make_server('127.0.0.1', porta, aplicacao, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_port}'
+
+
+def servir(banco, porta):
+    """Servidor embutido em primeiro plano (um por processo com --processos)"""
+    # terminate() vira SystemExit: a aplicação encerra seus pools normalmente
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    _iniciar_servidor(carregar_app(banco), porta)
+    threading.Event().wait()
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _aguardar_servidor(base, limite=120):
+    fim = time.monotonic() + limite
+    while True:
+        try:
+            urllib.request.urlopen(base + '/login', timeout=5).read()
+            return
+        except OSError:
+            if time.monotonic() > fim:
+                raise
+            time.sleep(0.2)
+
+
+def _iniciar_processos(banco, quantidade):
+    processos = []
+    bases = []
+    for _ in range(quantidade):
+        porta = _porta_livre()
+        processos.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), 'servir',
+                                           '--banco', banco, '--porta', str(porta)]))
+        bases.append(f'http://127.0.0.1:{porta}')
+    for base in bases:
+        _aguardar_servidor(base)
+    return processos, bases
+
+
+def executar_http(aplicacao, bases, requisicoes, concorrencia, cenarios):
+    max_chamado, ids_tecnicos = _dados_cenarios(aplicacao)
+    resultados = {}
+
+    # Sessões distribuídas entre os servidores (um por processo com --processos)
+    sessoes = [SessaoHTTP(bases[i % len(bases)]) for i in range(concorrencia)]
+    for sessao in sessoes:
+        sessao.entrar()
+
+    for nome, metodo, url, formulario in _filtrar(_cenarios(max_chamado, ids_tecnicos), cenarios):
+        duracoes = []
+        erros = [0]
+        lock = threading.Lock()
+        por_thread = max(1, requisicoes // concorrencia)
+
+        def trabalhar(sessao):
+            locais = []
+            falhas = 0
+            for _ in range(por_thread):
+                if nome == 'login':
+                    sessao = SessaoHTTP(sessao.base)
+                    sessao.obter_csrf('/login')
+                inicio = time.perf_counter()
+                status, _ = sessao.requisitar(metodo, url(), formulario() if formulario else None)
+                locais.append(time.perf_counter() - inicio)
+                if status >= 400:
+                    falhas += 1
+            with lock:
+                duracoes.extend(locais)
+                erros[0] += falhas
+
+        threads = [threading.Thread(target=trabalhar, args=(sessao,)) for sessao in sessoes]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        resultados[nome] = resumir(duracoes, erros[0], time.perf_counter() - inicio)
+    return resultados
+
+
+# Relatório e comparação
+
+def imprimir(resultados):
+    print(f"{'cenário':<26}{'req':>7}{'erros':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for nome, r in resultados.items():
+        print(f"{nome:<26}{r['requisicoes']:>7}{r['erros']:>7}{r['throughput_rps'] or 0:>10.1f}"
+              f"{r['p50_ms'] or 0:>10.2f}{r['p95_ms'] or 0:>10.2f}{r['p99_ms'] or 0:>10.2f}")
+
+
+def comparar(resultados, arquivo_base, tolerancia):
+    """Cenários cujo p95 piorou além da tolerância em relação à execução base"""
+    with open(arquivo_base, encoding='utf-8') as f:
+        base = json.load(f)['cenarios']
+
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = base.get(nome)
+        if not anterior or not anterior.get('p95_ms') or not atual.get('p95_ms'):
+            continue
+        razao = atual['p95_ms'] / anterior['p95_ms']
+        if razao > tolerancia:
+            regressoes.append((nome, anterior['p95_ms'], atual['p95_ms'], razao))
+    return regressoes
+
+
+# Partida a frio
+
+def medir_partida_processo(banco):
+    """Mede, neste processo, as fases da partida e imprime o resultado em JSON"""
+    _configurar_ambiente(banco)
+    inicio = time.perf_counter()
+    import app as modulo
+    importado = time.perf_counter()
+    # Revisões anteriores à fábrica criavam o app (e abriam o banco) na importação
+    criar_app = getattr(modulo, 'create_app', None)
+    aplicacao = criar_app() if criar_app else modulo.app
+    criado = time.perf_counter()
+    resposta = aplicacao.test_client().get('/login')
+    resposta.get_data()
+    respondido = time.perf_counter()
+    print(json.dumps({
+        'importar_ms': (importado - inicio) * 1000,
+        'create_app_ms': (criado - importado) * 1000,
+        'primeira_requisicao_ms': (respondido - criado) * 1000,
+        'status': resposta.status_code,
+    }))
+    sys.stdout.flush()
+    # Sem encerrar pools e threads da aplicação: só a medida interessa
+    os._exit(0)
+
+
+def partida(banco, repeticoes, saida=None):
+    """Partida a frio em `repeticoes` processos novos (mediana e mínimo de cada fase)"""
+    medidas = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processo = subprocess.run([sys.executable, os.path.abspath(__file__), 'partida', '--banco', banco,
+                                   '--processo-filho'], capture_output=True, text=True, check=True)
+        total = time.perf_counter() - inicio
+        medida = json.loads(processo.stdout.strip().splitlines()[-1])
+        if medida.pop('status') >= 400:
+            raise SystemExit('A primeira requisição falhou')
+        medida['processo_ms'] = total * 1000
+        medidas.append(medida)
+
+    resultado = {}
+    print(f"{'fase':<24} {'mediana':>10} {'mínimo':>10}")
+    for fase in ('importar_ms', 'create_app_ms', 'primeira_requisicao_ms', 'processo_ms'):
+        valores = [medida[fase] for medida in medidas]
+        resultado[fase] = {'mediana': round(percentil(valores, 50), 1), 'minimo': round(min(valores), 1)}
+        print(f"{fase:<24} {resultado[fase]['mediana']:>10.1f} {resultado[fase]['minimo']:>10.1f}")
+    if saida:
+        with open(saida, 'w', encoding='utf-8') as f:
+            json.dump({'repeticoes': repeticoes, 'python': platform.python_version(), 'fases': resultado},
+                      f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {saida}")
+    return resultado
+
+
+def executar(args):
+    aplicacao = carregar_app(args.banco)
+    random.seed(args.semente)
+    cenarios = args.cenarios.split(',') if args.cenarios else None
+
+    if args.modo == 'cliente':
+        resultados = executar_cliente(aplicacao, args.requisicoes, args.aquecimento, cenarios)
+    else:
+        servidor = None
+        processos = []
+        if args.url:
+            bases = [args.url]
+        elif args.processos > 1:
+            processos, bases = _iniciar_processos(args.banco, args.processos)
+        else:
+            servidor, base = _iniciar_servidor(aplicacao)
+            bases = [base]
+        try:
+            resultados = executar_http(aplicacao, bases, args.requisicoes, args.concorrencia, cenarios)
+        finally:
+            if servidor:
+                servidor.shutdown()
+            for processo in processos:
+                processo.terminate()
+            for processo in processos:
+                processo.wait()
+
+    imprimir(resultados)
+
+    relatorio = {
+        'meta': {
+            'data': datetime.utcnow().isoformat(),
+            'modo': args.modo,
+            'concorrencia': args.concorrencia if args.modo == 'http' else 1,
+            'processos': args.processos if args.modo == 'http' and not args.url else 1,
+            'requisicoes_por_cenario': args.requisicoes,
+            'banco': args.banco.split('@')[-1],
+            'python': platform.python_version(),
+        },
+        'cenarios': resultados,
+    }
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.tolerancia)
+        for nome, anterior, atual, razao in regressoes:
+            print(f"[REGRESSÃO] {nome}: p95 {anterior:.2f} ms -> {atual:.2f} ms ({razao:.2f}x)")
+        if regressoes:
+            return 1
+        print(f"Sem regressões acima de {args.tolerancia:.2f}x em relação a {args.comparar}.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do sistema de chamados')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_semear = sub.add_parser('semear', help='Popular o banco com dados de teste')
+    p_semear.add_argument('--banco', required=True, help='URL do banco (ex.: sqlite:////tmp/bench.db)')
+    p_semear.add_argument('--usuarios', type=int, default=1000)
+    p_semear.add_argument('--chamados', type=int, default=100000)
+    p_semear.add_argument('--historico', type=int, default=2, help='Registros de histórico por chamado')
+
+    p_exec = sub.add_parser('executar', help='Executar os cenários e medir latência')
+    p_exec.add_argument('--banco', required=True)
+    p_exec.add_argument('--modo', choices=('cliente', 'http'), default='cliente')
+    p_exec.add_argument('--url', help='Servidor já em execução (modo http); padrão: servidor embutido')
+    p_exec.add_argument('--concorrencia', type=int, default=8)
+    p_exec.add_argument('--processos', type=int, default=1,
+                        help='Servidores embutidos em processos separados (modo http)')
+    p_exec.add_argument('--cenarios', help='Lista separada por vírgulas; padrão: todos')
+    p_exec.add_argument('--requisicoes', type=int, default=200, help='Requisições por cenário')
+    p_exec.add_argument('--aquecimento', type=int, default=10)
+    p_exec.add_argument('--semente', type=int, default=42)
+    p_exec.add_argument('--saida', help='Arquivo JSON para salvar os resultados')
+    p_exec.add_argument('--comparar', help='JSON de uma execução anterior')
+    p_exec.add_argument('--tolerancia', type=float, default=1.2,
+                        help='Piora máxima aceita no p95 (1.2 = 20%%)')
+
+    p_servir = sub.add_parser('servir', help='Servidor embutido em primeiro plano')
+    p_servir.add_argument('--banco', required=True)
+    p_servir.add_argument('--porta', type=int, default=5000)
+
+    p_partida = sub.add_parser('partida', help='Medir a partida a frio em processos novos')
+    p_partida.add_argument('--banco', required=True)
+    p_partida.add_argument('--repeticoes', type=int, default=10)
+    p_partida.add_argument('--saida', help='Arquivo JSON para salvar os resultados')
+    p_partida.add_argument('--processo-filho', action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+    if args.comando == 'partida':
+        if args.processo_filho:
+            medir_partida_processo(args.banco)
+        partida(args.banco, args.repeticoes, args.saida)
+        return 0
+    if args.comando == 'semear':
+        semear(args.banco, args.usuarios, args.chamados, args.historico)
+        return 0
+    if args.comando == 'servir':
+        servir(args.banco, args.porta)
+        return 0
+    return executar(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""Busca textual em chamados (título, descrição, local, equipamento e histórico).
+
+O índice fica na tabela `chamados_busca`, criada pela migração 0003:
+uma tabela virtual FTS5 no SQLite e uma coluna tsvector com índice GIN no
+PostgreSQL. Sem essa tabela (SQLite compilado sem FTS5 ou outro banco) a
+busca usa um índice invertido em memória, montado na primeira consulta.
+
+O índice é atualizado por eventos da sessão: chamados criados ou
+alterados e novos registros de histórico são reindexados no mesmo flush
+(na mesma transação) ou, no índice em memória, após o commit. Escritas
+em massa pelo Core devem chamar `BuscaChamados.indexar` ou rodar
+`flask reindexar-busca`.
+
+O índice em memória só recebe os eventos do próprio processo: a cada
+BUSCA_MEMORIA_ATUALIZACAO segundos, antes de uma busca, ele reindexa os
+chamados com `data_atualizacao` desde a última leitura (toda edição e todo
+comentário, pela página ou em lote, atualizam essa coluna), o que traz o
+que os outros workers gravaram.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, column, event, func, inspect, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from models import db, Chamado, HistoricoChamado
+from paginacao import PaginaCursor
+
+TABELA = 'chamados_busca'
+
+# Campos indexados e peso de cada um na relevância
+PESOS = {
+    'titulo': 10.0,
+    'descricao': 4.0,
+    'localizacao': 2.0,
+    'equipamento': 2.0,
+    'historico': 1.0,
+}
+CAMPOS_CHAMADO = ('titulo', 'descricao', 'localizacao', 'equipamento')
+
+# Termos com menos letras que isso são ignorados (ruído e prefixos caros)
+TAMANHO_MINIMO_TERMO = 2
+
+# Índice em memória: alterações gravadas por transações que terminam depois da leitura
+MARGEM_LEITURA = timedelta(seconds=60)
+
+_PALAVRA = re.compile(r'\w+')
+
+
+def normalizar(texto, remover_acentos=True):
+    """Quebra o texto em termos minúsculos, opcionalmente sem acentos"""
+    texto = (texto or '').lower()
+    if remover_acentos:
+        # NFD, e não NFKD: mantém 'º' e 'ª' como o tokenizador unicode61 do FTS5
+        texto = ''.join(c for c in unicodedata.normalize('NFD', texto)
+                        if not unicodedata.combining(c))
+    return _PALAVRA.findall(texto)
+
+
+def termos_da_busca(busca, remover_acentos=True):
+    termos = [t for t in normalizar(busca, remover_acentos) if len(t) >= TAMANHO_MINIMO_TERMO]
+    return list(dict.fromkeys(termos))
+
+
+def _ids_em_lotes(ids, tamanho=500):
+    ids = sorted(ids)
+    for i in range(0, len(ids), tamanho):
+        yield ids[i:i + tamanho]
+
+
+class PaginaBusca(PaginaCursor):
+    """Página de resultados por relevância; navega por número de página, sem cursor"""
+    
+    def __init__(self, items, page, per_page, has_next):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = page > 1
+        self.total = None
+        self.total_exato = True
+        self.next_cursor = None
+        self.prev_cursor = None
+
+
+# Índices no banco
+
+class IndiceFTS5:
+    """Tabela virtual FTS5 (SQLite) com rowid = id do chamado, ordenada por bm25"""
+    
+    nome = 'fts5'
+    transacional = True
+    tabela = table(TABELA, column('rowid'))
+    
+    _REMOVER = text(f'DELETE FROM {TABELA} WHERE rowid IN :ids')\
+        .bindparams(bindparam('ids', expanding=True))
+    _INSERIR = text(f"""
+        INSERT INTO {TABELA} (rowid, titulo, descricao, localizacao, equipamento, historico)
+        SELECT c.id, c.titulo, c.descricao, coalesce(c.localizacao, ''), coalesce(c.equipamento, ''),
+               coalesce((SELECT group_concat(h.descricao, ' ') FROM historico_chamados h
+                         WHERE h.chamado_id = c.id), '')
+        FROM chamados c WHERE c.id IN :ids
+    """).bindparams(bindparam('ids', expanding=True))
+    
+    @staticmethod
+    def criar(conexao):
+        conexao.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5("
+            f"{', '.join(PESOS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"))
+    
+    def indexar(self, conexao, ids):
+        for lote in _ids_em_lotes(ids):
+            conexao.execute(self._REMOVER, {'ids': lote})
+            conexao.execute(self._INSERIR, {'ids': lote})
+    
+    def reconstruir(self, conexao):
+        conexao.execute(text(f'DELETE FROM {TABELA}'))
+        conexao.execute(text(f"""
+            INSERT INTO {TABELA} (rowid, titulo, descricao, localizacao, equipamento, historico)
+            SELECT c.id, c.titulo, c.descricao, coalesce(c.localizacao, ''), coalesce(c.equipamento, ''),
+                   coalesce(h.textos, '')
+            FROM chamados c
+            LEFT JOIN (SELECT chamado_id, group_concat(descricao, ' ') AS textos
+                       FROM historico_chamados GROUP BY chamado_id) h ON h.chamado_id = c.id
+        """))
+        conexao.execute(text(f"INSERT INTO {TABELA} ({TABELA}) VALUES ('optimize')"))
+    
+    def ranquear(self, ids, termos, offset, limite):
+        # bm25() com os pesos explícitos é mais rápido que a coluna rank configurada
+        expressao = ' AND '.join(f'"{termo}"*' for termo in termos)
+        pesos = ', '.join(str(peso) for peso in PESOS.values())
+        consulta = ids.join(self.tabela, self.tabela.c.rowid == Chamado.id)\
+                      .filter(text(f'{TABELA} MATCH :expressao').bindparams(expressao=expressao))\
+                      .order_by(literal_column(f'bm25({TABELA}, {pesos})'))\
+                      .offset(offset).limit(limite)
+        return [id for (id,) in consulta]
+
+
+class IndicePostgres:
+    """Tabela com tsvector ponderado (A a D) e índice GIN, ordenada por ts_rank"""
+    
+    nome = 'postgresql'
+    transacional = True
+    tabela = table(TABELA, column('chamado_id'), column('documento'))
+    
+    def __init__(self, idioma='portuguese'):
+        if not re.fullmatch(r'\w+', idioma):
+            raise ValueError(f'Configuração de busca inválida: {idioma}')
+        self.idioma = idioma
+    
+    @staticmethod
+    def criar(conexao):
+        conexao.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {TABELA} (
+                chamado_id INTEGER PRIMARY KEY REFERENCES chamados (id) ON DELETE CASCADE,
+                documento TSVECTOR NOT NULL
+            )
+        """))
+        conexao.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_{TABELA}_documento ON {TABELA} USING GIN (documento)'))
+    
+    def _documento(self, historico):
+        idioma = f"'{self.idioma}'::regconfig"
+        return (f"setweight(to_tsvector({idioma}, coalesce(c.titulo, '')), 'A') || "
+                f"setweight(to_tsvector({idioma}, coalesce(c.descricao, '')), 'B') || "
+                f"setweight(to_tsvector({idioma}, coalesce(c.localizacao, '') || ' ' || "
+                f"coalesce(c.equipamento, '')), 'C') || "
+                f"setweight(to_tsvector({idioma}, coalesce({historico}, '')), 'D')")
+    
+    def indexar(self, conexao, ids):
+        historico = ("(SELECT string_agg(h.descricao, ' ') FROM historico_chamados h "
+                     "WHERE h.chamado_id = c.id)")
+        remover = text(f'DELETE FROM {TABELA} WHERE chamado_id IN :ids')\
+            .bindparams(bindparam('ids', expanding=True))
+        inserir = text(f"""
+            INSERT INTO {TABELA} (chamado_id, documento)
+            SELECT c.id, {self._documento(historico)} FROM chamados c WHERE c.id IN :ids
+        """).bindparams(bindparam('ids', expanding=True))
+        for lote in _ids_em_lotes(ids):
+            conexao.execute(remover, {'ids': lote})
+            conexao.execute(inserir, {'ids': lote})
+    
+    def reconstruir(self, conexao):
+        conexao.execute(text(f'TRUNCATE {TABELA}'))
+        conexao.execute(text(f"""
+            INSERT INTO {TABELA} (chamado_id, documento)
+            SELECT c.id, {self._documento('h.textos')}
+            FROM chamados c
+            LEFT JOIN (SELECT chamado_id, string_agg(descricao, ' ') AS textos
+                       FROM historico_chamados GROUP BY chamado_id) h ON h.chamado_id = c.id
+        """))
+    
+    def ranquear(self, ids, termos, offset, limite):
+        expressao = ' & '.join(f'{termo}:*' for termo in termos)
+        tsquery = text(f"to_tsquery('{self.idioma}'::regconfig, :expressao)")\
+            .bindparams(expressao=expressao)
+        documento = self.tabela.c.documento
+        relevancia = func.ts_rank(documento, tsquery)
+        consulta = ids.join(self.tabela, self.tabela.c.chamado_id == Chamado.id)\
+                      .filter(documento.op('@@')(tsquery))\
+                      .order_by(relevancia.desc())\
+                      .offset(offset).limit(limite)
+        return [id for (id,) in consulta]
+
+
+# Índice invertido em memória (fallback)
+
+class IndiceMemoria:
+    """Índice invertido por processo: termo -> {id do chamado: peso}"""
+    
+    nome = 'memoria'
+    transacional = False
+    
+    def __init__(self, intervalo=30):
+        self.postagens = {}
+        self.termos_por_chamado = {}
+        self.intervalo = intervalo
+        self._vocabulario = None
+        self._carregado = False
+        self._lido_em = None
+        self._atualizado_em = 0
+        self._trava = threading.RLock()
+    
+    def _textos(self, conexao, ids=None):
+        """(id, {campo: texto}) dos chamados, em lotes de ids"""
+        if ids is None:
+            ids = [id for (id,) in conexao.execute(select(Chamado.id))]
+        colunas = [Chamado.id] + [getattr(Chamado, campo) for campo in CAMPOS_CHAMADO]
+        for lote in _ids_em_lotes(ids):
+            historicos = {}
+            for chamado_id, descricao in conexao.execute(
+                    select(HistoricoChamado.chamado_id, HistoricoChamado.descricao)
+                      .where(HistoricoChamado.chamado_id.in_(lote))):
+                historicos.setdefault(chamado_id, []).append(descricao or '')
+            encontrados = set()
+            for linha in conexao.execute(select(*colunas).where(Chamado.id.in_(lote))):
+                campos = dict(zip(CAMPOS_CHAMADO, linha[1:]))
+                campos['historico'] = ' '.join(historicos.get(linha.id, ()))
+                encontrados.add(linha.id)
+                yield linha.id, campos
+            for id in set(lote) - encontrados:
+                yield id, None
+    
+    def _remover(self, id):
+        for termo in self.termos_por_chamado.pop(id, ()):
+            postagem = self.postagens.get(termo)
+            if postagem is not None:
+                postagem.pop(id, None)
+                if not postagem:
+                    del self.postagens[termo]
+    
+    def _adicionar(self, id, campos):
+        pesos = {}
+        for campo, peso in PESOS.items():
+            for termo in normalizar(campos.get(campo)):
+                pesos[termo] = pesos.get(termo, 0.0) + peso
+        for termo, peso in pesos.items():
+            self.postagens.setdefault(termo, {})[id] = peso
+        self.termos_por_chamado[id] = tuple(pesos)
+    
+    def indexar(self, conexao, ids):
+        with self._trava:
+            if not self._carregado:
+                return
+            for id, campos in self._textos(conexao, ids):
+                self._remover(id)
+                if campos is not None:
+                    self._adicionar(id, campos)
+            self._vocabulario = None
+    
+    def reconstruir(self, conexao):
+        with self._trava:
+            self._lido_em = datetime.utcnow()
+            self._atualizado_em = time.monotonic()
+            self.postagens = {}
+            self.termos_por_chamado = {}
+            for id, campos in self._textos(conexao):
+                self._adicionar(id, campos)
+            self._vocabulario = None
+            self._carregado = True
+    
+    def atualizar(self, conexao):
+        """Carrega o índice ou, vencido o intervalo, reindexa o que mudou desde a última leitura"""
+        with self._trava:
+            if not self._carregado:
+                self.reconstruir(conexao)
+                return
+            if time.monotonic() - self._atualizado_em < self.intervalo:
+                return
+            self._atualizado_em = time.monotonic()
+            lido_em = datetime.utcnow()
+            ids = [id for (id,) in conexao.execute(
+                select(Chamado.id).where(Chamado.data_atualizacao >= self._lido_em - MARGEM_LEITURA))]
+            self.indexar(conexao, ids)
+            self._lido_em = lido_em
+    
+    def _expandir(self, prefixo):
+        """Termos do vocabulário que começam com o prefixo"""
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self.postagens)
+        inicio = bisect_left(self._vocabulario, prefixo)
+        for termo in self._vocabulario[inicio:]:
+            if not termo.startswith(prefixo):
+                break
+            yield termo
+    
+    def ordenar(self, termos):
+        """Ids que contêm todos os termos (como prefixo), do mais ao menos relevante"""
+        with self._trava:
+            total = max(len(self.termos_por_chamado), 1)
+            pontuacao = None
+            for termo in termos:
+                parcial = {}
+                for expandido in self._expandir(termo):
+                    postagem = self.postagens[expandido]
+                    idf = math.log(1 + total / len(postagem))
+                    for id, peso in postagem.items():
+                        parcial[id] = parcial.get(id, 0.0) + peso * idf
+                if pontuacao is None:
+                    pontuacao = parcial
+                else:
+                    pontuacao = {id: valor + parcial[id] for id, valor in pontuacao.items()
+                                 if id in parcial}
+                if not pontuacao:
+                    return []
+        return sorted(pontuacao or {}, key=lambda id: (-pontuacao[id], -id))
+    
+    def ranquear(self, ids, termos, offset, limite):
+        if not self._carregado or time.monotonic() - self._atualizado_em >= self.intervalo:
+            with db.engine.connect() as conexao:
+                self.atualizar(conexao)
+        
+        # Permissão e filtros continuam no SQL: percorre o ranking em lotes
+        # até juntar offset + limite chamados visíveis
+        visiveis = []
+        ranking = self.ordenar(termos)
+        for i in range(0, len(ranking), 500):
+            lote = ranking[i:i + 500]
+            encontrados = {id for (id,) in ids.filter(Chamado.id.in_(lote))}
+            visiveis.extend(id for id in lote if id in encontrados)
+            if len(visiveis) >= offset + limite:
+                break
+        return visiveis[offset:offset + limite]
+
+
+def criar_indice_busca(conexao, idioma='portuguese'):
+    """Cria a tabela do índice no banco, quando suportado (None se não houver suporte)"""
+    dialeto = conexao.dialect.name
+    if dialeto == 'sqlite':
+        try:
+            IndiceFTS5.criar(conexao)
+        except OperationalError:
+            # SQLite compilado sem FTS5: a busca usa o índice em memória
+            return None
+        return IndiceFTS5()
+    if dialeto == 'postgresql':
+        IndicePostgres.criar(conexao)
+        return IndicePostgres(idioma)
+    return None
+
+
+class BuscaChamados:
+    """Busca textual com o melhor índice disponível no banco configurado"""
+    
+    def __init__(self, app=None):
+        self._indice = None
+        self.memoria = IndiceMemoria()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.memoria.intervalo = app.config['BUSCA_MEMORIA_ATUALIZACAO']
+        app.extensions['busca'] = self
+    
+    @property
+    def indice(self):
+        return self.obter_indice()
+    
+    def obter_indice(self, conexao=None):
+        """Índice em uso; `conexao` evita abrir outra conexão no meio de uma transação
+        (no SQLite ela ficaria bloqueada pela escrita em andamento)"""
+        if self._indice is None:
+            if inspect(conexao if conexao is not None else db.engine).has_table(TABELA):
+                if db.engine.dialect.name == 'postgresql':
+                    self._indice = IndicePostgres(current_app.config['BUSCA_IDIOMA'])
+                else:
+                    self._indice = IndiceFTS5()
+            else:
+                self._indice = self.memoria
+        return self._indice
+    
+    def paginar(self, query, busca, page=1, per_page=10):
+        """Página de chamados de `query` que casam com a busca, por relevância"""
+        page = max(page, 1)
+        indice = self.indice
+        termos = termos_da_busca(busca, remover_acentos=not isinstance(indice, IndicePostgres))
+        if not termos:
+            return PaginaBusca([], page, per_page, has_next=False)
+        
+        # Ranqueia só os ids (linhas estreitas) e depois carrega a página
+        # com os mesmos joins da listagem
+        ids = indice.ranquear(query.with_entities(Chamado.id), termos,
+                              (page - 1) * per_page, per_page + 1)
+        has_next = len(ids) > per_page
+        ids = ids[:per_page]
+        por_id = {chamado.id: chamado for chamado in query.filter(Chamado.id.in_(ids))} if ids else {}
+        return PaginaBusca([por_id[id] for id in ids if id in por_id], page, per_page, has_next)
+    
+    def indexar(self, ids, conexao=None):
+        """Reindexa os chamados informados (use após escritas em massa pelo Core)"""
+        ids = set(ids)
+        if not ids:
+            return
+        if conexao is not None:
+            self.obter_indice(conexao).indexar(conexao, ids)
+        else:
+            with db.engine.begin() as conexao:
+                self.indice.indexar(conexao, ids)
+    
+    def reconstruir(self):
+        """Recria o índice inteiro a partir do banco"""
+        with db.engine.begin() as conexao:
+            self.indice.reconstruir(conexao)
+
+
+# Eventos da sessão: chamados a reindexar em cada flush
+
+def _chamados_alterados(session):
+    ids = set()
+    for obj in session.new:
+        if isinstance(obj, Chamado):
+            ids.add(obj.id)
+        elif isinstance(obj, HistoricoChamado) and obj.chamado_id is not None:
+            ids.add(obj.chamado_id)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Chamado):
+            ids.add(obj.id)
+        elif isinstance(obj, HistoricoChamado):
+            ids.add(obj.chamado_id)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Chamado):
+            estado = inspect(obj)
+            if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_CHAMADO):
+                ids.add(obj.id)
+        elif isinstance(obj, HistoricoChamado) and inspect(obj).attrs.descricao.history.has_changes():
+            ids.add(obj.chamado_id)
+    
+    ids.discard(None)
+    return ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _indexar_no_flush(session, flush_context):
+    if not has_app_context():
+        return
+    busca = current_app.extensions.get('busca')
+    if busca is None:
+        return
+    ids = _chamados_alterados(session)
+    if not ids:
+        return
+    
+    indice = busca.obter_indice(session.connection())
+    if indice.transacional:
+        indice.indexar(session.connection(), ids)
+    else:
+        session.info.setdefault('busca_reindexar', set()).update(ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _indexar_apos_commit(session):
+    ids = session.info.pop('busca_reindexar', None)
+    if not ids or not has_app_context():
+        return
+    busca = current_app.extensions.get('busca')
+    if busca is not None:
+        busca.indexar(ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_reindexacao(session):
+    session.info.pop('busca_reindexar', None)
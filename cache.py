@@ -0,0 +1,131 @@
+"""Backends de cache com TTL usados pelos contadores e caches da aplicação.
+
+- CacheMemoria: LRU por processo, sem dependências.
+- CacheRedis: compartilhado entre workers; requer o pacote `redis`
+  (qualquer servidor compatível serve, inclusive um substituto local).
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheMemoria:
+    """Cache LRU em memória com expiração por TTL"""
+    
+    def __init__(self, max_itens=10000, ttl=300):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _vivo(self, chave, agora):
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= agora:
+            del self._itens[chave]
+            return None
+        return item
+    
+    def obter(self, chave):
+        with self._lock:
+            item = self._vivo(chave, time.monotonic())
+            if item is None:
+                return None
+            self._itens.move_to_end(chave)
+            return item[0]
+    
+    def definir(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._itens[chave] = (valor, expira)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+    
+    def incrementar(self, chave, campo, delta):
+        """Soma `delta` a um campo de um dicionário em cache; ignora chaves ausentes"""
+        with self._lock:
+            item = self._vivo(chave, time.monotonic())
+            if item is None:
+                return False
+            valor = item[0]
+            valor[campo] = valor.get(campo, 0) + delta
+            return True
+    
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+    
+    def limpar(self, prefixo=''):
+        with self._lock:
+            for chave in [c for c in self._itens if c.startswith(prefixo)]:
+                del self._itens[chave]
+    
+    def __len__(self):
+        return len(self._itens)
+
+
+class CacheRedis:
+    """Cache compartilhado em um servidor Redis"""
+    
+    def __init__(self, url=None, ttl=300, prefixo='chamados:', cliente=None):
+        if cliente is None:
+            import redis
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+    
+    def obter(self, chave):
+        bruto = self.cliente.get(self.prefixo + chave)
+        return pickle.loads(bruto) if bruto is not None else None
+    
+    def definir(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.cliente.set(self.prefixo + chave, pickle.dumps(valor), ex=ttl or None)
+    
+    def incrementar(self, chave, campo, delta):
+        """Soma `delta` a um campo de um dicionário em cache; ignora chaves ausentes"""
+        from redis import WatchError
+        
+        chave = self.prefixo + chave
+        with self.cliente.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(chave)
+                    bruto = pipe.get(chave)
+                    if bruto is None:
+                        pipe.unwatch()
+                        return False
+                    valor = pickle.loads(bruto)
+                    valor[campo] = valor.get(campo, 0) + delta
+                    restante = pipe.pttl(chave)
+                    pipe.multi()
+                    pipe.set(chave, pickle.dumps(valor), px=restante if restante > 0 else None)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    
+    def remover(self, chave):
+        self.cliente.delete(self.prefixo + chave)
+    
+    def limpar(self, prefixo=''):
+        for chave in self.cliente.scan_iter(match=f'{self.prefixo}{prefixo}*'):
+            self.cliente.delete(chave)
+
+
+def compartilhado(cache, app):
+    """Se o que é gravado em `cache` vale para todas as requisições: Redis ou
+    memória de um processo que atende sozinho (PROCESSO_UNICO)"""
+    return not isinstance(cache, CacheMemoria) or app.config['PROCESSO_UNICO']
+
+
+def criar_cache(url, ttl=300, max_itens=10000):
+    """Cria o backend a partir da URL configurada ('memoria://' ou 'redis://...')"""
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        return CacheRedis(url, ttl=ttl)
+    return CacheMemoria(max_itens=max_itens, ttl=ttl)
@@ -0,0 +1,234 @@
+"""Cache HTTP condicional (ETag / Last-Modified) do detalhe, da listagem e da API.
+
+As respostas levam um ETag fraco calculado a partir do que as determina,
+sem renderizar nada: no detalhe, `data_atualizacao` do chamado (uma busca
+pela chave primária); na listagem e em /api/chamados, a versão do escopo
+que o usuário enxerga ('chamados' para admin, 'usuario:<id>' para os demais)
+e a query string. Quem manda o ETag de volta (If-None-Match) recebe 304 se
+nada mudou.
+
+As versões são instantes (ns) guardados no cache (CACHE_URL) e trocados
+após cada commit que cria ou altera chamados (eventos da sessão; as escritas
+pelo Core de lote_chamados chamam `alterar`). Alterações de usuários trocam a
+versão 'usuarios', que entra em todos os ETags (nomes de técnicos e
+criadores aparecem nas páginas). As versões precisam valer para todos os
+workers: com o cache em memória (cada processo com as suas) as respostas
+condicionais ficam desligadas, a menos que um processo só atenda
+(PROCESSO_UNICO).
+
+Uma página que exibiu mensagens flash não leva ETag nem Last-Modified: a
+próxima revalidação não pode devolver 304 para a versão com a mensagem.
+
+Cache-Control é sempre private e varia com o papel: administradores e
+técnicos revalidam toda vez (no-cache); os demais usuários podem reutilizar
+as respostas marcadas como reutilizáveis por HTTP_CACHE_MAX_AGE segundos.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+from flask import Response, current_app, has_app_context, request, session
+from flask.globals import request_ctx
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+
+from cache import criar_cache, compartilhado
+from models import Usuario, Chamado
+
+CHAVE_VERSAO = 'versao:{}'
+
+# Colunas de usuários exibidas nas páginas de chamados
+CAMPOS_USUARIO = ('nome', 'email', 'is_admin', 'is_tecnico', 'ativo')
+
+
+def _versao_app(app):
+    """Muda a cada deploy: hora de modificação dos módulos, templates e estáticos"""
+    arquivos = [os.path.join(app.root_path, nome) for nome in os.listdir(app.root_path)
+                if nome.endswith('.py')]
+    manifesto = os.path.join(app.static_folder, 'dist', 'manifest.json')
+    if os.path.exists(manifesto):
+        arquivos.append(manifesto)
+    for pasta, _, nomes in os.walk(os.path.join(app.root_path, app.template_folder)):
+        arquivos += [os.path.join(pasta, nome) for nome in nomes]
+    return str(max((os.stat(arquivo).st_mtime_ns for arquivo in arquivos), default=0))
+
+
+def _instante(ns):
+    return datetime.fromtimestamp(ns / 1e9, timezone.utc)
+
+
+class Condicional:
+    """Validadores de uma resposta e a decisão entre 304 e a resposta completa"""
+    
+    def __init__(self, cache_http, etag, modificado=None, reutilizavel=True, pagina=True):
+        self.cache_http = cache_http
+        self.etag = etag
+        self.modificado = modificado
+        self.reutilizavel = reutilizavel
+        self.pagina = pagina
+    
+    @property
+    def nao_modificado(self):
+        """True se o cliente já tem esta versão (If-None-Match, ou If-Modified-Since)"""
+        if self.etag is None:
+            return False
+        if self.pagina and session.get('_flashes'):
+            # Mensagens pendentes só aparecem se a página for renderizada
+            return False
+        return not is_resource_modified(request.environ, etag=self.etag, last_modified=self.modificado)
+    
+    def aplicar(self, resposta):
+        """Adiciona ETag, Last-Modified e Cache-Control à resposta"""
+        if self.etag is None:
+            return resposta
+        if self.pagina and request_ctx.flashes:
+            # A renderização consumiu mensagens flash (get_flashed_messages)
+            resposta.cache_control.private = True
+            resposta.cache_control.no_cache = True
+            resposta.vary.add('Cookie')
+            return resposta
+        resposta.set_etag(self.etag, weak=True)
+        # Alterado neste mesmo segundo: Last-Modified (em segundos) não
+        # distinguiria uma nova alteração; fica só o ETag
+        if self.modificado is not None and int(self.modificado.timestamp()) < int(time.time()):
+            resposta.last_modified = self.modificado
+        
+        resposta.cache_control.private = True
+        if self.reutilizavel and self.cache_http.max_age and \
+                not (current_user.is_admin or current_user.is_tecnico):
+            resposta.cache_control.max_age = self.cache_http.max_age
+        else:
+            resposta.cache_control.no_cache = True
+        resposta.vary.add('Cookie')
+        return resposta
+    
+    def resposta_304(self, headers=None):
+        self.cache_http.nao_modificadas += 1
+        return self.aplicar(Response(status=304, headers=headers))
+
+
+class CacheHTTP:
+    """Versões por escopo e validadores das respostas condicionais"""
+    
+    def __init__(self, app=None):
+        self.cache = None
+        self.nao_modificadas = 0
+        self.alteracoes = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        if self.cache is None:
+            self.cache = criar_cache(app.config['CACHE_URL'],
+                                     ttl=app.config['HTTP_CACHE_VERSAO_TTL'],
+                                     max_itens=app.config['CACHE_MAX_ITENS'])
+        self.ativo = app.config['HTTP_CACHE_ATIVO'] and compartilhado(self.cache, app)
+        self.max_age = app.config['HTTP_CACHE_MAX_AGE']
+        self.versao_app = _versao_app(app)
+        app.extensions['cache_http'] = self
+    
+    # Versões
+    
+    def versao(self, escopo):
+        """Instante (ns) da última alteração conhecida no escopo"""
+        chave = CHAVE_VERSAO.format(escopo)
+        versao = self.cache.obter(chave)
+        if versao is None:
+            # Ausente ou expirada: uma versão nova nunca coincide com ETags antigos
+            versao = time.time_ns()
+            self.cache.definir(chave, versao)
+        return versao
+    
+    def alterar(self, donos=(), usuarios=False):
+        """Troca a versão geral dos chamados e a dos solicitantes `donos` (após o commit)"""
+        agora = time.time_ns()
+        escopos = ['chamados'] + [f'usuario:{dono}' for dono in set(donos)]
+        if usuarios:
+            escopos.append('usuarios')
+        for escopo in escopos:
+            self.cache.definir(CHAVE_VERSAO.format(escopo), agora)
+        self.alteracoes += 1
+    
+    def escopo(self, usuario):
+        """Escopo dos chamados que o usuário enxerga (mesma regra de filtrar_chamados)"""
+        return 'chamados' if usuario.is_admin else f'usuario:{usuario.id}'
+    
+    # Validadores
+    
+    def condicional(self, *partes, modificado=None, reutilizavel=True, pagina=True):
+        """Validadores da resposta determinada por `partes`.
+        
+        O ETag também leva o usuário e o papel (a página é dele), a versão
+        'usuarios' e a versão da aplicação. `modificado` (datetime UTC) vira
+        Last-Modified. `pagina=False` para respostas que não exibem as
+        mensagens flash (API).
+        """
+        if not self.ativo:
+            return Condicional(self, None)
+        
+        versao_usuarios = self.versao('usuarios')
+        partes += (current_user.id, current_user.nome, current_user.is_admin, current_user.is_tecnico,
+                   versao_usuarios, self.versao_app)
+        etag = hashlib.sha1(repr(partes).encode()).hexdigest()[:24]
+        
+        if modificado is not None:
+            modificado = max(modificado.replace(tzinfo=timezone.utc), _instante(versao_usuarios))
+        return Condicional(self, etag, modificado, reutilizavel, pagina)
+    
+    def condicional_escopo(self, usuario, *partes, reutilizavel=True, pagina=True):
+        """Validadores de uma listagem: versão do escopo do usuário + `partes`"""
+        if not self.ativo:
+            return Condicional(self, None)
+        versao = self.versao(self.escopo(usuario))
+        return self.condicional(versao, *partes, modificado=_instante(versao).replace(tzinfo=None),
+                                reutilizavel=reutilizavel, pagina=pagina)
+    
+    def metricas(self):
+        return {
+            'nao_modificadas': self.nao_modificadas,
+            'alteracoes': self.alteracoes
+        }
+
+
+# Eventos da sessão: solicitantes com chamados alterados no flush, versões após o commit
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    donos = set()
+    usuarios = False
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Chamado):
+            donos.add(obj.usuario_id)
+        elif isinstance(obj, Usuario):
+            usuarios = usuarios or obj in session.deleted or bool(obj.is_tecnico)
+    for obj in session.dirty:
+        if isinstance(obj, Chamado) and session.is_modified(obj):
+            donos.add(obj.usuario_id)
+        elif isinstance(obj, Usuario):
+            # Último acesso, senha e preferências não aparecem nas páginas
+            estado = inspect(obj)
+            usuarios = usuarios or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_USUARIO)
+    if not (donos or usuarios):
+        return
+    
+    info = session.info.setdefault('versoes_http', {'donos': set(), 'usuarios': False})
+    info['donos'] |= donos
+    info['usuarios'] = info['usuarios'] or usuarios
+
+
+@event.listens_for(Session, 'after_commit')
+def _alterar_versoes(session):
+    info = session.info.pop('versoes_http', None)
+    if not info or not has_app_context():
+        return
+    cache_http = current_app.extensions.get('cache_http')
+    if cache_http is not None:
+        cache_http.alterar(info['donos'], usuarios=info['usuarios'])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_versoes(session):
+    session.info.pop('versoes_http', None)
@@ -0,0 +1,75 @@
+"""Cache da identidade do usuário logado para o user_loader do Flask-Login.
+
+Guarda só identidade e papel (nome, email, is_admin, is_tecnico, ativo)
+com TTL curto, e reconstrói o `Usuario` anexado à sessão sem SELECT; os
+demais atributos (senha_hash, datas) são carregados do banco se usados.
+As rotas que alteram usuários chamam `invalidar` após o commit. Com
+USUARIOS_CACHE_URL (ou CACHE_URL) apontando para Redis a invalidação vale
+para todos os workers. No cache em memória de vários workers a invalidação
+não chega aos outros processos: cada acerto confere `ativo` pela chave
+primária, e a desativação vale na hora; nome e papel seguem o TTL.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from cache import criar_cache, compartilhado
+from models import db, Usuario
+
+CHAVE_USUARIO = 'usuario:{}'
+
+# Colunas guardadas em cache (o restante é carregado sob demanda)
+CAMPOS = ('id', 'nome', 'email', 'is_admin', 'is_tecnico', 'ativo')
+
+
+class CacheUsuarios:
+    """Cache LRU com TTL dos usuários usados pelo load_user"""
+    
+    def __init__(self, app=None):
+        self.cache = None
+        self.acertos = 0
+        self.falhas = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        if self.cache is None:
+            self.cache = criar_cache(app.config['USUARIOS_CACHE_URL'] or app.config['CACHE_URL'],
+                                     ttl=app.config['USUARIOS_CACHE_TTL'],
+                                     max_itens=app.config['USUARIOS_CACHE_MAX'])
+        self.conferir_ativo = not compartilhado(self.cache, app)
+        app.extensions['cache_usuarios'] = self
+    
+    def carregar(self, usuario_id):
+        """Usuário ativo com esse id, ou None (inexistente ou desativado)"""
+        chave = CHAVE_USUARIO.format(usuario_id)
+        dados = self.cache.obter(chave)
+        
+        if dados is None:
+            self.falhas += 1
+            usuario = db.session.get(Usuario, usuario_id)
+            if usuario is None:
+                return None
+            self.cache.definir(chave, {campo: getattr(usuario, campo) for campo in CAMPOS})
+            return usuario if usuario.ativo else None
+        
+        self.acertos += 1
+        if self.conferir_ativo:
+            # Desativado (ou reativado) por outro worker: o cache deste não soube
+            ativo = db.session.scalar(select(Usuario.ativo).where(Usuario.id == usuario_id))
+            dados = {**dados, 'ativo': bool(ativo)}
+        if not dados['ativo']:
+            return None
+        usuario = Usuario(**dados)
+        make_transient_to_detached(usuario)
+        return db.session.merge(usuario, load=False)
+    
+    def invalidar(self, usuario_id):
+        self.cache.remover(CHAVE_USUARIO.format(usuario_id))
+    
+    def metricas(self):
+        leituras = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / leituras, 4) if leituras else None
+        }
@@ -0,0 +1,148 @@
+"""Comandos `flask ...` da aplicação, registrados por create_app"""
+import click
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from models import db, Usuario, Chamado
+from migracoes import aplicar_migracoes, migracoes_pendentes
+from planos import verificar_planos
+from contador_sql import verificar_orcamentos
+from estaticos import baixar_bibliotecas, bibliotecas_ausentes, construir
+from extensoes import busca, contadores, entregador_emails, analise
+
+EMAIL_ADMIN = 'admin@empresa.com'
+
+# Máximo de instruções SQL por página, independente da quantidade de linhas
+ORCAMENTO_CONSULTAS = {
+    '/dashboard': 7,  # card de SLA: versão dos resumos + 2 consultas (só sem o fragmento em cache)
+    '/perfil': 4,  # contadores do solicitante (sem cache compartilhado, lidos do banco)
+    '/chamados': 3,
+    '/chamados?status=aberto&prioridade=alta': 3,
+    '/usuarios': 2,
+    '/usuarios/excluidos': 2,
+    '/api/chamados?limite=100': 2,
+}
+
+def inicializar_banco():
+    """Cria as tabelas, aplica as migrações e cria o admin inicial se não existir.
+    
+    Retorna True se o admin foi criado.
+    """
+    db.create_all()
+    aplicar_migracoes()
+    
+    if Usuario.query.filter_by(email=EMAIL_ADMIN).first():
+        return False
+    admin = Usuario(
+        nome='Administrador',
+        email=EMAIL_ADMIN,
+        senha_hash=generate_password_hash('admin123', method=current_app.config['SENHA_METODO']),
+        is_admin=True,
+        is_tecnico=False,
+        ativo=True
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+def registrar_comandos(app):
+    @app.cli.command('init-db')
+    def init_db():
+        """Cria as tabelas, aplica as migrações e o usuário admin inicial"""
+        if inicializar_banco():
+            print(f"Usuário admin criado: {EMAIL_ADMIN} / admin123")
+        print("Banco inicializado.")
+    
+    @app.cli.command('worker-emails')
+    def worker_emails():
+        """Entrega a fila de emails em primeiro plano (processo separado)"""
+        print("Worker de emails iniciado. Ctrl+C para encerrar.")
+        try:
+            entregador_emails.executar()
+        except KeyboardInterrupt:
+            pass
+    
+    @app.cli.command('migrar')
+    def migrar():
+        """Aplica as migrações de esquema pendentes"""
+        pendentes = [versao for versao, _, _ in migracoes_pendentes()]
+        if not pendentes:
+            print("Nenhuma migração pendente.")
+            return
+        aplicar_migracoes()
+    
+    @app.cli.command('verificar-indices')
+    def verificar_indices():
+        """Falha se alguma consulta frequente fizer varredura completa de tabela"""
+        problemas = verificar_planos()
+        for nome, trechos in problemas.items():
+            print(f"[FALHA] {nome}: {'; '.join(trechos)}")
+        if problemas:
+            raise SystemExit(1)
+        print("Todas as consultas frequentes usam índices.")
+    
+    @app.cli.command('verificar-consultas')
+    def verificar_consultas():
+        """Falha se alguma página exceder o orçamento de consultas SQL (N+1)"""
+        admin = Usuario.query.filter_by(is_admin=True, ativo=True).first()
+        orcamentos = dict(ORCAMENTO_CONSULTAS)
+        ultimo = Chamado.query.order_by(Chamado.id.desc()).first()
+        if ultimo:
+            orcamentos[f'/chamados/{ultimo.id}'] = 5
+        
+        # As consultas do worker de emails entrariam na contagem das páginas
+        app.config['EMAIL_WORKER_INTERNO'] = False
+        excedidos = verificar_orcamentos(app, admin.id, orcamentos)
+        for url, (total, maximo, status) in excedidos.items():
+            print(f"[FALHA] {url}: {total} consultas (máximo {maximo}), HTTP {status}")
+        if excedidos:
+            raise SystemExit(1)
+        print("Todas as páginas dentro do orçamento de consultas.")
+    
+    @app.cli.command('reconstruir-contadores')
+    def reconstruir_contadores():
+        """Recalcula todos os contadores de chamados a partir do banco"""
+        usuarios = contadores.reconstruir()
+        print(f"Contadores reconstruídos para {usuarios} solicitantes.")
+    
+    @app.cli.command('reindexar-busca')
+    def reindexar_busca():
+        """Recria o índice de busca textual a partir do banco"""
+        busca.reconstruir()
+        print(f"Índice de busca reconstruído ({busca.indice.nome}).")
+    
+    @app.cli.command('atualizar-analise')
+    def atualizar_analise():
+        """Inclui nos resumos de SLA o histórico novo (cron, com ANALISE_INTERVALO=0)"""
+        registros = analise.atualizar()
+        print(f"Resumos de SLA atualizados ({registros} registros de histórico).")
+    
+    @app.cli.command('reconstruir-analise')
+    @click.option('--dias-backlog', default=90, show_default=True,
+                  help='Dias anteriores com o backlog reconstruído')
+    def reconstruir_analise(dias_backlog):
+        """Refaz os resumos de SLA a partir de todo o histórico"""
+        registros = analise.reconstruir(dias_backlog)
+        print(f"Resumos de SLA reconstruídos ({registros} registros de histórico, "
+              f"backlog de {dias_backlog} dias).")
+    
+    @app.cli.command('construir-estaticos')
+    @click.option('--atualizar-bibliotecas', is_flag=True,
+                  help='Baixa de novo as bibliotecas de static/vendor/')
+    def construir_estaticos(atualizar_bibliotecas):
+        """Baixa as bibliotecas e gera static/dist/ (minificado, com hash e comprimido)"""
+        baixados, falhas = baixar_bibliotecas(app.static_folder, forcar=atualizar_bibliotecas)
+        for caminho in baixados:
+            print(f"Baixado: static/{caminho}")
+        ausentes = bibliotecas_ausentes(app.static_folder)
+        for caminho, erro in falhas.items():
+            if caminho in ausentes:
+                print(f"[FALHA] static/{caminho} não baixado ({erro})")
+            else:
+                print(f"[AVISO] static/{caminho} não atualizado ({erro}); mantida a cópia atual")
+        if ausentes:
+            # O build não cai na CDN: sem acesso externo, copie a pasta de outra máquina
+            print("Bibliotecas ausentes em static/vendor/: copie a pasta de uma máquina com acesso externo.")
+            raise SystemExit(1)
+        manifesto = construir(app.static_folder)
+        print(f"{len(manifesto)} arquivos em static/dist/ (manifest.json).")
@@ -3,11 +3,40 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def opcoes_engine():
+    """Opções de pool do SQLAlchemy (primário e réplicas).
+    
+    pre-ping e recycle valem sempre; tamanho, overflow e timeout só quando
+    definidos no ambiente (o SQLite em memória usa um pool sem esses parâmetros).
+    """
+    opcoes = {
+        'pool_pre_ping': (os.environ.get('DB_POOL_PRE_PING') or 'True').lower() == 'true',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+    }
+    for opcao, variavel in (('pool_size', 'DB_POOL_SIZE'),
+                            ('max_overflow', 'DB_POOL_MAX_OVERFLOW'),
+                            ('pool_timeout', 'DB_POOL_TIMEOUT')):
+        if os.environ.get(variavel):
+            opcoes[opcao] = int(os.environ[variavel])
+    return opcoes
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'chave-secreta-padrao'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///chamados.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool de conexões: DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    # DB_POOL_RECYCLE (segundos) e DB_POOL_PRE_PING
+    SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine()
+    
+    # Réplicas de leitura (URLs separadas por vírgula) usadas pelas rotas
+    # somente leitura; após escrever, o usuário lê do primário por
+    # REPLICA_JANELA_ESCRITA segundos
+    DATABASE_REPLICAS = [url.strip() for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',')
+                         if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{i}': url for i, url in enumerate(DATABASE_REPLICAS)}
+    REPLICA_JANELA_ESCRITA = int(os.environ.get('REPLICA_JANELA_ESCRITA') or 10)
+    
     # Configurações de email
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -17,4 +46,134 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     
     # Email do técnico
-    TECNICO_EMAIL = os.environ.get('TECNICO_EMAIL') or 'tecnico@empresa.com'
\ No newline at end of file
+    TECNICO_EMAIL = os.environ.get('TECNICO_EMAIL') or 'tecnico@empresa.com'
+    
+    # Fila de emails (outbox) e worker de entrega
+    EMAIL_WORKER_INTERNO = (os.environ.get('EMAIL_WORKER_INTERNO') or 'True').lower() == 'true'
+    EMAIL_FILA_LOTE = int(os.environ.get('EMAIL_FILA_LOTE') or 50)
+    EMAIL_FILA_INTERVALO = float(os.environ.get('EMAIL_FILA_INTERVALO') or 5)
+    EMAIL_FILA_RESERVA = int(os.environ.get('EMAIL_FILA_RESERVA') or 300)
+    EMAIL_MAX_TENTATIVAS = int(os.environ.get('EMAIL_MAX_TENTATIVAS') or 6)
+    EMAIL_BACKOFF_BASE = int(os.environ.get('EMAIL_BACKOFF_BASE') or 30)
+    EMAIL_BACKOFF_MAXIMO = int(os.environ.get('EMAIL_BACKOFF_MAXIMO') or 3600)
+    
+    # Notificações de chamados: alterações do mesmo chamado para o mesmo
+    # destinatário dentro de NOTIFICACOES_JANELA segundos saem em um email só.
+    # Em modo resumo (opção no perfil do técnico ou emails de
+    # NOTIFICACOES_RESUMO, separados por vírgula) o destinatário recebe um
+    # email a cada NOTIFICACOES_RESUMO_INTERVALO segundos
+    NOTIFICACOES_JANELA = int(os.environ.get('NOTIFICACOES_JANELA') or 300)
+    NOTIFICACOES_RESUMO = [email.strip() for email in (os.environ.get('NOTIFICACOES_RESUMO') or '').split(',')
+                           if email.strip()]
+    NOTIFICACOES_RESUMO_INTERVALO = int(os.environ.get('NOTIFICACOES_RESUMO_INTERVALO') or 3600)
+    
+    # Resumos diários de SLA (analise.py): o worker de emails inclui o
+    # histórico novo a cada ANALISE_INTERVALO segundos (0 desliga; use `flask
+    # atualizar-analise` no cron), em lotes de ANALISE_LOTE registros, deixando
+    # para a próxima vez os gravados há menos de ANALISE_MARGEM segundos
+    ANALISE_INTERVALO = int(os.environ.get('ANALISE_INTERVALO') or 300)
+    ANALISE_LOTE = int(os.environ.get('ANALISE_LOTE') or 50000)
+    ANALISE_MARGEM = int(os.environ.get('ANALISE_MARGEM') or 60)
+    
+    # Cache (memoria:// por processo ou redis://host:6379/0 compartilhado)
+    CACHE_URL = os.environ.get('CACHE_URL') or 'memoria://'
+    CACHE_MAX_ITENS = int(os.environ.get('CACHE_MAX_ITENS') or 10000)
+    CONTADORES_TTL = int(os.environ.get('CONTADORES_TTL') or 300)
+    # Um processo só atende as requisições (flask run, gunicorn -w 1): o que
+    # fica no cache em memória vale para todas. Sem isso, com memoria://, o
+    # cache de usuários confere `ativo` no banco a cada requisição, os
+    # contadores do dashboard são consultados a cada leitura, o cache HTTP
+    # condicional e a atualização ao vivo ficam desligados
+    PROCESSO_UNICO = (os.environ.get('PROCESSO_UNICO') or 'False').lower() == 'true'
+    
+    # Cache HTTP condicional (ETag/Last-Modified e 304) no detalhe, na listagem
+    # e em /api/chamados. As versões por escopo ficam no CACHE_URL: com
+    # memoria:// só vale com PROCESSO_UNICO (um worker não veria as alterações
+    # dos outros). Usuários comuns reutilizam detalhe e API por
+    # HTTP_CACHE_MAX_AGE segundos; admin e técnicos sempre revalidam
+    HTTP_CACHE_ATIVO = (os.environ.get('HTTP_CACHE_ATIVO') or 'True').lower() == 'true'
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE') or 15)
+    HTTP_CACHE_VERSAO_TTL = int(os.environ.get('HTTP_CACHE_VERSAO_TTL') or 60)
+    
+    # Estáticos gerados por `flask construir-estaticos` (static/dist/): nomes
+    # com hash servidos com cache imutável por ESTATICOS_MAX_AGE segundos.
+    # ESTATICOS_COMPILADOS=False ignora o build e usa os arquivos de static/
+    ESTATICOS_COMPILADOS = (os.environ.get('ESTATICOS_COMPILADOS') or 'True').lower() == 'true'
+    ESTATICOS_MAX_AGE = int(os.environ.get('ESTATICOS_MAX_AGE') or 365 * 24 * 3600)
+    
+    # Cache de trechos renderizados de templates ({% fragmento %}): LRU em
+    # memória por processo, invalidado pelas versões de dados do cache HTTP;
+    # como elas, só vale com CACHE_URL=redis://... ou PROCESSO_UNICO
+    FRAGMENTOS_ATIVO = (os.environ.get('FRAGMENTOS_ATIVO') or 'True').lower() == 'true'
+    FRAGMENTOS_MAX_MB = int(os.environ.get('FRAGMENTOS_MAX_MB') or 32)
+    
+    # Cache do usuário logado (load_user); USUARIOS_CACHE_URL=redis://... para
+    # invalidar em todos os workers (padrão: CACHE_URL)
+    USUARIOS_CACHE_URL = os.environ.get('USUARIOS_CACHE_URL')
+    USUARIOS_CACHE_TTL = int(os.environ.get('USUARIOS_CACHE_TTL') or 60)
+    USUARIOS_CACHE_MAX = int(os.environ.get('USUARIOS_CACHE_MAX') or 5000)
+    
+    # Atualização ao vivo da listagem e do dashboard (/eventos, server-sent
+    # events), desligada por padrão. EVENTOS_ATIVO=True só vale com
+    # EVENTOS_URL=redis://... (padrão: CACHE_URL) ou PROCESSO_UNICO, e em
+    # servidor de threads ou assíncrono (gunicorn -k gthread/gevent). Cada aba
+    # aberta ocupa uma conexão por até EVENTOS_DURACAO segundos; acima de
+    # EVENTOS_MAX_CONEXOES por processo a resposta é 503 e a página segue sem
+    # atualização ao vivo. EVENTOS_HISTORICO mensagens ficam para reconexões.
+    EVENTOS_ATIVO = (os.environ.get('EVENTOS_ATIVO') or 'False').lower() == 'true'
+    EVENTOS_URL = os.environ.get('EVENTOS_URL')
+    EVENTOS_HEARTBEAT = int(os.environ.get('EVENTOS_HEARTBEAT') or 15)
+    EVENTOS_DURACAO = int(os.environ.get('EVENTOS_DURACAO') or 300)
+    EVENTOS_MAX_CONEXOES = int(os.environ.get('EVENTOS_MAX_CONEXOES') or 100)
+    EVENTOS_FILA = int(os.environ.get('EVENTOS_FILA') or 100)
+    EVENTOS_HISTORICO = int(os.environ.get('EVENTOS_HISTORICO') or 500)
+    
+    # Hash de senhas em um pool de processos (SENHA_PROCESSOS=0 calcula na
+    # própria thread). SENHA_METODO segue o formato do werkzeug, ex.:
+    # 'pbkdf2:sha256:600000' ou 'scrypt:32768:8:1'; hashes com outro método
+    # são refeitos no próximo login. Sem vaga entre as SENHA_FILA_MAXIMA
+    # requisições simultâneas em SENHA_ESPERA segundos, a resposta é 503.
+    SENHA_METODO = os.environ.get('SENHA_METODO') or 'pbkdf2:sha256:600000'
+    SENHA_PROCESSOS = int(os.environ.get('SENHA_PROCESSOS') or os.cpu_count() or 1)
+    SENHA_FILA_MAXIMA = int(os.environ.get('SENHA_FILA_MAXIMA') or 16)
+    SENHA_ESPERA = float(os.environ.get('SENHA_ESPERA') or 0.5)
+    
+    # Emails cadastrados: filtro de Bloom em memória (taxa de falsos positivos
+    # e intervalo de leitura dos usuários criados por outros processos) e
+    # limite por IP de /verificar-email (fichas por segundo e rajada)
+    EMAIL_BLOOM_TAXA_ERRO = float(os.environ.get('EMAIL_BLOOM_TAXA_ERRO') or 0.01)
+    EMAIL_BLOOM_ATUALIZACAO = int(os.environ.get('EMAIL_BLOOM_ATUALIZACAO') or 30)
+    VERIFICAR_EMAIL_TAXA = float(os.environ.get('VERIFICAR_EMAIL_TAXA') or 1)
+    VERIFICAR_EMAIL_RAJADA = int(os.environ.get('VERIFICAR_EMAIL_RAJADA') or 10)
+    
+    # Perfil de produção do SQLite (ignorado em outros bancos): WAL,
+    # synchronous=NORMAL, mmap, cache e busy_timeout em cada conexão, e criação
+    # e atualização de chamados por uma fila única de escrita com group commit
+    SQLITE_OTIMIZADO = (os.environ.get('SQLITE_OTIMIZADO') or 'True').lower() == 'true'
+    SQLITE_MMAP_MB = int(os.environ.get('SQLITE_MMAP_MB') or 256)
+    SQLITE_CACHE_MB = int(os.environ.get('SQLITE_CACHE_MB') or 64)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 15000)
+    SQLITE_FILA_ESCRITA = (os.environ.get('SQLITE_FILA_ESCRITA') or 'True').lower() == 'true'
+    SQLITE_ESCRITA_GRUPO = int(os.environ.get('SQLITE_ESCRITA_GRUPO') or 64)
+    # Espera máxima da requisição pela fila (s): o grupo em gravação e o dela,
+    # cada um podendo esperar o busy_timeout pelo lock do arquivo
+    SQLITE_ESCRITA_ESPERA = float(os.environ.get('SQLITE_ESCRITA_ESPERA') or 2 * SQLITE_BUSY_TIMEOUT_MS / 1000)
+    
+    # Métricas em /metrics (formato Prometheus) e log de SQL lenta
+    METRICAS_ATIVAS = (os.environ.get('METRICAS_ATIVAS') or 'True').lower() == 'true'
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    SQL_LENTA_MS = int(os.environ.get('SQL_LENTA_MS') or 200)
+    
+    # Atualização de chamados em lote (POST /chamados/lote)
+    CHAMADOS_LOTE_MAXIMO = int(os.environ.get('CHAMADOS_LOTE_MAXIMO') or 1000)
+    
+    # Exportação (GET /chamados/exportar): linhas lidas e enviadas por lote e
+    # separador do CSV (';' abre direto no Excel em português)
+    EXPORTACAO_LOTE = int(os.environ.get('EXPORTACAO_LOTE') or 1000)
+    EXPORTACAO_CSV_SEPARADOR = os.environ.get('EXPORTACAO_CSV_SEPARADOR') or ';'
+    
+    # Busca textual: configuração de idioma do tsvector no PostgreSQL e, sem
+    # índice no banco (SQLite sem FTS5), intervalo em segundos para o índice
+    # em memória de cada processo reler os chamados alterados pelos outros
+    BUSCA_IDIOMA = os.environ.get('BUSCA_IDIOMA') or 'portuguese'
+    BUSCA_MEMORIA_ATUALIZACAO = int(os.environ.get('BUSCA_MEMORIA_ATUALIZACAO') or 30)
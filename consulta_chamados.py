@@ -0,0 +1,116 @@
+"""Consultas de chamados compartilhadas pela listagem, API e exportações.
+
+`filtrar_chamados` aplica a permissão e os filtros da tela de listagem a
+uma Query do ORM ou a um select() do Core. `selecionar_campos` monta um
+select() somente com as colunas pedidas, trazendo nomes de criador e
+técnico por JOIN, para ser lido em lotes sem instanciar objetos.
+"""
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from models import Usuario, Chamado
+
+FORMATO_DATA = '%d/%m/%Y %H:%M'
+
+_criador = aliased(Usuario, name='criador')
+_tecnico = aliased(Usuario, name='tecnico')
+
+# Campos disponíveis na API (fields=...)
+COLUNAS = {
+    'id': Chamado.id,
+    'titulo': Chamado.titulo,
+    'descricao': Chamado.descricao,
+    'status': Chamado.status,
+    'prioridade': Chamado.prioridade,
+    'data_criacao': Chamado.data_criacao,
+    'data_atualizacao': Chamado.data_atualizacao,
+    'data_resolucao': Chamado.data_resolucao,
+    'criador': _criador.nome,
+    'tecnico': _tecnico.nome,
+    'localizacao': Chamado.localizacao,
+    'equipamento': Chamado.equipamento,
+}
+
+# Mesmos campos de Chamado.to_dict()
+CAMPOS_PADRAO = ('id', 'titulo', 'descricao', 'status', 'prioridade', 'data_criacao',
+                 'criador', 'tecnico', 'localizacao', 'equipamento')
+
+
+def filtrar_chamados(consulta, usuario, args):
+    """Aplica a permissão do usuário e os filtros de status/prioridade da listagem"""
+    if not usuario.is_admin:
+        consulta = consulta.filter(Chamado.usuario_id == usuario.id)
+    
+    status = args.get('status', 'todos')
+    prioridade = args.get('prioridade', 'todos')
+    
+    if status and status != 'todos':
+        consulta = consulta.filter(Chamado.status == status)
+    if prioridade and prioridade != 'todos':
+        consulta = consulta.filter(Chamado.prioridade == prioridade)
+    return consulta
+
+
+def campos_solicitados(parametro):
+    """Converte o parâmetro fields=a,b,c em uma tupla validada"""
+    if not parametro:
+        return CAMPOS_PADRAO
+    campos = tuple(dict.fromkeys(c.strip() for c in parametro.split(',') if c.strip()))
+    desconhecidos = [c for c in campos if c not in COLUNAS]
+    if desconhecidos or not campos:
+        raise ValueError(f"Campos inválidos: {', '.join(desconhecidos) or parametro}")
+    return campos
+
+
+def selecionar_campos(campos):
+    """select() com as colunas pedidas e a chave do cursor (_id, _data_criacao)"""
+    colunas = [COLUNAS[campo].label(campo) for campo in campos]
+    colunas += [Chamado.id.label('_id'), Chamado.data_criacao.label('_data_criacao')]
+    
+    consulta = select(*colunas).select_from(Chamado)
+    if 'criador' in campos:
+        consulta = consulta.outerjoin(_criador, Chamado.usuario_id == _criador.id)
+    if 'tecnico' in campos:
+        consulta = consulta.outerjoin(_tecnico, Chamado.tecnico_id == _tecnico.id)
+    return consulta
+
+
+def linha_para_dict(linha, campos):
+    mapa = linha._mapping
+    dados = {}
+    for campo in campos:
+        valor = mapa[campo]
+        if campo.startswith('data_') and valor is not None:
+            valor = valor.strftime(FORMATO_DATA)
+        dados[campo] = valor
+    return dados
+
+
+def gerar_json(linhas, campos, tamanho_lote=200):
+    """Array JSON emitido em partes, sem montar a lista inteira em memória"""
+    yield '['
+    lote = []
+    primeiro = True
+    for linha in linhas:
+        texto = json.dumps(linha_para_dict(linha, campos))
+        lote.append(texto if primeiro else ',' + texto)
+        primeiro = False
+        if len(lote) >= tamanho_lote:
+            yield ''.join(lote)
+            lote = []
+    lote.append(']')
+    yield ''.join(lote)
+
+
+def gerar_ndjson(linhas, campos, tamanho_lote=200):
+    """Um objeto JSON por linha (application/x-ndjson)"""
+    lote = []
+    for linha in linhas:
+        lote.append(json.dumps(linha_para_dict(linha, campos)) + '\n')
+        if len(lote) >= tamanho_lote:
+            yield ''.join(lote)
+            lote = []
+    if lote:
+        yield ''.join(lote)
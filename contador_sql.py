@@ -0,0 +1,65 @@
+"""Contagem de instruções SQL por bloco de código ou por requisição.
+
+Serve para detectar consultas N+1: o comando `flask verificar-consultas`
+(e qualquer teste) pode limitar quantas instruções cada página executa,
+independente da quantidade de linhas exibidas.
+"""
+from sqlalchemy import event
+
+from models import db
+
+
+class ContadorConsultas:
+    """Registra as instruções SQL executadas dentro do bloco `with`"""
+    
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.instrucoes = []
+    
+    def _registrar(self, conexao, cursor, instrucao, parametros, contexto, executemany):
+        self.instrucoes.append(instrucao)
+    
+    def __enter__(self):
+        if self.engine is None:
+            self.engine = db.engine
+        self.instrucoes = []
+        event.listen(self.engine, 'before_cursor_execute', self._registrar)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._registrar)
+    
+    @property
+    def total(self):
+        return len(self.instrucoes)
+
+
+def consultas_da_requisicao(cliente, url, metodo='GET', **kwargs):
+    """Executa uma requisição no cliente de teste e retorna (resposta, ContadorConsultas)"""
+    with cliente.application.app_context():
+        engine = db.engine
+    with ContadorConsultas(engine) as contador:
+        resposta = cliente.open(url, method=metodo, **kwargs)
+        # Consome e fecha o corpo para contar também as consultas do streaming
+        resposta.get_data()
+        resposta.close()
+    return resposta, contador
+
+
+def verificar_orcamentos(app, usuario_id, orcamentos):
+    """Executa cada URL autenticado como `usuario_id` e retorna as que excedem o orçamento.
+    
+    `orcamentos` é {url: máximo de instruções}; o retorno é
+    {url: (instruções executadas, máximo, status HTTP)}.
+    """
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    
+    excedidos = {}
+    for url, maximo in orcamentos.items():
+        resposta, contador = consultas_da_requisicao(cliente, url)
+        if contador.total > maximo or resposta.status_code >= 400:
+            excedidos[url] = (contador.total, maximo, resposta.status_code)
+    return excedidos
@@ -0,0 +1,193 @@
+"""Contadores de chamados por status mantidos em cache.
+
+Os contadores são lidos do cache e, quando ausentes ou expirados,
+recalculados com as consultas agregadas de estatisticas.py (geral e do
+solicitante em um único GROUP BY status). Commits que
+criam chamados ou mudam o status são capturados por eventos da sessão do
+SQLAlchemy e aplicados no cache como incrementos, sem recontar a tabela.
+As mesmas variações são publicadas para as páginas abertas (eventos.py).
+
+Os incrementos só chegam ao cache do processo que fez o commit: com
+memoria:// e vários workers os outros mostrariam contagens velhas até o
+CONTADORES_TTL. Nesse caso (cache.compartilhado) o cache é dispensado e cada
+leitura faz a consulta agregada; use CACHE_URL=redis://... para servir os
+contadores do cache em todos os workers.
+"""
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from cache import criar_cache, compartilhado
+from estatisticas import STATUS_CHAMADO, estatisticas_chamados, estatisticas_usuario
+from models import db, Chamado
+
+CHAVE_GERAL = 'contadores:geral'
+CHAVE_USUARIO = 'contadores:usuario:{}'
+
+
+class ContadoresChamados:
+    """Contadores por status (geral e por solicitante) com métricas de acerto"""
+    
+    def __init__(self, app=None):
+        self.cache = None
+        self.acertos = 0
+        self.falhas = 0
+        self.incrementos = 0
+        self.reconstrucoes = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        if self.cache is None:
+            self.cache = criar_cache(app.config['CACHE_URL'],
+                                     ttl=app.config['CONTADORES_TTL'],
+                                     max_itens=app.config['CACHE_MAX_ITENS'])
+        self.compartilhado = compartilhado(self.cache, app)
+        app.extensions['contadores'] = self
+    
+    def _obter(self, chave, calcular):
+        valor = self.cache.obter(chave)
+        if valor is not None:
+            self.acertos += 1
+            return valor
+        self.falhas += 1
+        valor = calcular()
+        self.cache.definir(chave, valor)
+        return valor
+    
+    def do_usuario(self, usuario_id):
+        """Contagens por status dos chamados criados pelo usuário"""
+        if not self.compartilhado:
+            return estatisticas_usuario(usuario_id)
+        por_status = self._obter(CHAVE_USUARIO.format(usuario_id),
+                                 lambda: estatisticas_usuario(usuario_id)['por_status'])
+        return {'total': sum(por_status.values()), 'por_status': dict(por_status)}
+    
+    def estatisticas(self, usuario_id):
+        """Mesmo formato de estatisticas.estatisticas_chamados, servido do cache"""
+        if not self.compartilhado:
+            return estatisticas_chamados(usuario_id)
+        chave_usuario = CHAVE_USUARIO.format(usuario_id)
+        geral = self.cache.obter(CHAVE_GERAL)
+        do_usuario = self.cache.obter(chave_usuario)
+        if geral is None or do_usuario is None:
+            # Uma consulta agregada recalcula as duas contagens
+            self.falhas += 1
+            estatisticas = estatisticas_chamados(usuario_id)
+            self.cache.definir(CHAVE_GERAL, dict(estatisticas['por_status']))
+            self.cache.definir(chave_usuario, dict(estatisticas['usuario']['por_status']))
+            return estatisticas
+        
+        self.acertos += 1
+        return {
+            'total': sum(geral.values()),
+            'por_status': dict(geral),
+            'usuario': {'total': sum(do_usuario.values()), 'por_status': dict(do_usuario)}
+        }
+    
+    def aplicar(self, variacoes):
+        """Aplica variações (usuario_id, status, delta) já confirmadas no banco"""
+        for usuario_id, status, delta in variacoes:
+            self.cache.incrementar(CHAVE_GERAL, status, delta)
+            self.cache.incrementar(CHAVE_USUARIO.format(usuario_id), status, delta)
+            self.incrementos += 1
+        
+        eventos = current_app.extensions.get('eventos')
+        if eventos is not None:
+            eventos.publicar_contadores(variacoes)
+    
+    def invalidar(self, usuario_id=None):
+        self.cache.remover(CHAVE_GERAL)
+        if usuario_id is not None:
+            self.cache.remover(CHAVE_USUARIO.format(usuario_id))
+    
+    def reconstruir(self):
+        """Recalcula todos os contadores a partir do banco"""
+        self.cache.limpar('contadores:')
+        
+        geral = dict.fromkeys(STATUS_CHAMADO, 0)
+        por_usuario = {}
+        linhas = db.session.query(Chamado.usuario_id, Chamado.status, func.count(Chamado.id))\
+                           .group_by(Chamado.usuario_id, Chamado.status)
+        for usuario_id, status, total in linhas:
+            geral[status] = geral.get(status, 0) + total
+            por_usuario.setdefault(usuario_id, dict.fromkeys(STATUS_CHAMADO, 0))[status] = total
+        
+        self.cache.definir(CHAVE_GERAL, geral)
+        for usuario_id, por_status in por_usuario.items():
+            self.cache.definir(CHAVE_USUARIO.format(usuario_id), por_status)
+        
+        self.reconstrucoes += 1
+        return len(por_usuario)
+    
+    def metricas(self):
+        leituras = self.acertos + self.falhas
+        return {
+            'compartilhado': self.compartilhado,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / leituras, 4) if leituras else None,
+            'incrementos': self.incrementos,
+            'reconstrucoes': self.reconstrucoes
+        }
+
+
+# Eventos da sessão: coletam as variações no flush e aplicam após o commit
+
+def _variacoes_do_flush(session):
+    variacoes = []
+    invalidar = set()
+    
+    for obj in session.new:
+        if isinstance(obj, Chamado):
+            variacoes.append((obj.usuario_id, obj.status or 'aberto', 1))
+    
+    for obj in session.deleted:
+        if isinstance(obj, Chamado):
+            variacoes.append((obj.usuario_id, obj.status, -1))
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Chamado):
+            continue
+        historico = inspect(obj).attrs.status.history
+        if not historico.has_changes():
+            continue
+        if historico.deleted and historico.added:
+            variacoes.append((obj.usuario_id, historico.deleted[0], -1))
+            variacoes.append((obj.usuario_id, historico.added[0], 1))
+        else:
+            # Status anterior não estava carregado: recalcula na próxima leitura
+            invalidar.add(obj.usuario_id)
+    
+    return variacoes, invalidar
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_variacoes(session, flush_context):
+    variacoes, invalidar = _variacoes_do_flush(session)
+    if variacoes:
+        session.info.setdefault('contadores_variacoes', []).extend(variacoes)
+    if invalidar:
+        session.info.setdefault('contadores_invalidar', set()).update(invalidar)
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_variacoes(session):
+    variacoes = session.info.pop('contadores_variacoes', None)
+    invalidar = session.info.pop('contadores_invalidar', None)
+    if not (variacoes or invalidar) or not has_app_context():
+        return
+    
+    contadores = current_app.extensions.get('contadores')
+    if contadores is None:
+        return
+    if variacoes:
+        contadores.aplicar(variacoes)
+    for usuario_id in invalidar or ():
+        contadores.invalidar(usuario_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_variacoes(session):
+    session.info.pop('contadores_variacoes', None)
+    session.info.pop('contadores_invalidar', None)
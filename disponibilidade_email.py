@@ -0,0 +1,190 @@
+"""Verificação barata de emails já cadastrados.
+
+Um filtro de Bloom em memória com os emails de `usuarios` responde "não
+cadastrado" sem tocar no banco; só quando o filtro indica que o email pode
+existir é feita a consulta pelo índice único de `email` para confirmar.
+Emails que deixam de existir (perfil alterado, usuário excluído) continuam
+no filtro e são apenas falsos positivos resolvidos pela consulta.
+
+O filtro é carregado quando cada worker do gunicorn sobe (`aquecer_no_boot`,
+chamado pelo gunicorn.conf.py; importar o wsgi.py não abre conexão) ou na
+primeira verificação, e atualizado no commit de sessões que criam usuários ou alteram
+emails (soft delete e restauração inclusive). O que outros processos gravam
+entra a cada EMAIL_BLOOM_ATUALIZACAO segundos: usuários com id acima do
+último lido e emails trocados desde a última leitura (`email_alterado_em`,
+marcado em toda troca de email pelo ORM); até lá o índice único do banco
+continua barrando duplicados no INSERT.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import db, Usuario
+
+logger = logging.getLogger('chamados.disponibilidade_email')
+
+# Trocas de email gravadas por transações que terminam depois da leitura
+MARGEM_LEITURA = timedelta(seconds=60)
+
+
+class FiltroBloom:
+    """Filtro de Bloom de strings (sem remoção)"""
+    
+    def __init__(self, capacidade, taxa_erro=0.01):
+        self.capacidade = max(capacidade, 1)
+        self.bits = max(64, int(-self.capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacidade * math.log(2)))
+        self.itens = 0
+        self._mapa = bytearray((self.bits + 7) // 8)
+    
+    def _posicoes(self, valor):
+        # Hash duplo (Kirsch-Mitzenmacher) sobre um único blake2b
+        resumo = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(resumo[:8], 'little')
+        h2 = int.from_bytes(resumo[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+    
+    def adicionar(self, valor):
+        for posicao in self._posicoes(valor):
+            self._mapa[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+    
+    def __contains__(self, valor):
+        return all(self._mapa[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(valor))
+
+
+class DisponibilidadeEmail:
+    """Filtro de Bloom dos emails cadastrados com confirmação no banco"""
+    
+    def __init__(self, app=None):
+        self._filtro = None
+        self._ultimo_id = 0
+        self._lido_em = None
+        self._atualizado_em = 0
+        self._lock = threading.Lock()
+        self.negativos = 0
+        self.confirmacoes = 0
+        self.falsos_positivos = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.taxa_erro = app.config['EMAIL_BLOOM_TAXA_ERRO']
+        self.intervalo = app.config['EMAIL_BLOOM_ATUALIZACAO']
+        app.extensions['disponibilidade_email'] = self
+    
+    def aquecer(self):
+        """(Re)constrói o filtro com todos os emails do banco"""
+        with self._lock:
+            lido_em = datetime.utcnow()
+            total, ultimo_id = db.session.query(func.count(Usuario.id), func.max(Usuario.id)).one()
+            # Folga para crescer antes de precisar reconstruir
+            filtro = FiltroBloom(max(2 * total, 1024), self.taxa_erro)
+            for (email,) in db.session.execute(select(Usuario.email).execution_options(yield_per=5000)):
+                filtro.adicionar(email)
+            self._filtro = filtro
+            self._ultimo_id = ultimo_id or 0
+            self._lido_em = lido_em
+            self._atualizado_em = time.monotonic()
+    
+    def aquecer_no_boot(self, app):
+        """`aquecer` fora de requisição, no processo que vai atender.
+        
+        Chamado pelo gunicorn ao iniciar cada worker, antes da primeira
+        requisição. Banco ainda sem tabelas: o filtro fica para a primeira
+        verificação.
+        """
+        with app.app_context():
+            try:
+                self.aquecer()
+            except SQLAlchemyError:
+                logger.warning('Filtro de emails não carregado na inicialização', exc_info=True)
+            finally:
+                db.session.remove()
+    
+    def _atualizar(self):
+        if self._filtro is None or self._filtro.itens > self._filtro.capacidade:
+            self.aquecer()
+        elif time.monotonic() - self._atualizado_em >= self.intervalo:
+            with self._lock:
+                self._atualizado_em = time.monotonic()
+                lido_em = datetime.utcnow()
+                novos = db.session.query(Usuario.id, Usuario.email)\
+                                  .filter(or_(Usuario.id > self._ultimo_id,
+                                              Usuario.email_alterado_em >= self._lido_em - MARGEM_LEITURA)).all()
+                for id, email in novos:
+                    self._filtro.adicionar(email)
+                    self._ultimo_id = max(self._ultimo_id, id)
+                self._lido_em = lido_em
+    
+    def adicionar(self, emails):
+        if self._filtro is None:
+            return
+        with self._lock:
+            for email in emails:
+                self._filtro.adicionar(email)
+    
+    def cadastrado(self, email):
+        """True se algum usuário (ativo ou não) usa exatamente este email"""
+        self._atualizar()
+        if email not in self._filtro:
+            self.negativos += 1
+            return False
+        self.confirmacoes += 1
+        existe = db.session.query(Usuario.id).filter_by(email=email).first() is not None
+        if not existe:
+            self.falsos_positivos += 1
+        return existe
+    
+    def metricas(self):
+        return {
+            'negativos': self.negativos,
+            'confirmacoes': self.confirmacoes,
+            'falsos_positivos': self.falsos_positivos,
+            'itens': self._filtro.itens if self._filtro is not None else 0
+        }
+
+
+# Atualização do filtro pelos eventos de sessão
+
+@event.listens_for(Usuario.email, 'set', active_history=True)
+def _marcar_email_alterado(usuario, valor, anterior, iniciador):
+    # Usuários novos entram pelo id; aqui só a troca de email de quem já existe
+    if inspect(usuario).persistent and valor != anterior:
+        usuario.email_alterado_em = datetime.utcnow()
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_emails(session, flush_context):
+    emails = set()
+    for obj in session.new:
+        if isinstance(obj, Usuario) and obj.email:
+            emails.add(obj.email)
+    for obj in session.dirty:
+        if isinstance(obj, Usuario):
+            emails.update(inspect(obj).attrs.email.history.added)
+    if emails:
+        session.info.setdefault('emails_cadastrados', set()).update(emails)
+
+
+@event.listens_for(Session, 'after_commit')
+def _adicionar_emails(session):
+    emails = session.info.pop('emails_cadastrados', None)
+    if not emails or not has_app_context():
+        return
+    disponibilidade = current_app.extensions.get('disponibilidade_email')
+    if disponibilidade is not None:
+        disponibilidade.adicionar(emails)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_emails(session):
+    session.info.pop('emails_cadastrados', None)
@@ -0,0 +1,269 @@
+"""Arquivos estáticos locais, com impressão digital e pré-comprimidos.
+
+`flask construir-estaticos` baixa para static/vendor/ as bibliotecas que as
+páginas usavam das CDNs (Bootstrap, Bootstrap Icons e jQuery; só as que
+ainda não estão lá) e gera static/dist/:
+
+- CSS e JS minificados (os .min. de terceiros são copiados como estão);
+- nomes com o hash do conteúdo (style.3f2a9c1b7d4e.css); url() dos CSS
+  apontam para os nomes novos (fontes do Bootstrap Icons);
+- variantes .gz e .br (brotli, se o pacote estiver instalado) dos tipos
+  compressíveis;
+- manifest.json: nome original -> nome com hash.
+
+Nos templates, `static_url('style.css')` devolve o arquivo do manifest,
+servido em /static/dist/ com Cache-Control immutable de um ano e na melhor
+variante que o navegador aceita (Content-Encoding br ou gzip). O build falha
+se alguma biblioteca não estiver em static/vendor/: nada do build depende
+da CDN. Sem build, cai no arquivo original em /static/ (desenvolvimento) e,
+para bibliotecas que ainda não foram baixadas, na CDN de origem, com um
+aviso no log ao iniciar.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import urllib.request
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('chamados.estaticos')
+
+PASTA_DIST = 'dist'
+MANIFESTO = 'manifest.json'
+
+# Bibliotecas de terceiros: caminho em static/ -> origem
+BIBLIOTECAS = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/bootstrap-icons.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/fonts/bootstrap-icons.woff',
+    'vendor/jquery/jquery.min.js':
+        'https://code.jquery.com/jquery-3.6.0.min.js',
+}
+
+# Extensões que valem a pena pré-comprimir (woff/woff2 e imagens já são)
+COMPRESSIVEIS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.ttf', '.eot')
+
+_STRINGS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_MAPA_FONTE = re.compile(r'^\s*(//|/\*)# sourceMappingURL=.*$', re.MULTILINE)
+_URL_CSS = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def bibliotecas_ausentes(pasta_static):
+    """Caminhos de BIBLIOTECAS que não estão em static/"""
+    return [caminho for caminho in BIBLIOTECAS if not os.path.exists(os.path.join(pasta_static, caminho))]
+
+
+def baixar_bibliotecas(pasta_static, forcar=False):
+    """Baixa as bibliotecas ausentes em static/vendor/.
+    
+    Retorna (baixados, falhas): caminhos baixados e {caminho: erro} dos que
+    não puderam ser baixados (sem acesso externo, copie static/vendor/ de
+    outra máquina).
+    """
+    baixados = []
+    falhas = {}
+    for caminho, origem in BIBLIOTECAS.items():
+        destino = os.path.join(pasta_static, caminho)
+        if os.path.exists(destino) and not forcar:
+            continue
+        try:
+            with urllib.request.urlopen(origem, timeout=30) as resposta:
+                conteudo = resposta.read()
+        except OSError as erro:
+            falhas[caminho] = erro
+            continue
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino + '.tmp', 'wb') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(destino + '.tmp', destino)
+        baixados.append(caminho)
+    return baixados, falhas
+
+
+# Minificação (conservadora: comentários e espaços, nada de renomear)
+
+def minificar_css(texto):
+    partes = _STRINGS.split(texto)
+    for i in range(0, len(partes), 2):
+        trecho = re.sub(r'/\*(?!!).*?\*/', '', partes[i], flags=re.DOTALL)
+        trecho = re.sub(r'\s+', ' ', trecho)
+        trecho = re.sub(r'\s*([{};,>])\s*', r'\1', trecho)
+        partes[i] = trecho.replace(';}', '}')
+    return ''.join(partes).strip()
+
+
+def minificar_js(texto):
+    """Remove comentários e indentação; as quebras de linha ficam (ASI)"""
+    saida = []
+    i, n = 0, len(texto)
+    while i < n:
+        c = texto[i]
+        if c in '\'"`':
+            fim = i + 1
+            while fim < n and texto[fim] != c:
+                fim += 2 if texto[fim] == '\\' else 1
+            saida.append(texto[i:fim + 1])
+            i = fim + 1
+        elif texto.startswith('//', i):
+            fim = texto.find('\n', i)
+            i = n if fim < 0 else fim
+        elif texto.startswith('/*', i):
+            fim = texto.find('*/', i + 2)
+            i = n if fim < 0 else fim + 2
+        else:
+            saida.append(c)
+            i += 1
+    linhas = (linha.strip() for linha in ''.join(saida).splitlines())
+    return '\n'.join(linha for linha in linhas if linha)
+
+
+def _processar(caminho, conteudo, manifesto):
+    """Conteúdo final de um arquivo de static/ (bytes)"""
+    extensao = os.path.splitext(caminho)[1]
+    if extensao not in ('.css', '.js'):
+        return conteudo
+    
+    texto = _MAPA_FONTE.sub('', conteudo.decode('utf-8'))
+    if '.min.' not in os.path.basename(caminho):
+        texto = minificar_css(texto) if extensao == '.css' else minificar_js(texto)
+    if extensao == '.css':
+        pasta = os.path.dirname(caminho)
+        
+        def trocar(encontrado):
+            aspas, url = encontrado.groups()
+            if ':' in url or url.startswith('/'):
+                return encontrado.group(0)
+            alvo = re.match(r'[^?#]*', url).group(0)
+            relativo = os.path.normpath(os.path.join(pasta, alvo)).replace(os.sep, '/')
+            if relativo not in manifesto:
+                return encontrado.group(0)
+            # Mesma pasta em dist/: só o nome muda; o hash dispensa a query string
+            novo = os.path.join(os.path.dirname(alvo), os.path.basename(manifesto[relativo]))
+            return f'url({aspas}{novo.replace(os.sep, "/")}{aspas})'
+        texto = _URL_CSS.sub(trocar, texto)
+    return texto.encode('utf-8')
+
+
+def _comprimir(destino, conteudo):
+    """Grava destino.gz e destino.br quando ficam menores que o original"""
+    variantes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(conteudo, quality=11)
+    for sufixo, comprimido in variantes.items():
+        if len(comprimido) < len(conteudo):
+            with open(destino + sufixo, 'wb') as arquivo:
+                arquivo.write(comprimido)
+
+
+def construir(pasta_static):
+    """Gera static/dist/ e o manifest; retorna o manifest.
+    
+    Arquivos de builds anteriores ficam: páginas abertas antes do deploy
+    continuam carregando os nomes antigos.
+    """
+    dist = os.path.join(pasta_static, PASTA_DIST)
+    arquivos = []
+    for pasta, subpastas, nomes in os.walk(pasta_static):
+        if os.path.abspath(pasta) == os.path.abspath(pasta_static) and PASTA_DIST in subpastas:
+            subpastas.remove(PASTA_DIST)
+        for nome in nomes:
+            if not nome.endswith('.tmp'):
+                arquivos.append(os.path.relpath(os.path.join(pasta, nome), pasta_static).replace(os.sep, '/'))
+    # CSS por último: as url() apontam para os nomes já calculados das fontes e imagens
+    arquivos.sort(key=lambda caminho: (caminho.endswith('.css'), caminho))
+    
+    manifesto = {}
+    for caminho in arquivos:
+        with open(os.path.join(pasta_static, caminho), 'rb') as arquivo:
+            conteudo = _processar(caminho, arquivo.read(), manifesto)
+        base, extensao = os.path.splitext(caminho)
+        nome = f'{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{extensao}'
+        destino = os.path.join(dist, nome)
+        if not os.path.exists(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            with open(destino, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            if extensao in COMPRESSIVEIS:
+                _comprimir(destino, conteudo)
+        manifesto[caminho] = nome
+    
+    temporario = os.path.join(dist, MANIFESTO + '.tmp')
+    with open(temporario, 'w') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, sort_keys=True)
+    os.replace(temporario, os.path.join(dist, MANIFESTO))
+    return manifesto
+
+
+class Estaticos:
+    """`static_url` nos templates e rota dos arquivos de static/dist/"""
+    
+    def __init__(self, app=None):
+        self.manifesto = {}
+        self.servidos = {'br': 0, 'gzip': 0, 'identity': 0}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.pasta = os.path.join(app.static_folder, PASTA_DIST)
+        self.manifesto = {}
+        caminho = os.path.join(self.pasta, MANIFESTO)
+        if app.config['ESTATICOS_COMPILADOS'] and os.path.exists(caminho):
+            with open(caminho) as arquivo:
+                self.manifesto = json.load(arquivo)
+        self.max_age = app.config['ESTATICOS_MAX_AGE']
+        # Bibliotecas ainda não baixadas vêm da CDN (só sem build)
+        self.cdn = {caminho: BIBLIOTECAS[caminho] for caminho in bibliotecas_ausentes(app.static_folder)
+                    if caminho not in self.manifesto}
+        if self.cdn:
+            logger.warning('Bibliotecas servidas pela CDN (rode `flask construir-estaticos` ou copie '
+                           'static/vendor/ de outra máquina): %s', ', '.join(sorted(self.cdn)))
+        
+        app.add_url_rule(f'{app.static_url_path}/{PASTA_DIST}/<path:arquivo>', 'estaticos', self.servir)
+        app.add_template_global(self.static_url)
+        app.extensions['estaticos'] = self
+    
+    def static_url(self, caminho):
+        """URL de um arquivo de static/: a versão com hash, se houver build"""
+        if caminho in self.manifesto:
+            return url_for('estaticos', arquivo=self.manifesto[caminho])
+        if caminho in self.cdn:
+            return self.cdn[caminho]
+        return url_for('static', filename=caminho)
+    
+    def servir(self, arquivo):
+        """Arquivo de dist/ na variante pré-comprimida aceita pelo navegador"""
+        codificacao = 'identity'
+        nome = arquivo
+        for candidata, sufixo in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidata] and \
+                    os.path.isfile(os.path.join(self.pasta, arquivo + sufixo)):
+                codificacao, nome = candidata, arquivo + sufixo
+                break
+        
+        resposta = send_from_directory(self.pasta, nome, max_age=self.max_age,
+                                       mimetype=mimetypes.guess_type(arquivo)[0] or 'application/octet-stream')
+        resposta.headers['Cache-Control'] = f'public, max-age={self.max_age}, immutable'
+        resposta.vary.add('Accept-Encoding')
+        if codificacao != 'identity':
+            resposta.content_encoding = codificacao
+        self.servidos[codificacao] += 1
+        return resposta
+    
+    def metricas(self):
+        return dict(self.servidos)
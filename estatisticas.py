@@ -0,0 +1,61 @@
+"""Estatísticas agregadas de chamados calculadas em uma única consulta"""
+from sqlalchemy import func, case
+
+from models import db, Chamado
+
+STATUS_CHAMADO = ('aberto', 'em_andamento', 'resolvido', 'fechado')
+
+
+def _contagens_vazias():
+    return dict.fromkeys(STATUS_CHAMADO, 0)
+
+
+def estatisticas_chamados(usuario_id):
+    """Contagens geral, por status e do solicitante em um único GROUP BY status"""
+    linhas = db.session.query(
+        Chamado.status,
+        func.count(Chamado.id),
+        func.sum(case((Chamado.usuario_id == usuario_id, 1), else_=0))
+    ).group_by(Chamado.status).all()
+    
+    geral = _contagens_vazias()
+    do_usuario = _contagens_vazias()
+    for status, total, total_usuario in linhas:
+        geral[status] = geral.get(status, 0) + total
+        do_usuario[status] = do_usuario.get(status, 0) + (total_usuario or 0)
+    
+    return {
+        'total': sum(geral.values()),
+        'por_status': geral,
+        'usuario': {
+            'total': sum(do_usuario.values()),
+            'por_status': do_usuario
+        }
+    }
+
+
+def estatisticas_usuario(usuario_id):
+    """Contagens por status dos chamados de um solicitante (GROUP BY status)"""
+    linhas = db.session.query(Chamado.status, func.count(Chamado.id))\
+                       .filter(Chamado.usuario_id == usuario_id)\
+                       .group_by(Chamado.status).all()
+    
+    por_status = _contagens_vazias()
+    for status, total in linhas:
+        por_status[status] = por_status.get(status, 0) + total
+    
+    return {'total': sum(por_status.values()), 'por_status': por_status}
+
+
+def estatisticas_visiveis(usuario, estatisticas):
+    """Recorte das estatísticas que o usuário pode ver (admin vê os status gerais)"""
+    if usuario.is_admin:
+        return {
+            'total': estatisticas['total'],
+            'por_status': estatisticas['por_status'],
+            'usuario': estatisticas['usuario']
+        }
+    return {
+        'total': estatisticas['total'],
+        'usuario': estatisticas['usuario']
+    }
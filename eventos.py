@@ -0,0 +1,364 @@
+"""Alterações de chamados enviadas às páginas abertas (server-sent events).
+
+Commits que criam ou alteram chamados viram mensagens em um broker de
+pub/sub: as alterações pelo ORM (criação, atualização) são capturadas pelos
+eventos da sessão; as feitas pelo Core (lote_chamados: atualização em lote e
+liberação da fila de um técnico excluído) são publicadas explicitamente, e
+as variações dos contadores vêm de ContadoresChamados.aplicar.
+
+- BrokerMemoria: entrega às conexões deste processo, sem dependências.
+- BrokerRedis: publica em um canal Redis e cada processo repassa às suas
+  conexões; necessário com vários workers (requer o pacote `redis`).
+
+`/eventos` mantém uma conexão text/event-stream por aba e envia só o que o
+usuário pode ver: administradores recebem todos os chamados e os contadores
+gerais; os demais, apenas os próprios chamados e contadores. Cada mensagem
+tem um id; na reconexão o navegador manda o último (Last-Event-ID) e recebe
+o que perdeu, se ainda estiver no histórico do processo. Uma conexão que não
+acompanha o ritmo ou perdeu mensagens recebe `recarregar`.
+
+Desligado por padrão (EVENTOS_ATIVO). Ligado, só vale com um broker que
+alcança todos os workers (Redis, ou PROCESSO_UNICO) e em servidores de threads
+ou assíncronos (wsgi.multithread: gunicorn -k gthread ou -k gevent, servidor
+de desenvolvimento): num worker síncrono cada aba prenderia o processo. Fora
+disso as páginas não incluem eventos.js, /eventos responde 404 e nada é
+publicado.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, aliased
+
+from models import db, Usuario, Chamado
+
+logger = logging.getLogger('chamados.eventos')
+
+# Espera do navegador antes de reconectar (campo retry do event-stream)
+RECONEXAO_MS = 3000
+
+
+class Assinatura:
+    """Fila de mensagens de uma conexão; cheia, marca a conexão como atrasada"""
+    
+    def __init__(self, tamanho):
+        self.fila = queue.Queue(tamanho)
+        self.atrasada = False
+    
+    def entregar(self, mensagem):
+        try:
+            self.fila.put_nowait(mensagem)
+        except queue.Full:
+            self.atrasada = True
+
+
+class BrokerMemoria:
+    """Pub/sub entre as conexões de um processo, com histórico curto para reconexões"""
+    
+    def __init__(self, tamanho_fila=100, historico=500):
+        self.tamanho_fila = tamanho_fila
+        self._assinaturas = set()
+        self._historico = deque(maxlen=historico)
+        self._inicio = time.time_ns()
+        self._lock = threading.Lock()
+    
+    def assinar(self):
+        assinatura = Assinatura(self.tamanho_fila)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+    
+    def cancelar(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+    
+    def publicar(self, mensagem):
+        self._repassar(mensagem)
+    
+    def _repassar(self, mensagem):
+        with self._lock:
+            self._historico.append(mensagem)
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.entregar(mensagem)
+    
+    def desde(self, id):
+        """Mensagens posteriores a `id`, ou None se alguma já saiu do histórico"""
+        with self._lock:
+            cheio = len(self._historico) == self._historico.maxlen
+            mais_antigo = self._historico[0]['id'] if cheio else self._inicio
+            if id < mais_antigo:
+                return None
+            return [mensagem for mensagem in self._historico if mensagem['id'] > id]
+    
+    def __len__(self):
+        return len(self._assinaturas)
+
+
+class BrokerRedis(BrokerMemoria):
+    """Publica em um canal Redis; uma thread por processo repassa às conexões locais"""
+    
+    def __init__(self, url=None, tamanho_fila=100, historico=500, canal='chamados:eventos', cliente=None):
+        if cliente is None:
+            import redis
+            cliente = redis.Redis.from_url(url)
+        super().__init__(tamanho_fila, historico)
+        self.cliente = cliente
+        self.canal = canal
+        self._thread = None
+    
+    def assinar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._inicio = time.time_ns()
+                self._thread = threading.Thread(target=self._escutar, name='eventos-redis', daemon=True)
+                self._thread.start()
+        return super().assinar()
+    
+    def publicar(self, mensagem):
+        self.cliente.publish(self.canal, json.dumps(mensagem))
+    
+    def _escutar(self):
+        while True:
+            try:
+                pubsub = self.cliente.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.canal)
+                for item in pubsub.listen():
+                    self._repassar(json.loads(item['data']))
+            except Exception:
+                logger.exception('Conexão com o canal de eventos perdida; reconectando')
+                # O que foi publicado enquanto isso se perdeu: as páginas recarregam
+                self._inicio = time.time_ns()
+                self._repassar({'id': self._inicio, 'tipo': 'recarregar'})
+                time.sleep(1)
+
+
+def criar_broker(url, tamanho_fila=100, historico=500):
+    """Cria o broker a partir da URL configurada ('memoria://' ou 'redis://...')"""
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        return BrokerRedis(url, tamanho_fila=tamanho_fila, historico=historico)
+    return BrokerMemoria(tamanho_fila=tamanho_fila, historico=historico)
+
+
+def _formatar(evento, dados, id):
+    return f'event: {evento}\nid: {id}\ndata: {json.dumps(dados)}\n\n'
+
+
+def _visivel(mensagem, usuario_id, is_admin):
+    """(evento, dados) da mensagem como o usuário pode vê-la, ou None"""
+    if mensagem['tipo'] == 'chamado':
+        chamado = mensagem['chamado']
+        if is_admin or chamado['usuario_id'] == usuario_id:
+            return 'chamado', {'acao': mensagem['acao'], 'chamado': chamado}
+        return None
+    
+    if mensagem['tipo'] == 'contadores':
+        # Total geral (exibido a todos no dashboard), por status no escopo do
+        # usuário (geral para admin) e os chamados criados por ele
+        total = meus = 0
+        por_status = {}
+        for dono, status, delta in mensagem['variacoes']:
+            total += delta
+            if is_admin or dono == usuario_id:
+                por_status[status] = por_status.get(status, 0) + delta
+            if dono == usuario_id:
+                meus += delta
+        if not (total or any(por_status.values())):
+            return None
+        return 'contadores', {'total': total, 'por_status': por_status, 'meus': meus}
+    
+    if mensagem['tipo'] == 'recarregar':
+        return 'recarregar', {}
+    return None
+
+
+class EventosChamados:
+    """Publicação das alterações de chamados e transmissão por usuário"""
+    
+    def __init__(self, app=None):
+        self.broker = None
+        self.conexoes = 0
+        self.publicadas = 0
+        self.enviadas = 0
+        self.recarregamentos = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        if self.broker is None:
+            self.broker = criar_broker(app.config['EVENTOS_URL'] or app.config['CACHE_URL'],
+                                       tamanho_fila=app.config['EVENTOS_FILA'],
+                                       historico=app.config['EVENTOS_HISTORICO'])
+        compartilhado = isinstance(self.broker, BrokerRedis) or app.config['PROCESSO_UNICO']
+        self.ativo = app.config['EVENTOS_ATIVO'] and compartilhado
+        if app.config['EVENTOS_ATIVO'] and not compartilhado:
+            logger.warning('EVENTOS_ATIVO ignorado: com vários workers use EVENTOS_URL ou '
+                           'CACHE_URL=redis://... (ou PROCESSO_UNICO=True com um worker só)')
+        self.heartbeat = app.config['EVENTOS_HEARTBEAT']
+        self.duracao = app.config['EVENTOS_DURACAO']
+        self.max_conexoes = app.config['EVENTOS_MAX_CONEXOES']
+        app.add_template_global(self.disponivel, 'eventos_ao_vivo')
+        app.extensions['eventos'] = self
+    
+    def disponivel(self):
+        """Se a página desta requisição recebe atualização ao vivo"""
+        return self.ativo and request.environ.get('wsgi.multithread', False)
+    
+    # Publicação
+    
+    def publicar(self, tipo, **dados):
+        if not self.ativo:
+            return
+        # O commit já aconteceu: uma falha do broker não deve virar erro da requisição
+        try:
+            self.broker.publicar({'id': time.time_ns(), 'tipo': tipo, **dados})
+            self.publicadas += 1
+        except Exception:
+            logger.exception('Falha ao publicar evento %s', tipo)
+    
+    def publicar_chamado(self, acao, chamado):
+        self.publicar('chamado', acao=acao, chamado=chamado)
+    
+    def publicar_chamados(self, ids, acao='atualizado'):
+        """Relê e publica chamados alterados pelo Core (chamar após o commit)"""
+        if not ids or not self.ativo:
+            return
+        tecnico = aliased(Usuario)
+        linhas = db.session.execute(
+            select(Chamado.id, Chamado.titulo, Chamado.status, Chamado.prioridade,
+                   Chamado.usuario_id, Chamado.tecnico_id, tecnico.nome.label('tecnico'))
+            .outerjoin(tecnico, tecnico.id == Chamado.tecnico_id)
+            .where(Chamado.id.in_(ids))
+        ).mappings()
+        for linha in linhas:
+            self.publicar_chamado(acao, dict(linha))
+    
+    def publicar_contadores(self, variacoes):
+        self.publicar('contadores', variacoes=[list(variacao) for variacao in variacoes])
+    
+    # Transmissão
+    
+    def aceitar(self):
+        """False quando o processo já tem EVENTOS_MAX_CONEXOES conexões abertas"""
+        return self.conexoes < self.max_conexoes
+    
+    def transmitir(self, usuario_id, is_admin, ultimo_id=None):
+        """Corpo text/event-stream com o que o usuário pode ver.
+        
+        Não usa o banco nem o contexto da requisição: o gerador roda depois
+        que a view retorna. Termina após EVENTOS_DURACAO segundos e o
+        navegador reconecta com o último id recebido.
+        """
+        assinatura = self.broker.assinar()
+        with self._lock:
+            self.conexoes += 1
+        try:
+            yield f'retry: {RECONEXAO_MS}\n\n'
+            
+            try:
+                ultimo_id = int(ultimo_id) if ultimo_id else None
+            except ValueError:
+                ultimo_id = None
+            pendentes = []
+            if ultimo_id is not None:
+                pendentes = self.broker.desde(ultimo_id)
+                if pendentes is None:
+                    self.recarregamentos += 1
+                    yield _formatar('recarregar', {}, ultimo_id)
+                    return
+            
+            fim = time.monotonic() + self.duracao
+            while time.monotonic() < fim:
+                if pendentes:
+                    mensagem = pendentes.pop(0)
+                else:
+                    try:
+                        mensagem = assinatura.fila.get(timeout=self.heartbeat)
+                    except queue.Empty:
+                        # Evento vazio: só avança o Last-Event-ID do navegador
+                        yield f'id: {ultimo_id}\n\n' if ultimo_id else ': ping\n\n'
+                        continue
+                    if assinatura.atrasada:
+                        self.recarregamentos += 1
+                        yield _formatar('recarregar', {}, mensagem['id'])
+                        return
+                    if ultimo_id is not None and mensagem['id'] <= ultimo_id:
+                        # Já enviada pelo histórico
+                        continue
+                
+                ultimo_id = mensagem['id']
+                visivel = _visivel(mensagem, usuario_id, is_admin)
+                if visivel is None:
+                    continue
+                self.enviadas += 1
+                yield _formatar(*visivel, ultimo_id)
+                if visivel[0] == 'recarregar':
+                    self.recarregamentos += 1
+                    return
+        finally:
+            self.broker.cancelar(assinatura)
+            with self._lock:
+                self.conexoes -= 1
+    
+    def metricas(self):
+        return {
+            'conexoes': self.conexoes,
+            'publicadas': self.publicadas,
+            'enviadas': self.enviadas,
+            'recarregamentos': self.recarregamentos
+        }
+
+
+# Eventos da sessão: fotografam os chamados no flush e publicam após o commit
+
+def _foto(session, chamado):
+    tecnico = session.get(Usuario, chamado.tecnico_id) if chamado.tecnico_id else None
+    return {
+        'id': chamado.id,
+        'titulo': chamado.titulo,
+        'status': chamado.status,
+        'prioridade': chamado.prioridade,
+        'usuario_id': chamado.usuario_id,
+        'tecnico_id': chamado.tecnico_id,
+        'tecnico': tecnico.nome if tecnico else None
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_chamados(session, flush_context):
+    eventos = current_app.extensions.get('eventos') if has_app_context() else None
+    if eventos is None or not eventos.ativo:
+        return
+    alterados = [(obj, 'criado') for obj in session.new if isinstance(obj, Chamado)]
+    alterados += [(obj, 'atualizado') for obj in session.dirty
+                  if isinstance(obj, Chamado) and session.is_modified(obj)]
+    if not alterados:
+        return
+    
+    fotos = session.info.setdefault('eventos_chamados', {})
+    for obj, acao in alterados:
+        # Criado e alterado na mesma transação continua sendo 'criado'
+        anterior = fotos.get(obj.id)
+        fotos[obj.id] = (anterior[0] if anterior else acao, _foto(session, obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publicar_chamados(session):
+    fotos = session.info.pop('eventos_chamados', None)
+    if not fotos or not has_app_context():
+        return
+    eventos = current_app.extensions.get('eventos')
+    if eventos is not None:
+        for acao, foto in fotos.values():
+            eventos.publicar_chamado(acao, foto)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_chamados(session):
+    session.info.pop('eventos_chamados', None)
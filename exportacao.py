@@ -0,0 +1,230 @@
+"""Exportação de chamados (e do histórico) em CSV ou XLSX por streaming.
+
+Os chamados são lidos em lotes de EXPORTACAO_LOTE linhas (yield_per: cursor
+do servidor no PostgreSQL) e cada lote é escrito e enviado antes do
+próximo ser lido: a memória não cresce com o número de linhas e os
+primeiros bytes saem assim que a consulta começa a responder. Com o
+histórico, cada entrada vira uma linha que repete os dados do chamado
+(LEFT JOIN ordenado por chamado e data; chamados sem histórico saem uma vez).
+
+O XLSX é montado sem dependências: as partes fixas do pacote são pequenas
+e a planilha é escrita linha a linha em uma entrada ZIP de tamanho
+desconhecido (data descriptor), com strings inline em vez de sharedStrings.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+
+from sqlalchemy.orm import aliased
+
+from consulta_chamados import filtrar_chamados, selecionar_campos
+from models import Usuario, Chamado, HistoricoChamado
+
+CAMPOS_CHAMADO = ('id', 'titulo', 'descricao', 'status', 'prioridade', 'data_criacao',
+                  'data_atualizacao', 'data_resolucao', 'criador', 'tecnico',
+                  'localizacao', 'equipamento')
+
+_autor = aliased(Usuario, name='autor_historico')
+
+COLUNAS_HISTORICO = {
+    'historico_data': HistoricoChamado.data_acao,
+    'historico_acao': HistoricoChamado.acao,
+    'historico_usuario': _autor.nome,
+    'historico_descricao': HistoricoChamado.descricao,
+}
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _data_parametro(args, nome):
+    valor = args.get(nome)
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f'Data inválida em {nome}: use AAAA-MM-DD')
+
+
+def consulta_exportacao(usuario, args, historico=False):
+    """select() dos chamados com os filtros da listagem e o período de/ate.
+    
+    Retorna (consulta, cabeçalho). Levanta ValueError para datas inválidas.
+    """
+    consulta = filtrar_chamados(selecionar_campos(CAMPOS_CHAMADO), usuario, args)
+    
+    de = _data_parametro(args, 'de')
+    ate = _data_parametro(args, 'ate')
+    if de:
+        consulta = consulta.filter(Chamado.data_criacao >= de)
+    if ate:
+        # Inclusivo: até o fim do dia informado
+        consulta = consulta.filter(Chamado.data_criacao < ate + timedelta(days=1))
+    
+    cabecalho = list(CAMPOS_CHAMADO)
+    ordem = [Chamado.data_criacao, Chamado.id]
+    if historico:
+        consulta = consulta.add_columns(*(coluna.label(nome) for nome, coluna in COLUNAS_HISTORICO.items()))\
+                           .outerjoin(HistoricoChamado, HistoricoChamado.chamado_id == Chamado.id)\
+                           .outerjoin(_autor, HistoricoChamado.usuario_id == _autor.id)
+        cabecalho += COLUNAS_HISTORICO
+        ordem += [HistoricoChamado.data_acao, HistoricoChamado.id]
+    return consulta.order_by(*ordem), cabecalho
+
+
+def _valores(linhas, cabecalho):
+    for linha in linhas:
+        mapa = linha._mapping
+        yield [mapa[campo] for campo in cabecalho]
+
+
+# CSV
+
+def _celula_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, str) and valor[:1] in ('=', '+', '-', '@'):
+        # Planilhas executariam o texto como fórmula
+        return "'" + valor
+    return valor
+
+
+def gerar_csv(linhas, cabecalho, separador=';', tamanho_lote=1000):
+    """CSV com BOM (o Excel reconhece o UTF-8) enviado a cada `tamanho_lote` linhas"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=separador)
+    buffer.write('\ufeff')
+    escritor.writerow(cabecalho)
+    for i, valores in enumerate(_valores(linhas, cabecalho), 1):
+        escritor.writerow([_celula_csv(valor) for valor in valores])
+        if i % tamanho_lote == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# XLSX
+
+_PARTES_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Chamados" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '<Relationship Id="rId2" Target="styles.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+        '</Relationships>'),
+    # Estilo 1: data e hora (dd/mm/yyyy hh:mm)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'),
+}
+
+_INICIO_PLANILHA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_FIM_PLANILHA = '</sheetData></worksheet>'
+
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+
+# Caracteres de controle não são válidos em XML
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _celula_xlsx(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, bool):
+        valor = 'Sim' if valor else 'Não'
+    elif isinstance(valor, (int, float)):
+        return f'<c><v>{valor}</v></c>'
+    elif isinstance(valor, datetime):
+        return f'<c s="1"><v>{(valor - _EPOCA_EXCEL).total_seconds() / 86400:.6f}</v></c>'
+    texto = escape(_INVALIDOS_XML.sub('', str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha_xlsx(valores):
+    return '<row>' + ''.join(_celula_xlsx(valor) for valor in valores) + '</row>'
+
+
+class _Saida(io.RawIOBase):
+    """Destino não pesquisável do ZipFile; o conteúdo é esvaziado a cada lote"""
+    
+    def __init__(self):
+        self._partes = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+    
+    def esvaziar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def gerar_xlsx(linhas, cabecalho, tamanho_lote=1000):
+    """Planilha XLSX com a linha de cabeçalho, enviada a cada `tamanho_lote` linhas"""
+    saida = _Saida()
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        for nome, conteudo in _PARTES_XLSX.items():
+            pacote.writestr(nome, conteudo)
+        yield saida.esvaziar()
+        
+        with pacote.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write((_INICIO_PLANILHA + _linha_xlsx(cabecalho)).encode())
+            lote = []
+            for valores in _valores(linhas, cabecalho):
+                lote.append(_linha_xlsx(valores))
+                if len(lote) >= tamanho_lote:
+                    planilha.write(''.join(lote).encode())
+                    lote = []
+                    yield saida.esvaziar()
+            lote.append(_FIM_PLANILHA)
+            planilha.write(''.join(lote).encode())
+    yield saida.esvaziar()
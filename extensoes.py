@@ -0,0 +1,47 @@
+"""Instâncias das extensões, ligadas à aplicação por create_app (app.py).
+
+Ficam fora de app.py para que blueprints e comandos as importem sem
+criar a aplicação; nada aqui abre conexão com o banco ou inicia threads.
+"""
+from flask_login import LoginManager
+
+from analise import AnaliseChamados
+from banco_sqlite import FilaEscrita
+from busca import BuscaChamados
+from cache_http import CacheHTTP
+from cache_usuarios import CacheUsuarios
+from contadores import ContadoresChamados
+from disponibilidade_email import DisponibilidadeEmail
+from estaticos import Estaticos
+from eventos import EventosChamados
+from fila_email import EntregadorEmails
+from fragmentos import CacheFragmentos
+from metricas import Metricas
+from notificacoes import NotificacoesChamados
+from replicas import Replicas
+from senhas import ServicoSenhas
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message = 'Por favor, faça login para acessar esta página.'
+
+entregador_emails = EntregadorEmails()
+contadores = ContadoresChamados()
+cache_usuarios = CacheUsuarios()
+metricas = Metricas()
+busca = BuscaChamados()
+senhas = ServicoSenhas()
+disponibilidade_email = DisponibilidadeEmail()
+fila_escrita = FilaEscrita()
+replicas = Replicas()
+eventos = EventosChamados()
+notificacoes = NotificacoesChamados()
+cache_http = CacheHTTP()
+estaticos = Estaticos()
+fragmentos = CacheFragmentos()
+analise = AnaliseChamados()
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Identidade e papel vêm do cache; usuários desativados são deslogados
+    return cache_usuarios.carregar(int(user_id))
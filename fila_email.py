@@ -0,0 +1,236 @@
+"""Fila de saída (outbox) de emails e worker de entrega em segundo plano.
+
+As rotas apenas gravam o email em `fila_emails`; o envio acontece fora da
+requisição, em lotes, reaproveitando uma única conexão SMTP por lote. Antes
+de cada lote o worker transforma as notificações de chamados vencidas em
+emails (notificacoes.py); depois, no intervalo próprio, atualiza os resumos
+de SLA (analise.py).
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, and_, update
+
+from models import db, EmailPendente
+
+
+def enfileirar_email(assunto, destinatarios, corpo_html, commit=True):
+    """Grava o email na fila de saída e acorda o worker.
+    
+    Com commit=False o email entra na transação corrente; quem chama faz o
+    commit e depois chama `acordar_entregador()`.
+    """
+    email = EmailPendente(
+        assunto=assunto,
+        destinatarios=','.join(destinatarios),
+        corpo_html=corpo_html,
+        status='pendente',
+        proxima_tentativa=datetime.utcnow()
+    )
+    db.session.add(email)
+    if commit:
+        db.session.commit()
+        acordar_entregador()
+    return email
+
+
+def acordar_entregador():
+    entregador = current_app.extensions.get('fila_email')
+    if entregador:
+        entregador.acordar()
+
+
+def _reservar_lote(tamanho, duracao_reserva):
+    """Reserva até `tamanho` emails vencidos para este worker.
+    
+    A reserva é um UPDATE condicional, então vários workers (threads ou
+    processos) podem consumir a mesma fila sem enviar um email duas vezes.
+    Emails presos em 'enviando' (worker que morreu) voltam a ficar
+    disponíveis quando a reserva expira.
+    """
+    agora = datetime.utcnow()
+    disponivel = and_(
+        EmailPendente.status.in_(['pendente', 'enviando']),
+        EmailPendente.proxima_tentativa <= agora
+    )
+    ids = [id for (id,) in db.session.query(EmailPendente.id)
+                                     .filter(disponivel)
+                                     .order_by(EmailPendente.id)
+                                     .limit(tamanho)]
+    if not ids:
+        return []
+    
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(EmailPendente)
+        .where(EmailPendente.id.in_(ids), disponivel)
+        .values(status='enviando',
+                reserva=token,
+                proxima_tentativa=agora + timedelta(seconds=duracao_reserva))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    
+    return EmailPendente.query.filter_by(reserva=token, status='enviando')\
+                              .order_by(EmailPendente.id).all()
+
+
+def _registrar_falha(email, erro):
+    """Agenda nova tentativa com backoff exponencial ou desiste do email"""
+    config = current_app.config
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)[:1000]
+    email.reserva = None
+    
+    if email.tentativas >= config['EMAIL_MAX_TENTATIVAS']:
+        email.status = 'falhou'
+        print(f"Email #{email.id} descartado após {email.tentativas} tentativas: {erro}")
+    else:
+        espera = min(config['EMAIL_BACKOFF_BASE'] * 2 ** (email.tentativas - 1),
+                     config['EMAIL_BACKOFF_MAXIMO'])
+        email.status = 'pendente'
+        email.proxima_tentativa = datetime.utcnow() + timedelta(seconds=espera)
+
+
+def _mail():
+    """Estado do Flask-Mail do app, criado no primeiro envio.
+    
+    Só o processo que entrega emails importa e configura o Flask-Mail.
+    """
+    mail = current_app.extensions.get('mail')
+    if mail is None:
+        from flask_mail import Mail
+        mail = Mail().init_app(current_app._get_current_object())
+    return mail
+
+
+def processar_fila():
+    """Envia um lote da fila usando uma única conexão SMTP.
+    
+    Retorna a quantidade de emails reservados no lote.
+    """
+    config = current_app.config
+    lote = _reservar_lote(config['EMAIL_FILA_LOTE'], config['EMAIL_FILA_RESERVA'])
+    if not lote:
+        return 0
+    
+    from flask_mail import Message
+    mail = _mail()
+    metricas = current_app.extensions.get('metricas')
+    try:
+        with mail.connect() as conexao:
+            for email in lote:
+                inicio = time.perf_counter()
+                try:
+                    conexao.send(Message(
+                        subject=email.assunto,
+                        recipients=email.destinatarios.split(','),
+                        html=email.corpo_html
+                    ))
+                except Exception as e:
+                    print(f"Erro ao enviar email #{email.id}: {e}")
+                    _registrar_falha(email, e)
+                    if metricas:
+                        metricas.observar_email(time.perf_counter() - inicio, False)
+                else:
+                    if metricas:
+                        metricas.observar_email(time.perf_counter() - inicio, True)
+                    email.status = 'enviado'
+                    email.reserva = None
+                    email.data_envio = datetime.utcnow()
+    except Exception as e:
+        # Falha ao conectar no servidor SMTP: o lote inteiro volta para a fila
+        print(f"Erro ao conectar no servidor de email: {e}")
+        for email in lote:
+            if email.status == 'enviando':
+                _registrar_falha(email, e)
+    
+    db.session.commit()
+    return len(lote)
+
+
+class EntregadorEmails:
+    """Worker que consome a fila de emails em segundo plano.
+    
+    Pode rodar como thread dentro do processo web (`iniciar`) ou em
+    primeiro plano em um processo separado (`executar`, usado pelo comando
+    `flask worker-emails`).
+    """
+    
+    def __init__(self, app=None):
+        self.app = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        app.extensions['fila_email'] = self
+        app.before_request(self._iniciar_interno)
+    
+    def acordar(self):
+        """Avisa o worker que há emails novos na fila"""
+        self._acordar.set()
+    
+    def _iniciar_interno(self):
+        # Antes de cada requisição: a thread nasce no processo que atende (não
+        # no master do gunicorn com --preload, onde não sobreviveria ao fork)
+        if self.app.config['EMAIL_WORKER_INTERNO']:
+            self.iniciar()
+    
+    def iniciar(self):
+        """Inicia o worker em uma thread daemon, se ainda não estiver rodando"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self.executar, name='entregador-emails', daemon=True)
+            self._thread.start()
+    
+    def parar(self, timeout=5):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def executar(self):
+        """Loop principal: processa lotes até a fila esvaziar e então aguarda"""
+        self._parar.clear()
+        intervalo = self.app.config['EMAIL_FILA_INTERVALO']
+        tamanho_lote = self.app.config['EMAIL_FILA_LOTE']
+        
+        while not self._parar.is_set():
+            processados = 0
+            with self.app.app_context():
+                try:
+                    notificacoes = current_app.extensions.get('notificacoes')
+                    if notificacoes is not None:
+                        notificacoes.consolidar()
+                    processados = processar_fila()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Erro no worker de emails: {e}")
+                # Resumos de SLA (analise.py) no intervalo próprio, depois dos emails
+                try:
+                    analise = current_app.extensions.get('analise')
+                    if analise is not None:
+                        analise.atualizar_se_devido()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Erro ao atualizar os resumos de SLA: {e}")
+            
+            # Lote cheio: provavelmente há mais emails esperando
+            if processados >= tamanho_lote:
+                continue
+            
+            self._acordar.wait(intervalo)
+            self._acordar.clear()
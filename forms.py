@@ -1,8 +1,16 @@
 from flask_wtf import FlaskForm
+from flask import current_app
 from wtforms import StringField, PasswordField, TextAreaField, SelectField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 from models import Usuario
 
+def email_cadastrado(email):
+    """Consulta o filtro de emails da aplicação (disponibilidade_email.py) se houver"""
+    disponibilidade = current_app.extensions.get('disponibilidade_email')
+    if disponibilidade is not None:
+        return disponibilidade.cadastrado(email)
+    return Usuario.query.filter_by(email=email).first() is not None
+
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     senha = PasswordField('Senha', validators=[DataRequired()])
@@ -15,8 +23,7 @@ class AutoCadastroForm(FlaskForm):
     termos = BooleanField('Li e aceito os termos de uso', validators=[DataRequired()])
     
     def validate_email(self, email):
-        usuario = Usuario.query.filter_by(email=email.data).first()
-        if usuario:
+        if email_cadastrado(email.data):
             raise ValidationError('Este email já está cadastrado.')
 
 class CadastroUsuarioForm(FlaskForm):
@@ -28,8 +35,7 @@ class CadastroUsuarioForm(FlaskForm):
     is_tecnico = BooleanField('Técnico')
     
     def validate_email(self, email):
-        usuario = Usuario.query.filter_by(email=email.data).first()
-        if usuario:
+        if email_cadastrado(email.data):
             raise ValidationError('Email já cadastrado.')
 
 class ChamadoForm(FlaskForm):
@@ -0,0 +1,154 @@
+"""Cache de trechos renderizados de templates (tag `{% fragmento %}`).
+
+    {% fragmento 'ultimos_chamados', versao_dados() %}
+        ... tabela ...
+    {% endfragmento %}
+
+O HTML do trecho fica em memória (LRU por processo, limitado a
+FRAGMENTOS_MAX_MB) sob a chave template + nome + partes. Só há cache quando
+as versões de cache_http são compartilhadas (CACHE_URL=redis://... ou
+PROCESSO_UNICO): com memoria:// cada worker só veria as próprias escritas. As partes devem
+cobrir tudo o que o trecho usa: `versao_dados(escopo)` devolve o escopo e a
+versão dos chamados de cache_http (trocada a cada escrita de chamados; por
+padrão o escopo que o usuário enxerga) e a versão 'usuarios' entra sempre,
+porque nomes aparecem nas páginas. Um acerto também evita as consultas que
+alimentam o trecho quando a view as passa com `adiar`.
+
+Métricas: acertos e falhas por trecho, tempo de renderização nas falhas,
+bytes e itens em memória e descartes pelo limite.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from cache import compartilhado
+from metricas import Contador, Histograma
+
+
+class Adiado:
+    """Resultado de `funcao()` calculado só quando o template o percorre"""
+    
+    def __init__(self, funcao):
+        self._funcao = funcao
+        self._valor = None
+    
+    @property
+    def valor(self):
+        if self._valor is None:
+            self._valor = self._funcao()
+        return self._valor
+    
+    def __iter__(self):
+        return iter(self.valor)
+    
+    def __len__(self):
+        return len(self.valor)
+    
+    def __bool__(self):
+        return bool(self.valor)
+
+
+def adiar(funcao):
+    return Adiado(funcao)
+
+
+class ExtensaoFragmentos(Extension):
+    """Tag `{% fragmento nome, partes... %}...{% endfragmento %}`"""
+    
+    tags = {'fragmento'}
+    
+    def parse(self, parser):
+        linha = next(parser.stream).lineno
+        partes = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            partes.append(parser.parse_expression())
+        corpo = parser.parse_statements(('name:endfragmento',), drop_needle=True)
+        chamada = self.call_method('_renderizar', [nodes.Const(parser.name), nodes.List(partes)])
+        return nodes.CallBlock(chamada, [], [], corpo).set_lineno(linha)
+    
+    def _renderizar(self, template, partes, caller):
+        return current_app.extensions['fragmentos'].renderizar(template, partes, caller)
+
+
+class CacheFragmentos:
+    """LRU de trechos renderizados limitado em bytes, com métricas"""
+    
+    def __init__(self, app=None):
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.descartes = 0
+        self.consultas = Contador('fragmentos_consultas_total', 'Consultas ao cache de fragmentos',
+                                  ('fragmento', 'resultado'))
+        self.render_tempo = Histograma('fragmentos_render_segundos',
+                                       'Tempo de renderização dos fragmentos (falhas)', ('fragmento',))
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        # Depois de cache_http.init_app: as chaves usam as versões dele
+        self.ativo = app.config['FRAGMENTOS_ATIVO'] and compartilhado(app.extensions['cache_http'].cache, app)
+        self.max_bytes = app.config['FRAGMENTOS_MAX_MB'] * 1024 * 1024
+        app.jinja_env.add_extension(ExtensaoFragmentos)
+        app.add_template_global(self.versao_dados)
+        app.extensions['fragmentos'] = self
+    
+    def versao_dados(self, escopo=None):
+        """Escopo e versão dos chamados (padrão: o escopo que o usuário enxerga) e versão dos usuários"""
+        cache_http = current_app.extensions['cache_http']
+        escopo = escopo or cache_http.escopo(current_user)
+        return escopo, cache_http.versao(escopo), cache_http.versao('usuarios')
+    
+    def renderizar(self, template, partes, caller):
+        nome = partes[0]
+        chave = (template, *partes) if self.ativo else None
+        if chave is not None:
+            with self._lock:
+                html = self._itens.get(chave)
+                if html is not None:
+                    self._itens.move_to_end(chave)
+            if html is not None:
+                self.consultas.incrementar(nome, 'acerto')
+                return html
+        
+        inicio = time.perf_counter()
+        html = Markup(caller())
+        self.render_tempo.observar(time.perf_counter() - inicio, nome)
+        if chave is not None:
+            self.consultas.incrementar(nome, 'falha')
+            self._guardar(chave, html)
+        return html
+    
+    def _guardar(self, chave, html):
+        tamanho = sys.getsizeof(html)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= sys.getsizeof(anterior)
+            self._itens[chave] = html
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                _, descartado = self._itens.popitem(last=False)
+                self.bytes -= sys.getsizeof(descartado)
+                self.descartes += 1
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+    
+    def metricas(self):
+        return {
+            'itens': len(self._itens),
+            'bytes': self.bytes,
+            'descartes': self.descartes
+        }
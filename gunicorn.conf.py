@@ -0,0 +1,8 @@
+"""Ganchos do gunicorn, lidos automaticamente do diretório em que ele é iniciado"""
+
+
+def post_worker_init(worker):
+    # Cada worker carrega o filtro de emails ao subir: importar o wsgi.py (no
+    # master, com --preload) não abre conexão com o banco
+    from extensoes import disponibilidade_email
+    disponibilidade_email.aquecer_no_boot(worker.wsgi)
@@ -0,0 +1,38 @@
+"""Limite de requisições por cliente (token bucket) em memória.
+
+Cada cliente tem um balde com `rajada` fichas que se repõe a `taxa` fichas
+por segundo; cada requisição consome uma. O limite vale por processo: com N
+workers, o cliente pode chegar a N vezes a taxa configurada.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LimitadorTaxa:
+    """Token bucket por chave (ex.: IP do cliente)"""
+    
+    def __init__(self, taxa, rajada, max_clientes=10000):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.max_clientes = max_clientes
+        self.recusadas = 0
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def permitir(self, chave):
+        """(permitido, segundos até a próxima ficha)"""
+        agora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._baldes.pop(chave, (self.rajada, agora))
+            fichas = min(self.rajada, fichas + (agora - ultimo) * self.taxa)
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+            else:
+                self.recusadas += 1
+            # Mais recente no fim; os clientes inativos há mais tempo saem primeiro
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.max_clientes:
+                self._baldes.popitem(last=False)
+        return permitido, 0 if permitido else (1 - fichas) / self.taxa
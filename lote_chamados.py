@@ -0,0 +1,271 @@
+"""Operações sobre vários chamados em uma única transação.
+
+`atualizar_em_lote` lê os valores atuais com um SELECT, aplica
+status/prioridade/técnico com um único UPDATE baseado em conjunto e grava o
+histórico e as notificações (notificacoes.py, como na atualização de um
+chamado) em INSERTs de várias linhas; o worker junta as notificações em um
+email por destinatário, ou no resumo de quem optou por ele.
+`desativar_usuario` faz o soft delete e libera (ou redistribui) a fila do
+técnico com UPDATE ... RETURNING, no mesmo commit.
+
+Como os UPDATE e INSERT passam pelo Core, contadores, índice de busca, o
+feed de eventos das páginas abertas e as versões do cache HTTP são
+atualizados explicitamente.
+"""
+import heapq
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, func, insert, select, update
+
+from estatisticas import STATUS_CHAMADO
+from fila_email import acordar_entregador
+from models import db, Usuario, Chamado, HistoricoChamado
+
+PRIORIDADES = ('baixa', 'media', 'alta', 'urgente')
+
+
+def _descricao(alteracoes, comentario):
+    """Mesmo texto de histórico de atualizar_chamado"""
+    descricao = ', '.join(alteracoes)
+    if comentario:
+        if descricao:
+            descricao += f'. Comentário: {comentario}'
+        else:
+            descricao = f'Comentário: {comentario}'
+    return descricao
+
+
+def atualizar_em_lote(ids, usuario, status=None, prioridade=None, tecnico_id=None,
+                      remover_tecnico=False, comentario=None):
+    """Aplica as mesmas alterações a todos os chamados de `ids`.
+    
+    Chamados em que nada muda (e sem comentário) são ignorados. Levanta
+    ValueError para entradas inválidas. Retorna um dict com os ids
+    atualizados, os não encontrados e o número de notificações registradas.
+    """
+    ids = sorted(set(ids))
+    maximo = current_app.config['CHAMADOS_LOTE_MAXIMO']
+    if not ids:
+        raise ValueError('Nenhum chamado selecionado.')
+    if len(ids) > maximo:
+        raise ValueError(f'Selecione no máximo {maximo} chamados por vez.')
+    if status and status not in STATUS_CHAMADO:
+        raise ValueError(f'Status inválido: {status}')
+    if prioridade and prioridade not in PRIORIDADES:
+        raise ValueError(f'Prioridade inválida: {prioridade}')
+    
+    tecnico = None
+    if tecnico_id is not None:
+        tecnico = db.session.query(Usuario.id, Usuario.nome)\
+                            .filter_by(id=tecnico_id, is_tecnico=True, ativo=True).first()
+        if tecnico is None:
+            raise ValueError('Técnico inválido.')
+    
+    try:
+        atuais = db.session.execute(
+            select(Chamado.id, Chamado.titulo, Chamado.usuario_id, Chamado.status,
+                   Chamado.prioridade, Chamado.tecnico_id)
+            .where(Chamado.id.in_(ids))
+            .with_for_update()
+        ).all()
+        
+        agora = datetime.utcnow()
+        historico = []
+        variacoes = []
+        afetados = []
+        for chamado in atuais:
+            alteracoes = []
+            tecnico_final = chamado.tecnico_id
+            if status and status != chamado.status:
+                alteracoes.append(f'Status alterado de {chamado.status} para {status}')
+                variacoes.append((chamado.usuario_id, chamado.status, -1))
+                variacoes.append((chamado.usuario_id, status, 1))
+            if prioridade and prioridade != chamado.prioridade:
+                alteracoes.append(f'Prioridade alterada de {chamado.prioridade} para {prioridade}')
+            if tecnico is not None and tecnico.id != chamado.tecnico_id:
+                alteracoes.append(f'Chamado atribuído a {tecnico.nome}')
+                tecnico_final = tecnico.id
+            elif remover_tecnico and chamado.tecnico_id:
+                alteracoes.append('Atribuição removida')
+                tecnico_final = None
+            
+            descricao = _descricao(alteracoes, comentario)
+            if not descricao:
+                continue
+            afetados.append({'id': chamado.id, 'titulo': chamado.titulo, 'usuario_id': chamado.usuario_id,
+                             'descricao': descricao, 'tecnico_id': tecnico_final})
+            historico.append({'chamado_id': chamado.id, 'usuario_id': usuario.id,
+                              'acao': 'atualizacao', 'descricao': descricao, 'data_acao': agora})
+        
+        ids_afetados = [chamado['id'] for chamado in afetados]
+        encontrados = {chamado.id for chamado in atuais}
+        resultado = {
+            'atualizados': ids_afetados,
+            'nao_encontrados': [id for id in ids if id not in encontrados],
+            'notificacoes': 0
+        }
+        if not afetados:
+            db.session.rollback()
+            return resultado
+        
+        # Um UPDATE para todos os chamados afetados
+        valores = {'data_atualizacao': agora}
+        if status:
+            valores['status'] = status
+            if status == 'resolvido':
+                valores['data_resolucao'] = case((Chamado.status != 'resolvido', agora),
+                                                 else_=Chamado.data_resolucao)
+        if prioridade:
+            valores['prioridade'] = prioridade
+        if tecnico is not None:
+            valores['tecnico_id'] = tecnico.id
+        elif remover_tecnico:
+            valores['tecnico_id'] = None
+        db.session.execute(update(Chamado).where(Chamado.id.in_(ids_afetados)).values(**valores),
+                           execution_options={'synchronize_session': False})
+        
+        # Um INSERT de várias linhas para o histórico
+        db.session.execute(insert(HistoricoChamado).values(historico))
+        
+        busca = current_app.extensions.get('busca')
+        if busca is not None:
+            busca.indexar(ids_afetados, conexao=db.session.connection())
+        
+        # Mesmo registro da atualização de um chamado: janela, resumo e um
+        # email por destinatário com os chamados que vencem juntos
+        notificacoes = current_app.extensions.get('notificacoes')
+        if notificacoes is not None:
+            resultado['notificacoes'] = notificacoes.registrar_lote(afetados, 'Chamado atualizado')
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    contadores = current_app.extensions.get('contadores')
+    if contadores is not None and variacoes:
+        contadores.aplicar(variacoes)
+    eventos = current_app.extensions.get('eventos')
+    if eventos is not None:
+        eventos.publicar_chamados(ids_afetados)
+    cache_http = current_app.extensions.get('cache_http')
+    if cache_http is not None:
+        cache_http.alterar({chamado['usuario_id'] for chamado in afetados})
+    acordar_entregador()
+    return resultado
+
+
+
+def _cargas_tecnicos(excluir_id):
+    """{tecnico_id: chamados abertos/em andamento} dos técnicos ativos, exceto `excluir_id`"""
+    cargas = {id: 0 for (id,) in db.session.query(Usuario.id).filter(
+        Usuario.is_tecnico.is_(True), Usuario.ativo.is_(True), Usuario.id != excluir_id)}
+    if cargas:
+        linhas = db.session.query(Chamado.tecnico_id, func.count(Chamado.id))\
+                           .filter(Chamado.tecnico_id.in_(cargas),
+                                   Chamado.status.in_(['aberto', 'em_andamento']))\
+                           .group_by(Chamado.tecnico_id)
+        cargas.update(dict(linhas))
+    return cargas
+
+
+def distribuir_por_carga(ids, cargas):
+    """{tecnico_id: [ids]} entregando cada chamado ao técnico menos carregado no momento.
+    
+    Quem tem menos chamados recebe mais, até as cargas se igualarem.
+    """
+    heap = [(carga, tecnico_id) for tecnico_id, carga in cargas.items()]
+    heapq.heapify(heap)
+    distribuicao = {}
+    for id in ids:
+        carga, tecnico_id = heap[0]
+        distribuicao.setdefault(tecnico_id, []).append(id)
+        heapq.heapreplace(heap, (carga + 1, tecnico_id))
+    return distribuicao
+
+
+def desativar_usuario(usuario, exclusor, redistribuir=False):
+    """Soft delete do usuário e liberação dos chamados abertos atribuídos a ele.
+    
+    Chamados em andamento voltam a 'aberto' e todos perdem o técnico; com
+    `redistribuir`, são repassados aos técnicos ativos pela carga atual.
+    Tudo em uma transação. Retorna {'liberados': n, 'redistribuidos': {tecnico_id: n}}.
+    """
+    try:
+        usuario.soft_delete(exclusor.id)
+        agora = datetime.utcnow()
+        
+        do_tecnico = (Chamado.tecnico_id == usuario.id)
+        em_andamento = db.session.execute(
+            update(Chamado)
+            .where(do_tecnico, Chamado.status == 'em_andamento')
+            .values(status='aberto', tecnico_id=None, data_atualizacao=agora)
+            .returning(Chamado.id, Chamado.usuario_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        abertos = db.session.execute(
+            update(Chamado)
+            .where(do_tecnico, Chamado.status == 'aberto')
+            .values(tecnico_id=None, data_atualizacao=agora)
+            .returning(Chamado.id, Chamado.usuario_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        
+        variacoes = []
+        for chamado in em_andamento:
+            variacoes.append((chamado.usuario_id, 'em_andamento', -1))
+            variacoes.append((chamado.usuario_id, 'aberto', 1))
+        ids = sorted([chamado.id for chamado in em_andamento] + [chamado.id for chamado in abertos])
+        
+        descricoes = dict.fromkeys(ids, 'Técnico removido automaticamente (usuário excluído)')
+        distribuicao = {}
+        if redistribuir and ids:
+            cargas = _cargas_tecnicos(usuario.id)
+            if cargas:
+                distribuicao = distribuir_por_carga(ids, cargas)
+                nomes = dict(db.session.query(Usuario.id, Usuario.nome)
+                                       .filter(Usuario.id.in_(distribuicao)))
+                # Um UPDATE por técnico que recebe chamados
+                for tecnico_id, ids_tecnico in distribuicao.items():
+                    db.session.execute(
+                        update(Chamado).where(Chamado.id.in_(ids_tecnico)).values(tecnico_id=tecnico_id),
+                        execution_options={'synchronize_session': False})
+                    for id in ids_tecnico:
+                        descricoes[id] = (f'Chamado reatribuído automaticamente a '
+                                          f'{nomes[tecnico_id]} (técnico anterior excluído)')
+        
+        if ids:
+            # A volta para 'aberto' entra no histórico como as demais mudanças
+            # de status (resumos de SLA, analise.py)
+            for chamado in em_andamento:
+                descricoes[chamado.id] = f'Status alterado de em_andamento para aberto, {descricoes[chamado.id]}'
+            # executemany: filas com milhares de chamados passariam do limite
+            # de parâmetros de um único INSERT ... VALUES
+            db.session.execute(insert(HistoricoChamado), [
+                {'chamado_id': id, 'usuario_id': exclusor.id, 'acao': 'atualizacao',
+                 'descricao': descricoes[id], 'data_acao': agora}
+                for id in ids
+            ])
+            busca = current_app.extensions.get('busca')
+            if busca is not None:
+                busca.indexar(ids, conexao=db.session.connection())
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    contadores = current_app.extensions.get('contadores')
+    if contadores is not None and variacoes:
+        contadores.aplicar(variacoes)
+    eventos = current_app.extensions.get('eventos')
+    if eventos is not None:
+        eventos.publicar_chamados(ids)
+    cache_http = current_app.extensions.get('cache_http')
+    if cache_http is not None and ids:
+        cache_http.alterar({chamado.usuario_id for chamado in em_andamento + abertos})
+    return {
+        'liberados': len(ids),
+        'redistribuidos': {tecnico_id: len(ids_tecnico) for tecnico_id, ids_tecnico in distribuicao.items()}
+    }
@@ -0,0 +1,209 @@
+"""Instrumentação por requisição exposta no formato texto do Prometheus.
+
+Mede, por endpoint: latência, quantidade de instruções SQL, tempo gasto
+no banco e tempo de renderização de templates. Também mede o envio de
+emails do worker e registra consultas lentas (com o SQL) no logger
+`chamados.sql_lenta`. Usa apenas eventos do SQLAlchemy e sinais do
+Flask, com custo de alguns time.perf_counter() por evento.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request, current_app
+from flask import request_started, request_finished, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger_sql_lenta = logging.getLogger('chamados.sql_lenta')
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_QUANTIDADE = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = [f'{nome}="{str(valor).replace(chr(34), chr(39))}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class Histograma:
+    """Histograma cumulativo com rótulos, no modelo do Prometheus"""
+    
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observar(self, valor, *rotulos):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+    
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            series = [(r, list(s[0]), s[1], s[2]) for r, s in self._series.items()]
+        for rotulos, contagens, soma, total in sorted(series):
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + ('+Inf',), contagens):
+                acumulado += quantidade
+                rotulo = _formatar_rotulos(self.rotulos, rotulos, f'le="{limite}"')
+                linhas.append(f'{self.nome}_bucket{rotulo} {acumulado}')
+            rotulo = _formatar_rotulos(self.rotulos, rotulos)
+            linhas.append(f'{self.nome}_sum{rotulo} {soma}')
+            linhas.append(f'{self.nome}_count{rotulo} {total}')
+        return linhas
+
+
+class Contador:
+    """Contador monotônico com rótulos"""
+    
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+    
+    def incrementar(self, *rotulos, valor=1):
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+    
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} counter']
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for rotulos, valor in valores:
+            linhas.append(f'{self.nome}{_formatar_rotulos(self.rotulos, rotulos)} {valor}')
+        return linhas
+
+
+class Metricas:
+    """Coleta métricas da aplicação e publica em /metrics"""
+    
+    def __init__(self, app=None):
+        self.requisicao = Histograma('http_requisicao_segundos', 'Latência das requisições',
+                                     ('endpoint', 'metodo', 'status'))
+        self.sql_quantidade = Histograma('http_requisicao_sql_instrucoes', 'Instruções SQL por requisição',
+                                         ('endpoint',), BUCKETS_QUANTIDADE)
+        self.sql_tempo = Histograma('http_requisicao_sql_segundos', 'Tempo em SQL por requisição',
+                                    ('endpoint',))
+        self.template_tempo = Histograma('http_requisicao_template_segundos',
+                                         'Tempo de renderização de templates por requisição', ('endpoint',))
+        self.email_tempo = Histograma('email_envio_segundos', 'Tempo de envio de cada email',
+                                      ('resultado',))
+        self.sql_lentas = Contador('sql_lentas_total', 'Instruções SQL acima do limite de lentidão',
+                                   ('endpoint',))
+        self.coletores = []
+        self.limite_sql_lenta = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['metricas'] = self
+        if not app.config['METRICAS_ATIVAS']:
+            return
+        
+        limite_ms = app.config['SQL_LENTA_MS']
+        self.limite_sql_lenta = limite_ms / 1000 if limite_ms else None
+        
+        request_started.connect(self._inicio_requisicao, app)
+        request_finished.connect(self._fim_requisicao, app)
+        before_render_template.connect(self._inicio_template, app)
+        template_rendered.connect(self._fim_template, app)
+        # Eventos de Engine valem para o processo: outra aplicação criada nele
+        # (testes, benchmark) não registra de novo, ou cada instrução contaria várias vezes
+        if not event.contains(Engine, 'after_cursor_execute', self._fim_sql):
+            event.listen(Engine, 'before_cursor_execute', self._inicio_sql)
+            event.listen(Engine, 'after_cursor_execute', self._fim_sql)
+        
+        app.add_url_rule('/metrics', 'metrics', self.endpoint)
+    
+    def registrar_coletor(self, funcao):
+        """Adiciona uma função que devolve linhas extras no formato do Prometheus"""
+        self.coletores.append(funcao)
+        return funcao
+    
+    # Sinais do Flask
+    
+    def _inicio_requisicao(self, sender, **extra):
+        g._metricas = {'inicio': time.perf_counter(), 'sql': 0, 'sql_tempo': 0.0,
+                       'template_tempo': 0.0, 'templates': []}
+    
+    def _fim_requisicao(self, sender, response, **extra):
+        dados = g.pop('_metricas', None)
+        if dados is None:
+            return
+        endpoint = request.endpoint or 'desconhecido'
+        self.requisicao.observar(time.perf_counter() - dados['inicio'],
+                                 endpoint, request.method, response.status_code)
+        self.sql_quantidade.observar(dados['sql'], endpoint)
+        self.sql_tempo.observar(dados['sql_tempo'], endpoint)
+        self.template_tempo.observar(dados['template_tempo'], endpoint)
+    
+    def _inicio_template(self, sender, template, context, **extra):
+        dados = g.get('_metricas')
+        if dados is not None:
+            dados['templates'].append(time.perf_counter())
+    
+    def _fim_template(self, sender, template, context, **extra):
+        dados = g.get('_metricas')
+        if dados is not None and dados['templates']:
+            dados['template_tempo'] += time.perf_counter() - dados['templates'].pop()
+    
+    # Eventos do SQLAlchemy
+    
+    def _inicio_sql(self, conexao, cursor, instrucao, parametros, contexto, executemany):
+        conexao.info.setdefault('_metricas_sql', []).append(time.perf_counter())
+    
+    def _fim_sql(self, conexao, cursor, instrucao, parametros, contexto, executemany):
+        inicios = conexao.info.get('_metricas_sql')
+        if not inicios:
+            return
+        duracao = time.perf_counter() - inicios.pop()
+        
+        em_requisicao = has_request_context()
+        if em_requisicao:
+            dados = g.get('_metricas')
+            if dados is not None:
+                dados['sql'] += 1
+                dados['sql_tempo'] += duracao
+        
+        if self.limite_sql_lenta is not None and duracao >= self.limite_sql_lenta:
+            endpoint = (request.endpoint or 'desconhecido') if em_requisicao else '-'
+            self.sql_lentas.incrementar(endpoint)
+            logger_sql_lenta.warning('SQL lenta (%.1f ms) em %s: %s',
+                                     duracao * 1000, endpoint, ' '.join(instrucao.split()))
+    
+    # Emails (chamado pelo worker da fila)
+    
+    def observar_email(self, duracao, sucesso):
+        self.email_tempo.observar(duracao, 'enviado' if sucesso else 'erro')
+    
+    # Exposição
+    
+    def exportar(self):
+        linhas = []
+        for metrica in (self.requisicao, self.sql_quantidade, self.sql_tempo,
+                        self.template_tempo, self.email_tempo, self.sql_lentas):
+            linhas.extend(metrica.exportar())
+        for coletor in self.coletores:
+            linhas.extend(coletor())
+        return '\n'.join(linhas) + '\n'
+    
+    def endpoint(self):
+        token = current_app.config.get('METRICAS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Acesso negado\n', status=403, mimetype='text/plain')
+        return Response(self.exportar(), mimetype='text/plain; version=0.0.4')
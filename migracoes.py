@@ -0,0 +1,121 @@
+"""Migrações de esquema para bancos já existentes.
+
+`db.create_all()` só cria tabelas que ainda não existem; alterações em
+tabelas existentes (índices, colunas novas) ficam aqui, em ordem. Cada
+migração é idempotente e roda uma única vez por banco, registrada na
+tabela `schema_migracoes`. Funciona em SQLite e PostgreSQL.
+"""
+from flask import current_app
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from busca import criar_indice_busca
+from models import (db, Usuario, Chamado, HistoricoChamado, EmailPendente, MigracaoAplicada,
+                    ResumoPrioridade, ResumoTecnico, ResumoTransicao, BacklogDiario, MarcaAnalise)
+
+
+def _criar_indices(conexao, tabela, nomes):
+    indices = {indice.name: indice for indice in tabela.indexes}
+    for nome in nomes:
+        indices[nome].create(bind=conexao, checkfirst=True)
+
+
+def _0001_indices_consultas_frequentes(conexao):
+    _criar_indices(conexao, Chamado.__table__, [
+        'ix_chamados_data_criacao',
+        'ix_chamados_usuario_data',
+        'ix_chamados_usuario_status_data',
+        'ix_chamados_status_data',
+        'ix_chamados_status_usuario',
+        'ix_chamados_prioridade_data',
+        'ix_chamados_tecnico_status',
+    ])
+    _criar_indices(conexao, HistoricoChamado.__table__, ['ix_historico_chamado_data'])
+    _criar_indices(conexao, Usuario.__table__, ['ix_usuarios_ativo_tecnico'])
+    _criar_indices(conexao, EmailPendente.__table__, ['ix_fila_emails_status_proxima'])
+    # Substituído pelo índice composto (status, proxima_tentativa)
+    conexao.execute(text('DROP INDEX IF EXISTS ix_fila_emails_proxima_tentativa'))
+
+
+def _0002_indice_data_atualizacao(conexao):
+    _criar_indices(conexao, Chamado.__table__, ['ix_chamados_data_atualizacao'])
+
+
+def _0003_indice_busca(conexao):
+    # Sem suporte no banco (SQLite sem FTS5) a busca usa o índice em memória
+    indice = criar_indice_busca(conexao, current_app.config['BUSCA_IDIOMA'])
+    if indice is not None:
+        indice.reconstruir(conexao)
+
+
+def _0004_notificacoes_resumo(conexao):
+    # A tabela `notificacoes` é criada pelo create_all; aqui só a coluna nova
+    colunas = {coluna['name'] for coluna in inspect(conexao).get_columns('usuarios')}
+    if 'notificacoes_resumo' not in colunas:
+        conexao.execute(text('ALTER TABLE usuarios ADD COLUMN notificacoes_resumo '
+                             'BOOLEAN NOT NULL DEFAULT FALSE'))
+
+
+def _0005_tabelas_analise(conexao):
+    # Bancos criados antes dos resumos; depois, `flask reconstruir-analise`
+    for modelo in (ResumoPrioridade, ResumoTecnico, ResumoTransicao, BacklogDiario, MarcaAnalise):
+        modelo.__table__.create(bind=conexao, checkfirst=True)
+
+
+def _0006_email_alterado_em(conexao):
+    colunas = {coluna['name'] for coluna in inspect(conexao).get_columns('usuarios')}
+    if 'email_alterado_em' not in colunas:
+        conexao.execute(text('ALTER TABLE usuarios ADD COLUMN email_alterado_em TIMESTAMP'))
+    _criar_indices(conexao, Usuario.__table__, ['ix_usuarios_email_alterado_em'])
+
+
+# (versão, descrição, função) — sempre acrescente no final
+MIGRACOES = [
+    ('0001_indices_consultas_frequentes',
+     'Índices compostos para listagens, filtros e contagens de chamados',
+     _0001_indices_consultas_frequentes),
+    ('0002_indice_data_atualizacao',
+     'Índice para a sincronização incremental da API (since=)',
+     _0002_indice_data_atualizacao),
+    ('0003_indice_busca',
+     'Índice de busca textual (FTS5 no SQLite, tsvector no PostgreSQL)',
+     _0003_indice_busca),
+    ('0004_notificacoes_resumo',
+     'Opção de receber as notificações de chamados em resumo periódico',
+     _0004_notificacoes_resumo),
+    ('0005_tabelas_analise',
+     'Tabelas de resumo diário de SLA e tempo de resolução',
+     _0005_tabelas_analise),
+    ('0006_email_alterado_em',
+     'Instante da troca de email, lido pelo filtro de emails de cada worker',
+     _0006_email_alterado_em),
+]
+
+
+def migracoes_pendentes():
+    aplicadas = {versao for (versao,) in db.session.query(MigracaoAplicada.versao)}
+    return [migracao for migracao in MIGRACOES if migracao[0] not in aplicadas]
+
+
+def aplicar_migracoes():
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    MigracaoAplicada.__table__.create(bind=db.engine, checkfirst=True)
+    
+    aplicadas = []
+    for versao, descricao, funcao in migracoes_pendentes():
+        try:
+            with db.engine.begin() as conexao:
+                funcao(conexao)
+                conexao.execute(MigracaoAplicada.__table__.insert().values(
+                    versao=versao, descricao=descricao))
+        except IntegrityError:
+            # Outro processo aplicou a mesma migração ao mesmo tempo
+            continue
+        aplicadas.append(versao)
+        print(f"Migração aplicada: {versao}")
+    
+    db.session.remove()
+    if aplicadas:
+        # Conexões abertas antes do DDL podem manter o esquema antigo em cache
+        db.engine.dispose()
+    return aplicadas
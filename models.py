@@ -1,8 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from replicas import SessaoRoteada
 
-db = SQLAlchemy()
+# SessaoRoteada: leituras de rotas @somente_leitura vão para as réplicas
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
 
 class Usuario(UserMixin, db.Model):
     __tablename__ = 'usuarios'
@@ -18,12 +20,21 @@ class Usuario(UserMixin, db.Model):
     ativo = db.Column(db.Boolean, default=True)
     data_exclusao = db.Column(db.DateTime, nullable=True)
     excluido_por = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    notificacoes_resumo = db.Column(db.Boolean, default=False, nullable=False)  # emails em resumo periódico
+    email_alterado_em = db.Column(db.DateTime, nullable=True)  # troca de email (filtro de emails dos workers)
     
     # Relacionamentos
     chamados_criados = db.relationship('Chamado', foreign_keys='Chamado.usuario_id', backref='criador', lazy=True)
     chamados_atribuidos = db.relationship('Chamado', foreign_keys='Chamado.tecnico_id', backref='tecnico', lazy=True)
     excluidor = db.relationship('Usuario', remote_side=[id], foreign_keys=[excluido_por])
     
+    __table_args__ = (
+        # listar_usuarios, usuarios_excluidos e lista de técnicos ativos
+        db.Index('ix_usuarios_ativo_tecnico', 'ativo', 'is_tecnico'),
+        # Emails trocados desde a última leitura (disponibilidade_email)
+        db.Index('ix_usuarios_email_alterado_em', 'email_alterado_em'),
+    )
+    
     @property
     def papel(self):
         if self.is_admin:
@@ -65,6 +76,19 @@ class Chamado(db.Model):
     equipamento = db.Column(db.String(100))
     anexos = db.Column(db.String(500))
     
+    # Índices para as consultas frequentes (listagens ordenadas por data,
+    # filtros de status/prioridade, contagens e reatribuição de técnicos)
+    __table_args__ = (
+        db.Index('ix_chamados_data_criacao', 'data_criacao', 'id'),
+        db.Index('ix_chamados_usuario_data', 'usuario_id', 'data_criacao', 'id'),
+        db.Index('ix_chamados_usuario_status_data', 'usuario_id', 'status', 'data_criacao'),
+        db.Index('ix_chamados_status_data', 'status', 'data_criacao'),
+        db.Index('ix_chamados_status_usuario', 'status', 'usuario_id'),
+        db.Index('ix_chamados_prioridade_data', 'prioridade', 'data_criacao'),
+        db.Index('ix_chamados_tecnico_status', 'tecnico_id', 'status'),
+        db.Index('ix_chamados_data_atualizacao', 'data_atualizacao'),
+    )
+    
     def __repr__(self):
         return f'<Chamado {self.id}: {self.titulo}>'
     
@@ -93,4 +117,123 @@ class HistoricoChamado(db.Model):
     data_acao = db.Column(db.DateTime, default=datetime.utcnow)
     
     chamado = db.relationship('Chamado', backref='historico')
-    usuario = db.relationship('Usuario', backref='acoes')
\ No newline at end of file
+    usuario = db.relationship('Usuario', backref='acoes')
+    
+    __table_args__ = (
+        db.Index('ix_historico_chamado_data', 'chamado_id', 'data_acao'),
+    )
+
+class MigracaoAplicada(db.Model):
+    """Registro das migrações de esquema já aplicadas (ver migracoes.py)"""
+    __tablename__ = 'schema_migracoes'
+    
+    versao = db.Column(db.String(100), primary_key=True)
+    descricao = db.Column(db.String(255))
+    aplicada_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class EmailPendente(db.Model):
+    """Fila de saída (outbox) de emails, entregue pelo worker em fila_email.py"""
+    __tablename__ = 'fila_emails'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    assunto = db.Column(db.String(255), nullable=False)
+    destinatarios = db.Column(db.Text, nullable=False)  # separados por vírgula
+    corpo_html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pendente', nullable=False)  # pendente, enviando, enviado, falhou
+    tentativas = db.Column(db.Integer, default=0, nullable=False)
+    reserva = db.Column(db.String(32))  # token do worker que está entregando
+    ultimo_erro = db.Column(db.Text)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    proxima_tentativa = db.Column(db.DateTime, default=datetime.utcnow)
+    data_envio = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_fila_emails_status_proxima', 'status', 'proxima_tentativa'),
+    )
+    
+    def __repr__(self):
+        return f'<EmailPendente {self.id}: {self.status}>'
+
+
+class Notificacao(db.Model):
+    """Alteração de chamado aguardando o email agrupado (ver notificacoes.py)"""
+    __tablename__ = 'notificacoes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(120), nullable=False)
+    chamado_id = db.Column(db.Integer, db.ForeignKey('chamados.id'), nullable=False)
+    acao = db.Column(db.String(50), nullable=False)
+    descricao = db.Column(db.Text)
+    resumo = db.Column(db.Boolean, default=False, nullable=False)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    enviar_em = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_notificacoes_resumo_enviar', 'resumo', 'enviar_em'),
+        db.Index('ix_notificacoes_destinatario_chamado', 'destinatario', 'chamado_id'),
+    )
+    
+    def __repr__(self):
+        return f'<Notificacao {self.id}: {self.destinatario} #{self.chamado_id}>'
+
+
+# Tabelas de resumo diário de SLA e tempo de resolução (ver analise.py).
+# `faixas_*` guarda contagens por faixa de horas (analise.FAIXAS_HORAS),
+# separadas por vírgula: percentis de qualquer período somam as faixas.
+
+class ResumoPrioridade(db.Model):
+    """Chamados criados, resolvidos e reabertos por dia e prioridade"""
+    __tablename__ = 'analise_prioridade'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    prioridade = db.Column(db.String(20), primary_key=True)
+    criados = db.Column(db.Integer, default=0, nullable=False)
+    resolvidos = db.Column(db.Integer, default=0, nullable=False)
+    reabertos = db.Column(db.Integer, default=0, nullable=False)
+    horas_resolucao = db.Column(db.Float, default=0, nullable=False)  # soma dos tempos de resolução
+    faixas_resolucao = db.Column(db.String(200), default='', nullable=False)
+
+
+class ResumoTecnico(db.Model):
+    """Chamados resolvidos por dia e técnico atribuído"""
+    __tablename__ = 'analise_tecnico'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    tecnico_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), primary_key=True)
+    resolvidos = db.Column(db.Integer, default=0, nullable=False)
+    horas_resolucao = db.Column(db.Float, default=0, nullable=False)
+    faixas_resolucao = db.Column(db.String(200), default='', nullable=False)
+
+
+class ResumoTransicao(db.Model):
+    """Mudanças de status por dia, com o tempo que o chamado ficou no status anterior"""
+    __tablename__ = 'analise_transicao'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    de = db.Column(db.String(20), primary_key=True)
+    para = db.Column(db.String(20), primary_key=True)
+    quantidade = db.Column(db.Integer, default=0, nullable=False)
+    horas = db.Column(db.Float, default=0, nullable=False)
+    faixas = db.Column(db.String(200), default='', nullable=False)
+
+
+class BacklogDiario(db.Model):
+    """Chamados abertos ou em andamento no fim do dia e idade deles"""
+    __tablename__ = 'analise_backlog'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    prioridade = db.Column(db.String(20), primary_key=True)
+    abertos = db.Column(db.Integer, default=0, nullable=False)
+    idade_p50_horas = db.Column(db.Float)
+    idade_p90_horas = db.Column(db.Float)
+    idade_max_horas = db.Column(db.Float)
+
+
+class MarcaAnalise(db.Model):
+    """Último registro de histórico já incluído nos resumos (processamento incremental)"""
+    __tablename__ = 'analise_marcas'
+    
+    nome = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, default=0, nullable=False)
+    atualizado_em = db.Column(db.DateTime)
@@ -0,0 +1,217 @@
+"""Notificações de chamados por email, agrupadas por janela ou em resumo.
+
+Cada alteração de chamado grava uma `Notificacao` por destinatário
+(TECNICO_EMAIL e o técnico atribuído) na transação da alteração, em vez de
+montar e enfileirar um email na requisição. O worker de emails
+(fila_email.py) consolida as notificações vencidas antes de cada lote:
+
+- modo normal: as alterações de um mesmo chamado para o mesmo destinatário
+  feitas até NOTIFICACOES_JANELA segundos depois da primeira saem em um
+  único email, com todas as alterações em ordem e o estado atual do chamado;
+- modo resumo (opção do técnico no perfil ou NOTIFICACOES_RESUMO): tudo o
+  que o destinatário recebeu no período sai em um email a cada
+  NOTIFICACOES_RESUMO_INTERVALO segundos (de hora em hora, no padrão).
+
+Chamados diferentes que vencem juntos para o mesmo destinatário (como os de
+uma atualização em lote, registrados por `registrar_lote`) saem em um email
+só. Destinatários com as mesmas alterações recebem um único email. Os emails
+são renderizados pelos templates de templates/email/, compilados uma vez
+na inicialização.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import joinedload
+
+from fila_email import enfileirar_email
+from models import db, Usuario, Chamado, Notificacao
+
+EPOCA = datetime(1970, 1, 1)
+
+
+class NotificacoesChamados:
+    """Registro das notificações e consolidação em emails (no worker)"""
+    
+    def __init__(self, app=None):
+        self.registradas = 0
+        self.consolidadas = 0
+        self.emails = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.tecnico_email = app.config['TECNICO_EMAIL']
+        self.janela = app.config['NOTIFICACOES_JANELA']
+        self.intervalo_resumo = app.config['NOTIFICACOES_RESUMO_INTERVALO']
+        self.sempre_resumo = set(app.config['NOTIFICACOES_RESUMO'])
+        self.lote = app.config['EMAIL_FILA_LOTE']
+        # Renderizados no worker, fora de requisição: sem context processors
+        self.templates = {nome: app.jinja_env.get_template(f'email/{nome}.html')
+                          for nome in ('chamado', 'lote', 'resumo')}
+        app.extensions['notificacoes'] = self
+    
+    def _proximo_resumo(self, agora):
+        segundos = (agora - EPOCA).total_seconds()
+        return EPOCA + timedelta(seconds=(segundos // self.intervalo_resumo + 1) * self.intervalo_resumo)
+    
+    def _linhas(self, chamado_id, tecnico, acao, descricao, agora):
+        """Uma notificação para TECNICO_EMAIL e outra para o técnico atribuído (se houver)"""
+        destinatarios = {self.tecnico_email: self.tecnico_email in self.sempre_resumo}
+        if tecnico is not None and tecnico.email not in destinatarios:
+            destinatarios[tecnico.email] = bool(tecnico.notificacoes_resumo) or tecnico.email in self.sempre_resumo
+        return [{
+            'destinatario': destinatario,
+            'chamado_id': chamado_id,
+            'acao': acao,
+            'descricao': descricao,
+            'resumo': resumo,
+            'data_criacao': agora,
+            'enviar_em': self._proximo_resumo(agora) if resumo else agora + timedelta(seconds=self.janela)
+        } for destinatario, resumo in destinatarios.items()]
+    
+    def registrar(self, chamado, acao, descricao=None):
+        """Grava as notificações da alteração na transação corrente (sem commit)"""
+        linhas = self._linhas(chamado.id, chamado.tecnico, acao, descricao, datetime.utcnow())
+        db.session.add_all([Notificacao(**linha) for linha in linhas])
+        self.registradas += len(linhas)
+    
+    def registrar_lote(self, chamados, acao):
+        """Notificações de chamados alterados pelo Core, em um INSERT (sem commit).
+        
+        `chamados`: dicts com id, descricao e tecnico_id (o técnico após a
+        alteração). Retorna o número de notificações gravadas.
+        """
+        ids_tecnicos = {chamado['tecnico_id'] for chamado in chamados} - {None}
+        tecnicos = {}
+        if ids_tecnicos:
+            tecnicos = {tecnico.id: tecnico for tecnico in db.session.execute(
+                select(Usuario.id, Usuario.email, Usuario.notificacoes_resumo)
+                .where(Usuario.id.in_(ids_tecnicos)))}
+        
+        agora = datetime.utcnow()
+        linhas = [linha for chamado in chamados
+                  for linha in self._linhas(chamado['id'], tecnicos.get(chamado['tecnico_id']),
+                                            acao, chamado['descricao'], agora)]
+        if linhas:
+            db.session.execute(insert(Notificacao), linhas)
+        self.registradas += len(linhas)
+        return len(linhas)
+    
+    def _retirar_vencidas(self, agora):
+        """Remove e devolve as notificações prontas para envio.
+        
+        DELETE ... RETURNING: com vários workers, cada notificação é
+        consumida por um só.
+        """
+        colunas = (Notificacao.destinatario, Notificacao.chamado_id, Notificacao.acao,
+                   Notificacao.descricao, Notificacao.resumo, Notificacao.data_criacao, Notificacao.id)
+        opcoes = {'synchronize_session': False}
+        linhas = []
+        
+        # Janela conta da primeira notificação do par (destinatário, chamado)
+        pares = db.session.execute(
+            select(Notificacao.destinatario, Notificacao.chamado_id)
+            .where(Notificacao.resumo.is_(False))
+            .group_by(Notificacao.destinatario, Notificacao.chamado_id)
+            .having(func.min(Notificacao.enviar_em) <= agora)
+            .limit(self.lote)
+        ).all()
+        if pares:
+            linhas += db.session.execute(
+                delete(Notificacao)
+                .where(Notificacao.resumo.is_(False),
+                       tuple_(Notificacao.destinatario, Notificacao.chamado_id).in_([tuple(par) for par in pares]))
+                .returning(*colunas),
+                execution_options=opcoes
+            ).all()
+        
+        resumos = db.session.scalars(
+            select(Notificacao.destinatario)
+            .where(Notificacao.resumo.is_(True), Notificacao.enviar_em <= agora)
+            .distinct()
+            .limit(self.lote)
+        ).all()
+        if resumos:
+            linhas += db.session.execute(
+                delete(Notificacao)
+                .where(Notificacao.resumo.is_(True), Notificacao.enviar_em <= agora,
+                       Notificacao.destinatario.in_(resumos))
+                .returning(*colunas),
+                execution_options=opcoes
+            ).all()
+        
+        return sorted(linhas, key=lambda linha: (linha.data_criacao, linha.id))
+    
+    def consolidar(self):
+        """Enfileira os emails das notificações vencidas; retorna quantos"""
+        linhas = self._retirar_vencidas(datetime.utcnow())
+        if not linhas:
+            return 0
+        
+        chamados = {chamado.id: chamado for chamado in Chamado.query.options(
+            joinedload(Chamado.criador), joinedload(Chamado.tecnico)
+        ).filter(Chamado.id.in_({linha.chamado_id for linha in linhas}))}
+        
+        # {destinatario: {chamado_id: [(acao, descricao, data)]}}, em ordem
+        normais = {}
+        resumos = {}
+        for linha in linhas:
+            destino = resumos if linha.resumo else normais
+            destino.setdefault(linha.destinatario, {}).setdefault(linha.chamado_id, []).append(
+                (linha.acao, linha.descricao, linha.data_criacao))
+        
+        # Mesmo conteúdo para destinatários diferentes: um email só
+        emails = {}
+        for destinatario, por_chamado in normais.items():
+            if len(por_chamado) == 1:
+                (chamado_id, alteracoes), = por_chamado.items()
+                chave = ('chamado', chamado_id, tuple(alteracoes))
+            else:
+                # Vários chamados vencidos juntos (atualização em lote): um email com todos
+                chave = ('lote', None, tuple((id, tuple(alteracoes)) for id, alteracoes in por_chamado.items()))
+            emails.setdefault(chave, []).append(destinatario)
+        for destinatario, por_chamado in resumos.items():
+            chave = ('resumo', None, tuple((id, tuple(alteracoes)) for id, alteracoes in por_chamado.items()))
+            emails.setdefault(chave, []).append(destinatario)
+        
+        enfileirados = 0
+        for (tipo, chamado_id, conteudo), destinatarios in emails.items():
+            if tipo == 'chamado':
+                mensagem = self._email_chamado(chamados.get(chamado_id), conteudo)
+            else:
+                mensagem = self._email_varios(tipo, chamados, conteudo)
+            if mensagem is not None:
+                assunto, corpo = mensagem
+                enfileirar_email(assunto, destinatarios, corpo, commit=False)
+                enfileirados += 1
+        db.session.commit()
+        
+        self.consolidadas += len(linhas)
+        self.emails += enfileirados
+        return enfileirados
+    
+    def _email_chamado(self, chamado, alteracoes):
+        if chamado is None:
+            return None
+        if len(alteracoes) == 1:
+            assunto = f'Chamado #{chamado.id} - {chamado.titulo} - {alteracoes[0][0]}'
+        else:
+            assunto = f'Chamado #{chamado.id} - {chamado.titulo} - {len(alteracoes)} atualizações'
+        return assunto, self.templates['chamado'].render(chamado=chamado, alteracoes=alteracoes)
+    
+    def _email_varios(self, tipo, chamados, conteudo):
+        itens = [(chamados[id], alteracoes) for id, alteracoes in conteudo if id in chamados]
+        if not itens:
+            return None
+        if tipo == 'resumo':
+            assunto = f'Resumo de chamados - {len(itens)} chamado(s) com alterações'
+        else:
+            assunto = f'{len(itens)} chamado(s) atualizado(s)'
+        return assunto, self.templates[tipo].render(itens=itens)
+    
+    def metricas(self):
+        return {
+            'registradas': self.registradas,
+            'consolidadas': self.consolidadas,
+            'emails': self.emails
+        }
@@ -0,0 +1,160 @@
+"""Paginação por cursor (keyset) para as listagens de chamados.
+
+Em vez de OFFSET + COUNT(*), cada página busca as linhas seguintes a
+partir da chave (data_criacao, id) da última linha exibida, usando o
+índice dessas colunas. Os cursores são tokens opacos; `PaginaCursor`
+expõe a mesma interface do Pagination do Flask-SQLAlchemy usada pelos
+templates (items, page, pages, has_next, iter_pages...).
+"""
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import func, literal, text
+
+from models import db, Chamado
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(data_criacao, id, pagina, direcao):
+    dados = {'d': data_criacao.isoformat(), 'i': id, 'p': pagina, 's': direcao}
+    bruto = json.dumps(dados, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).rstrip(b'=').decode()
+
+
+def decodificar_cursor(token):
+    try:
+        bruto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        dados = json.loads(bruto)
+        return {
+            'data_criacao': datetime.fromisoformat(dados['d']),
+            'id': int(dados['i']),
+            'pagina': max(int(dados['p']), 1),
+            'direcao': 'anterior' if dados['s'] == 'p' else 'proxima'
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorInvalido(f'Cursor inválido: {token!r}') from e
+
+
+def contagem_aproximada(query, limite=10000):
+    """Total aproximado: estimativa do planejador no PostgreSQL, contagem limitada nos demais.
+    
+    Retorna (total, exato).
+    """
+    if db.engine.dialect.name == 'postgresql':
+        sql = str(query.statement.compile(dialect=db.engine.dialect,
+                                          compile_kwargs={'literal_binds': True}))
+        plano = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]['Plan']['Plan Rows']), False
+    
+    total = db.session.query(func.count()).select_from(
+        query.order_by(None).limit(limite + 1).subquery()).scalar()
+    if total > limite:
+        return limite, False
+    return total, True
+
+
+class PaginaCursor:
+    """Página de uma listagem por cursor, compatível com o Pagination dos templates"""
+    
+    def __init__(self, items, page, per_page, has_next, has_prev, total=None, total_exato=True):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.total = total
+        self.total_exato = total_exato
+        self.next_cursor = None
+        self.prev_cursor = None
+        if has_next:
+            self.next_cursor = codificar_cursor(items[-1].data_criacao, items[-1].id, page + 1, 'n')
+        if has_prev and page > 2:
+            self.prev_cursor = codificar_cursor(items[0].data_criacao, items[0].id, page - 1, 'p')
+    
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+    
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+    
+    @property
+    def pages(self):
+        if self.total is not None:
+            return max(math.ceil(self.total / self.per_page), self.page)
+        return self.page + 1 if self.has_next else self.page
+    
+    def cursor_para(self, numero):
+        """Cursor que leva à página `numero` (None para a primeira página)"""
+        if numero == self.page + 1:
+            return self.next_cursor
+        if numero == self.page - 1:
+            return self.prev_cursor
+        return None
+    
+    def iter_pages(self, left_edge=1, left_current=1, right_current=1, right_edge=1):
+        """Somente as páginas alcançáveis por cursor: a primeira e as vizinhas da atual"""
+        alcancaveis = [1, self.page - 1, self.page]
+        if self.has_next:
+            alcancaveis.append(self.page + 1)
+        
+        anterior = 0
+        for numero in sorted(set(n for n in alcancaveis if n >= 1)):
+            if numero > anterior + 1:
+                yield None
+            yield numero
+            anterior = numero
+
+
+def posicao_cursor(dados):
+    """(data_criacao, id) do cursor como tupla comparável à chave de ordenação"""
+    # Literais tipados: o SQLite compara datas como texto no formato da coluna
+    return db.tuple_(literal(dados['data_criacao'], Chamado.data_criacao.type),
+                     literal(dados['id'], Chamado.id.type))
+
+
+def apos_cursor(dados):
+    """Filtro das linhas depois do cursor na ordem decrescente"""
+    return db.tuple_(Chamado.data_criacao, Chamado.id) < posicao_cursor(dados)
+
+
+def paginar_por_cursor(query, per_page, cursor=None, page=1, contar=False):
+    """Pagina uma consulta de Chamado por (data_criacao, id) decrescente"""
+    chave = db.tuple_(Chamado.data_criacao, Chamado.id)
+    ordem_desc = (Chamado.data_criacao.desc(), Chamado.id.desc())
+    
+    if cursor:
+        dados = decodificar_cursor(cursor)
+        page = dados['pagina']
+        
+        if dados['direcao'] == 'proxima':
+            linhas = query.filter(apos_cursor(dados)).order_by(*ordem_desc).limit(per_page + 1).all()
+            has_next = len(linhas) > per_page
+            has_prev = True
+            items = linhas[:per_page]
+        else:
+            linhas = query.filter(chave > posicao_cursor(dados))\
+                          .order_by(Chamado.data_criacao.asc(), Chamado.id.asc())\
+                          .limit(per_page + 1).all()
+            has_next = True
+            has_prev = len(linhas) > per_page and page > 1
+            items = list(reversed(linhas[:per_page]))
+    else:
+        # Sem cursor: primeira página, ou link antigo com ?page=N (via OFFSET)
+        page = max(page, 1)
+        linhas = query.order_by(*ordem_desc).offset((page - 1) * per_page).limit(per_page + 1).all()
+        has_next = len(linhas) > per_page
+        has_prev = page > 1
+        items = linhas[:per_page]
+    
+    total, exato = contagem_aproximada(query) if contar else (None, True)
+    return PaginaCursor(items, page, per_page, has_next and bool(items), has_prev and bool(items),
+                        total=total, total_exato=exato)
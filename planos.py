@@ -0,0 +1,93 @@
+"""Verificação dos planos de execução das consultas frequentes.
+
+Roda EXPLAIN em cada consulta quente e aponta as que caem em varredura
+completa da tabela (ou ordenam sem índice). Usado pelo comando
+`flask verificar-indices`, que termina com erro para falhar o CI.
+"""
+import re
+
+from sqlalchemy import func, or_
+
+from models import db, Usuario, Chamado, HistoricoChamado, EmailPendente
+
+
+def consultas_frequentes():
+    """(nome, consulta) das consultas que precisam usar índice"""
+    return [
+        ('listar_chamados (admin)',
+         Chamado.query.order_by(Chamado.data_criacao.desc()).limit(10)),
+        ('listar_chamados (admin, status)',
+         Chamado.query.filter_by(status='aberto').order_by(Chamado.data_criacao.desc()).limit(10)),
+        ('listar_chamados (admin, prioridade)',
+         Chamado.query.filter_by(prioridade='alta').order_by(Chamado.data_criacao.desc()).limit(10)),
+        ('listar_chamados (usuário)',
+         Chamado.query.filter_by(usuario_id=1).order_by(Chamado.data_criacao.desc()).limit(10)),
+        ('listar_chamados (cursor)',
+         Chamado.query.filter(db.tuple_(Chamado.data_criacao, Chamado.id) < db.tuple_(func.current_timestamp(), 1))
+                      .order_by(Chamado.data_criacao.desc(), Chamado.id.desc()).limit(10)),
+        ('listar_chamados (usuário, status)',
+         Chamado.query.filter_by(usuario_id=1, status='aberto').order_by(Chamado.data_criacao.desc()).limit(10)),
+        ('api sincronização (since)',
+         Chamado.query.filter(Chamado.data_atualizacao >= func.current_timestamp())),
+        ('estatísticas do usuário',
+         db.session.query(Chamado.status, func.count(Chamado.id))
+                   .filter(Chamado.usuario_id == 1).group_by(Chamado.status)),
+        ('reatribuição de técnico',
+         Chamado.query.filter(Chamado.tecnico_id == 1,
+                              Chamado.status.in_(['aberto', 'em_andamento']))),
+        ('histórico do chamado',
+         HistoricoChamado.query.filter_by(chamado_id=1).order_by(HistoricoChamado.data_acao.desc())),
+        ('técnicos ativos',
+         Usuario.query.filter_by(is_tecnico=True, ativo=True)),
+        ('usuários ativos',
+         Usuario.query.filter_by(ativo=True)),
+        ('emails novos ou trocados',
+         db.session.query(Usuario.id, Usuario.email)
+                   .filter(or_(Usuario.id > 1, Usuario.email_alterado_em >= func.current_timestamp()))),
+        ('fila de emails',
+         db.session.query(EmailPendente.id)
+                   .filter(EmailPendente.status == 'pendente',
+                           EmailPendente.proxima_tentativa <= func.current_timestamp())),
+    ]
+
+
+def _sql(consulta, dialeto):
+    return str(consulta.statement.compile(dialect=dialeto, compile_kwargs={'literal_binds': True}))
+
+
+def _problemas_sqlite(conexao, sql):
+    problemas = []
+    for linha in conexao.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql):
+        detalhe = linha[-1]
+        if re.match(r'^SCAN \w+$', detalhe):
+            problemas.append(detalhe)
+        elif 'TEMP B-TREE FOR ORDER BY' in detalhe:
+            problemas.append(detalhe)
+    return problemas
+
+
+def _problemas_postgresql(conexao, sql):
+    # Com seqscan desligado o planejador só escolhe Seq Scan se não houver índice
+    conexao.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    return [linha[0].strip() for linha in conexao.exec_driver_sql('EXPLAIN ' + sql)
+            if 'Seq Scan' in linha[0]]
+
+
+def verificar_planos():
+    """Retorna {nome da consulta: [trechos do plano problemáticos]}"""
+    dialeto = db.engine.dialect
+    if dialeto.name == 'sqlite':
+        analisar = _problemas_sqlite
+    elif dialeto.name == 'postgresql':
+        analisar = _problemas_postgresql
+    else:
+        raise RuntimeError(f'Banco não suportado para verificação de planos: {dialeto.name}')
+    
+    resultado = {}
+    with db.engine.connect() as conexao:
+        for nome, consulta in consultas_frequentes():
+            with conexao.begin():
+                problemas = analisar(conexao, _sql(consulta, dialeto))
+            if problemas:
+                resultado[nome] = problemas
+    return resultado
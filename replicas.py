@@ -0,0 +1,98 @@
+"""Leitura em réplicas do banco para rotas somente leitura.
+
+As réplicas vêm de DATABASE_REPLICA_URLS (URLs separadas por vírgula) e
+viram binds `replica_0`, `replica_1`... do Flask-SQLAlchemy, com as mesmas
+opções de pool do primário. Nas views marcadas com `@somente_leitura`, a
+`SessaoRoteada` manda os SELECTs para uma réplica sorteada na requisição;
+INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE e flushes continuam no primário.
+
+Depois de uma requisição de escrita (POST, PUT, PATCH, DELETE bem-sucedidos)
+o usuário lê do primário por REPLICA_JANELA_ESCRITA segundos, para ver as
+próprias alterações mesmo com atraso de replicação. Este módulo não importa
+`models`: a sessão é configurada lá (session_options) e o `db` é obtido de
+app.extensions.
+"""
+import random
+import time
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+CHAVE_PRIMARIO_ATE = '_primario_ate'
+METODOS_ESCRITA = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def _escreve(clause):
+    return isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None
+
+
+class SessaoRoteada(Session):
+    """Sessão que lê da réplica escolhida em `info['replica']`, se houver"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None and not self._flushing and not _escreve(clause):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replicas:
+    """Escolha de réplica por requisição e janela de leitura no primário após escritas"""
+    
+    def __init__(self, app=None):
+        self.engines = []
+        self.leituras_replica = 0
+        self.leituras_primario = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.janela = app.config['REPLICA_JANELA_ESCRITA']
+        db = app.extensions['sqlalchemy']
+        with app.app_context():
+            self.engines = [engine for chave, engine in db.engines.items()
+                            if chave is not None and chave.startswith('replica_')]
+        if self.engines:
+            app.after_request(self._marcar_escrita)
+        app.extensions['replicas'] = self
+    
+    def _marcar_escrita(self, resposta):
+        if request.method in METODOS_ESCRITA and resposta.status_code < 400:
+            session[CHAVE_PRIMARIO_ATE] = time.time() + self.janela
+        return resposta
+    
+    def fixado_no_primario(self):
+        """True se o usuário escreveu há menos de REPLICA_JANELA_ESCRITA segundos"""
+        return session.get(CHAVE_PRIMARIO_ATE, 0) > time.time()
+    
+    def usar_replica(self):
+        """Direciona as leituras da sessão desta requisição para uma réplica"""
+        if not self.engines:
+            return False
+        if self.fixado_no_primario():
+            self.leituras_primario += 1
+            return False
+        self.leituras_replica += 1
+        # A sessão é descartada no fim do app context, junto com a escolha
+        current_app.extensions['sqlalchemy'].session.info['replica'] = random.choice(self.engines)
+        return True
+    
+    def metricas(self):
+        return {
+            'replicas': len(self.engines),
+            'leituras_replica': self.leituras_replica,
+            'leituras_primario': self.leituras_primario
+        }
+
+
+def somente_leitura(view):
+    """Views que só leem: consultas vão para uma réplica (se configurada)"""
+    @wraps(view)
+    def decorada(*args, **kwargs):
+        replicas = current_app.extensions.get('replicas')
+        if replicas is not None:
+            replicas.usar_replica()
+        return view(*args, **kwargs)
+    return decorada
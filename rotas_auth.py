@@ -0,0 +1,256 @@
+"""Rotas de autenticação, cadastro e perfil do usuário"""
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
+from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import math
+
+from models import db, Usuario, Chamado
+from forms import LoginForm, AutoCadastroForm
+from fila_email import enfileirar_email
+from replicas import somente_leitura
+from fragmentos import adiar
+from senhas import SenhasOcupadas
+from extensoes import cache_usuarios, contadores, disponibilidade_email, senhas
+
+bp = Blueprint('auth', __name__)
+
+def resposta_senhas_ocupadas(template, form):
+    """Página do formulário com 503 quando o pool de hash de senhas está cheio"""
+    flash('Servidor ocupado no momento. Tente novamente em alguns segundos.', 'warning')
+    return render_template(template, form=form), 503, {'Retry-After': '5'}
+
+# Funções de email
+def enviar_email_boas_vindas(usuario):
+    """Envia email de boas-vindas para novo usuário"""
+    try:
+        enfileirar_email(
+            'Bem-vindo ao Sistema de Chamados',
+            [usuario.email],
+            f"""
+            <h2>Olá {usuario.nome}!</h2>
+            <p>Seu cadastro no Sistema de Chamados foi realizado com sucesso.</p>
+            <p>Agora você pode abrir chamados e acompanhar o status das suas solicitações.</p>
+            <br>
+            <p><strong>Dados do cadastro:</strong></p>
+            <ul>
+                <li>Nome: {usuario.nome}</li>
+                <li>Email: {usuario.email}</li>
+                <li>Data: {usuario.data_cadastro.strftime('%d/%m/%Y %H:%M')}</li>
+            </ul>
+            <br>
+            <p><a href="{url_for('auth.login', _external=True)}" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Acessar o Sistema</a></p>
+            <br>
+            <p>Em caso de dúvidas, entre em contato com o administrador.</p>
+            <p>Atenciosamente,<br>Equipe de Suporte</p>
+            """
+        )
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao enfileirar email de boas-vindas: {e}")
+        return False
+
+@bp.route('/')
+def index():
+    return redirect(url_for('auth.login'))
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('chamados.dashboard'))
+    
+    form = LoginForm()
+    if form.validate_on_submit():
+        try:
+            # A vaga no pool de senhas é reservada antes da consulta: a recusa
+            # por excesso de logins não depende de a conta existir
+            with senhas.vaga():
+                usuario = Usuario.query.filter_by(email=form.email.data).first()
+                senha_hash = usuario.senha_hash if usuario else None
+                # Devolve a conexão ao pool do banco enquanto o hash é calculado
+                db.session.rollback()
+                # Email inexistente verifica um hash fictício: mesmo tempo de resposta
+                senha_valida, novo_hash = senhas.autenticar(senha_hash, form.senha.data)
+        except SenhasOcupadas:
+            return resposta_senhas_ocupadas('login.html', form)
+        
+        if senha_valida:
+            if usuario.ativo:
+                login_user(usuario)
+                usuario.ultimo_acesso = datetime.utcnow()
+                if novo_hash:
+                    # Hash com método antigo: regrava com SENHA_METODO
+                    usuario.senha_hash = novo_hash
+                db.session.commit()
+                cache_usuarios.invalidar(usuario.id)
+                flash('Login realizado com sucesso!', 'success')
+                return redirect(url_for('chamados.dashboard'))
+            else:
+                flash('Usuário inativo. Contate o administrador.', 'danger')
+        else:
+            flash('Email ou senha inválidos.', 'danger')
+    
+    return render_template('login.html', form=form)
+
+@bp.route('/cadastro', methods=['GET', 'POST'])
+def cadastro_usuario_padrao():
+    """Rota pública para auto-cadastro de usuários comuns"""
+    if current_user.is_authenticated:
+        return redirect(url_for('chamados.dashboard'))
+    
+    form = AutoCadastroForm()
+    
+    if form.validate_on_submit():
+        if disponibilidade_email.cadastrado(form.email.data):
+            flash('Este email já está cadastrado. Faça login.', 'warning')
+            return redirect(url_for('auth.login'))
+        
+        try:
+            senha_hash = senhas.gerar(form.senha.data)
+        except SenhasOcupadas:
+            return resposta_senhas_ocupadas('cadastro_padrao.html', form)
+        
+        usuario = Usuario(
+            nome=form.nome.data,
+            email=form.email.data,
+            senha_hash=senha_hash,
+            is_admin=False,
+            is_tecnico=False,
+            ativo=True,
+            data_cadastro=datetime.utcnow()
+        )
+        
+        try:
+            db.session.add(usuario)
+            db.session.commit()
+            
+            # Enviar email de boas-vindas
+            enviar_email_boas_vindas(usuario)
+            
+            # Fazer login automático
+            login_user(usuario)
+            usuario.ultimo_acesso = datetime.utcnow()
+            db.session.commit()
+            
+            flash(f'Bem-vindo {usuario.nome}! Seu cadastro foi realizado com sucesso.', 'success')
+            return redirect(url_for('chamados.dashboard'))
+        
+        except IntegrityError:
+            # Email cadastrado por outro processo depois da validação
+            db.session.rollback()
+            flash('Este email já está cadastrado. Faça login.', 'warning')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash('Erro ao realizar cadastro. Tente novamente.', 'danger')
+            print(f"Erro no cadastro: {e}")
+    
+    return render_template('cadastro_padrao.html', form=form)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('Logout realizado com sucesso.', 'info')
+    return redirect(url_for('auth.login'))
+
+@bp.route('/perfil')
+@login_required
+@somente_leitura
+def perfil():
+    """Página de perfil do usuário com informações detalhadas"""
+    # Estatísticas do usuário (contadores em cache)
+    estatisticas = contadores.do_usuario(current_user.id)
+    total_chamados = estatisticas['total']
+    chamados_abertos = estatisticas['por_status']['aberto']
+    chamados_andamento = estatisticas['por_status']['em_andamento']
+    chamados_resolvidos = estatisticas['por_status']['resolvido']
+    
+    # Últimos 5 chamados do usuário (consultados só se o fragmento não estiver em cache)
+    ultimos_chamados = adiar(Chamado.query.filter_by(usuario_id=current_user.id)
+                                          .order_by(Chamado.data_criacao.desc())
+                                          .limit(5).all)
+    
+    return render_template('perfil.html',
+                         total_chamados=total_chamados,
+                         chamados_abertos=chamados_abertos,
+                         chamados_andamento=chamados_andamento,
+                         chamados_resolvidos=chamados_resolvidos,
+                         ultimos_chamados=ultimos_chamados)
+
+@bp.route('/perfil/alterar-senha', methods=['POST'])
+@login_required
+def alterar_senha():
+    """Alterar senha do usuário"""
+    dados = request.get_json()
+    senha_atual = dados.get('senha_atual')
+    nova_senha = dados.get('nova_senha')
+    
+    try:
+        # Verificar senha atual
+        if not senhas.verificar(current_user.senha_hash, senha_atual):
+            return jsonify({'success': False, 'mensagem': 'Senha atual incorreta!'})
+        
+        # Validar nova senha
+        if len(nova_senha) < 6:
+            return jsonify({'success': False, 'mensagem': 'A nova senha deve ter no mínimo 6 caracteres!'})
+        
+        nova_senha_hash = senhas.gerar(nova_senha)
+    except SenhasOcupadas:
+        return jsonify({'success': False,
+                        'mensagem': 'Servidor ocupado no momento. Tente novamente em alguns segundos.'}), \
+            503, {'Retry-After': '5'}
+    
+    # Atualizar senha
+    current_user.senha_hash = nova_senha_hash
+    db.session.commit()
+    cache_usuarios.invalidar(current_user.id)
+    
+    return jsonify({'success': True, 'mensagem': 'Senha alterada com sucesso!'})
+
+@bp.route('/perfil/atualizar', methods=['POST'])
+@login_required
+def atualizar_perfil():
+    """Atualizar dados do perfil"""
+    dados = request.get_json()
+    nome = dados.get('nome')
+    email = dados.get('email')
+    
+    # Verificar se email já existe (se foi alterado)
+    if email != current_user.email:
+        if disponibilidade_email.cadastrado(email):
+            return jsonify({'success': False, 'mensagem': 'Este email já está em uso por outro usuário!'})
+    
+    # Atualizar dados
+    current_user.nome = nome
+    current_user.email = email
+    if 'notificacoes_resumo' in dados:
+        current_user.notificacoes_resumo = bool(dados['notificacoes_resumo'])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'mensagem': 'Este email já está em uso por outro usuário!'})
+    cache_usuarios.invalidar(current_user.id)
+    
+    return jsonify({'success': True, 'mensagem': 'Perfil atualizado com sucesso!'})
+
+@bp.route('/verificar-email')
+def verificar_email():
+    """Rota AJAX para verificar se email já existe"""
+    # Pública: limitada por IP e respondida pelo filtro de emails em memória
+    permitido, espera = current_app.extensions['limitador_verificar_email'].permitir(request.remote_addr)
+    if not permitido:
+        return jsonify({'error': 'Muitas verificações. Aguarde alguns segundos.'}), 429, \
+            {'Retry-After': str(math.ceil(espera))}
+    
+    email = request.args.get('email')
+    if not email:
+        return jsonify({'error': 'Email não fornecido'}), 400
+    
+    cadastrado = disponibilidade_email.cadastrado(email)
+    return jsonify({
+        'disponivel': not cadastrado,
+        'mensagem': 'Email já cadastrado' if cadastrado else 'Email disponível'
+    })
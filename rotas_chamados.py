@@ -0,0 +1,435 @@
+"""Rotas de chamados: dashboard, listagem, detalhe, atualização, exportação e API"""
+from flask import (Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort,
+                   make_response, Response, stream_with_context, current_app)
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+
+from models import db, Usuario, Chamado, HistoricoChamado
+from forms import ChamadoForm, FiltroChamadosForm
+from fila_email import acordar_entregador
+from lote_chamados import atualizar_em_lote
+from estatisticas import estatisticas_visiveis
+from paginacao import paginar_por_cursor, decodificar_cursor, codificar_cursor, apos_cursor, CursorInvalido
+from consulta_chamados import (filtrar_chamados, campos_solicitados, selecionar_campos,
+                               gerar_json, gerar_ndjson)
+from replicas import somente_leitura
+from banco_sqlite import EscritaExpirada
+from exportacao import FORMATOS, consulta_exportacao, gerar_csv, gerar_xlsx
+from fragmentos import adiar
+from extensoes import analise, busca, cache_http, contadores, eventos, fila_escrita, notificacoes
+
+bp = Blueprint('chamados', __name__)
+
+@bp.route('/dashboard')
+@login_required
+@somente_leitura
+def dashboard():
+    # Estatísticas para o dashboard (contadores em cache)
+    estatisticas = contadores.estatisticas(current_user.id)
+    total_chamados = estatisticas['total']
+    meus_chamados = estatisticas['usuario']['total']
+    
+    if current_user.is_admin:
+        por_status = estatisticas['por_status']
+    else:
+        por_status = estatisticas['usuario']['por_status']
+    chamados_abertos = por_status['aberto']
+    chamados_andamento = por_status['em_andamento']
+    chamados_resolvidos = por_status['resolvido']
+    
+    # Últimos 5 chamados (consultados só se o fragmento não estiver em cache)
+    if current_user.is_admin:
+        ultimos_chamados = adiar(Chamado.query.order_by(Chamado.data_criacao.desc()).limit(5).all)
+    else:
+        ultimos_chamados = adiar(Chamado.query.filter_by(usuario_id=current_user.id).order_by(Chamado.data_criacao.desc()).limit(5).all)
+    
+    # Tempos de resolução e backlog (resumos de SLA) para admin e técnicos
+    sla = adiar(analise.painel) if current_user.is_admin or current_user.is_tecnico else None
+    
+    return render_template('dashboard.html',
+                         total_chamados=total_chamados,
+                         chamados_abertos=chamados_abertos,
+                         chamados_andamento=chamados_andamento,
+                         chamados_resolvidos=chamados_resolvidos,
+                         meus_chamados=meus_chamados,
+                         ultimos_chamados=ultimos_chamados,
+                         sla=sla)
+
+@bp.route('/chamados/novo', methods=['GET', 'POST'])
+@login_required
+def novo_chamado():
+    form = ChamadoForm()
+    
+    if form.validate_on_submit():
+        try:
+            fila_escrita.executar(gravar_novo_chamado, current_user.id, {
+                'titulo': form.titulo.data,
+                'descricao': form.descricao.data,
+                'prioridade': form.prioridade.data,
+                'localizacao': form.localizacao.data,
+                'equipamento': form.equipamento.data
+            })
+        except EscritaExpirada:
+            flash('Servidor ocupado: não foi possível confirmar a criação do chamado. '
+                  'Confira a lista antes de enviar de novo.', 'warning')
+            return redirect(url_for('chamados.listar_chamados'))
+        acordar_entregador()
+        
+        flash('Chamado criado com sucesso! Notificação enviada ao técnico.', 'success')
+        return redirect(url_for('chamados.listar_chamados'))
+    
+    return render_template('criar_chamado.html', form=form)
+
+def gravar_novo_chamado(usuario_id, dados):
+    """Chamado, histórico e notificação em uma transação (executada pela fila de escrita)"""
+    chamado = Chamado(usuario_id=usuario_id, status='aberto', **dados)
+    db.session.add(chamado)
+    db.session.flush()
+    
+    historico = HistoricoChamado(
+        chamado_id=chamado.id,
+        usuario_id=usuario_id,
+        acao='criacao',
+        descricao='Chamado criado'
+    )
+    db.session.add(historico)
+    
+    notificacoes.registrar(chamado, 'Novo chamado criado', 'Chamado criado')
+    return chamado.id
+
+@bp.route('/chamados')
+@login_required
+@somente_leitura
+def listar_chamados():
+    # Nada mudou nos chamados que o usuário enxerga: 304 sem consultar o banco.
+    # Sempre revalidada: quem acabou de abrir um chamado volta para cá
+    condicional = cache_http.condicional_escopo(current_user, 'lista', request.query_string,
+                                                reutilizavel=False)
+    if condicional.nao_modificado:
+        return condicional.resposta_304()
+    
+    form = FiltroChamadosForm()
+    
+    # Query base com permissão do usuário e filtros de status/prioridade;
+    # criador e técnico vêm no mesmo SELECT (evita uma consulta por linha)
+    query = filtrar_chamados(Chamado.query, current_user, request.args)\
+        .options(joinedload(Chamado.criador), joinedload(Chamado.tecnico))
+    
+    # Técnicos para as ações em lote (apenas admin)
+    tecnicos = []
+    if current_user.is_admin:
+        tecnicos = Usuario.query.filter_by(is_tecnico=True, ativo=True).all()
+    
+    # Busca textual (?q=): resultados por relevância, paginados por número de página
+    termos = request.args.get('q', '').strip()
+    if termos:
+        chamados = busca.paginar(query, termos, page=request.args.get('page', 1, type=int), per_page=10)
+        return condicional.aplicar(make_response(
+            render_template('listar_chamados.html', chamados=chamados, form=form, tecnicos=tecnicos)))
+    
+    # Ordenar e paginar por cursor (data_criacao, id); ?contar=1 inclui o total aproximado
+    try:
+        chamados = paginar_por_cursor(query, per_page=10,
+                                      cursor=request.args.get('cursor'),
+                                      page=request.args.get('page', 1, type=int),
+                                      contar=request.args.get('contar') == '1')
+    except CursorInvalido:
+        abort(400)
+    
+    return condicional.aplicar(make_response(
+        render_template('listar_chamados.html', chamados=chamados, form=form, tecnicos=tecnicos)))
+
+@bp.route('/chamados/exportar')
+@login_required
+@somente_leitura
+def exportar_chamados():
+    """Exporta os chamados em CSV ou XLSX por streaming, com os filtros da listagem.
+    
+    Parâmetros: formato=csv|xlsx, status, prioridade, de e ate (AAAA-MM-DD,
+    data de criação) e historico=1 para uma linha por entrada do histórico.
+    """
+    formato = request.args.get('formato', 'csv')
+    try:
+        if formato not in FORMATOS:
+            raise ValueError(f'Formato inválido: {formato}')
+        consulta, cabecalho = consulta_exportacao(current_user, request.args,
+                                                  historico=request.args.get('historico') == '1')
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('chamados.listar_chamados'))
+    
+    # Leitura em lotes (cursor do servidor no PostgreSQL): memória constante
+    lote = current_app.config['EXPORTACAO_LOTE']
+    linhas = db.session.execute(consulta.execution_options(yield_per=lote))
+    if formato == 'xlsx':
+        conteudo = gerar_xlsx(linhas, cabecalho, tamanho_lote=lote)
+    else:
+        conteudo = gerar_csv(linhas, cabecalho, separador=current_app.config['EXPORTACAO_CSV_SEPARADOR'],
+                             tamanho_lote=lote)
+    
+    nome = f"chamados-{datetime.utcnow().strftime('%Y%m%d-%H%M')}.{formato}"
+    return Response(stream_with_context(conteudo), mimetype=FORMATOS[formato],
+                    headers={'Content-Disposition': f'attachment; filename="{nome}"',
+                             'X-Accel-Buffering': 'no'})
+
+@bp.route('/chamados/<int:id>')
+@login_required
+def detalhe_chamado(id):
+    # Uma busca pela chave primária decide o 304 antes de montar a página
+    condicional = None
+    atual = db.session.execute(
+        select(Chamado.usuario_id, Chamado.data_atualizacao).where(Chamado.id == id)
+    ).first()
+    if atual is not None and (current_user.is_admin or atual.usuario_id == current_user.id):
+        condicional = cache_http.condicional('chamado', id, atual.data_atualizacao,
+                                             modificado=atual.data_atualizacao)
+        if condicional.nao_modificado:
+            return condicional.resposta_304()
+    
+    chamado = Chamado.query.options(joinedload(Chamado.criador), joinedload(Chamado.tecnico))\
+                           .get_or_404(id)
+    
+    # Verificar permissão
+    if not current_user.is_admin and chamado.usuario_id != current_user.id:
+        flash('Você não tem permissão para visualizar este chamado.', 'danger')
+        return redirect(url_for('chamados.listar_chamados'))
+    
+    historico = HistoricoChamado.query.filter_by(chamado_id=id)\
+                                      .options(joinedload(HistoricoChamado.usuario))\
+                                      .order_by(HistoricoChamado.data_acao.desc()).all()
+    
+    # Buscar técnicos disponíveis (apenas para admin)
+    tecnicos = []
+    if current_user.is_admin:
+        tecnicos = Usuario.query.filter_by(is_tecnico=True, ativo=True).all()
+    
+    resposta = make_response(render_template('detalhe_chamado.html', chamado=chamado,
+                                             historico=historico, tecnicos=tecnicos))
+    return condicional.aplicar(resposta) if condicional else resposta
+
+@bp.route('/chamados/<int:id>/atualizar', methods=['POST'])
+@login_required
+def atualizar_chamado(id):
+    if not current_user.is_admin:
+        flash('Apenas administradores podem atualizar chamados.', 'danger')
+        return redirect(url_for('chamados.detalhe_chamado', id=id))
+    
+    try:
+        atualizado = fila_escrita.executar(gravar_atualizacao_chamado, id, current_user.id,
+                                           status=request.form.get('status'),
+                                           prioridade=request.form.get('prioridade'),
+                                           tecnico_id=request.form.get('tecnico_id'),
+                                           comentario=request.form.get('comentario'))
+    except EscritaExpirada:
+        flash('Servidor ocupado: não foi possível confirmar a atualização. Confira o chamado.', 'warning')
+        return redirect(url_for('chamados.detalhe_chamado', id=id))
+    if atualizado is None:
+        abort(404)
+    
+    if atualizado:
+        acordar_entregador()
+        flash('Chamado atualizado com sucesso!', 'success')
+    else:
+        flash('Nenhuma alteração realizada.', 'info')
+    
+    return redirect(url_for('chamados.detalhe_chamado', id=id))
+
+def gravar_atualizacao_chamado(id, usuario_id, status, prioridade, tecnico_id, comentario):
+    """Aplica a atualização e grava histórico e notificação (executada pela fila de escrita).
+    
+    Retorna None se o chamado não existe, senão se houve alteração.
+    """
+    chamado = db.session.get(Chamado, id)
+    if chamado is None:
+        return None
+    
+    alteracoes = []
+    
+    if status and status != chamado.status:
+        alteracoes.append(f'Status alterado de {chamado.status} para {status}')
+        chamado.status = status
+        if status == 'resolvido':
+            chamado.data_resolucao = datetime.utcnow()
+    
+    if prioridade and prioridade != chamado.prioridade:
+        alteracoes.append(f'Prioridade alterada de {chamado.prioridade} para {prioridade}')
+        chamado.prioridade = prioridade
+    
+    if tecnico_id and tecnico_id != '' and int(tecnico_id) != chamado.tecnico_id:
+        tecnico = Usuario.query.get(int(tecnico_id))
+        if tecnico:
+            alteracoes.append(f'Chamado atribuído a {tecnico.nome}')
+            chamado.tecnico_id = int(tecnico_id)
+    elif tecnico_id == '' and chamado.tecnico_id:
+        alteracoes.append(f'Atribuição removida')
+        chamado.tecnico_id = None
+    
+    if alteracoes or comentario:
+        descricao = ', '.join(alteracoes)
+        if comentario:
+            if descricao:
+                descricao += f'. Comentário: {comentario}'
+            else:
+                descricao = f'Comentário: {comentario}'
+        
+        historico = HistoricoChamado(
+            chamado_id=chamado.id,
+            usuario_id=usuario_id,
+            acao='atualizacao',
+            descricao=descricao
+        )
+        db.session.add(historico)
+        
+        chamado.data_atualizacao = datetime.utcnow()
+        db.session.flush()
+        
+        notificacoes.registrar(chamado, 'Chamado atualizado', descricao)
+        return True
+    
+    return False
+
+@bp.route('/chamados/lote', methods=['POST'])
+@login_required
+def atualizar_chamados_lote():
+    """Altera status, prioridade ou técnico de vários chamados em uma transação.
+    
+    Aceita o formulário da listagem (ids marcados) ou JSON com
+    {"ids": [...], "status", "prioridade", "tecnico_id", "comentario"};
+    tecnico_id vazio mantém o técnico e "nenhum" remove a atribuição.
+    """
+    voltar = request.form.get('voltar', '')
+    if not voltar.startswith(url_for('chamados.listar_chamados')):
+        voltar = url_for('chamados.listar_chamados')
+    
+    if not current_user.is_admin:
+        if request.is_json:
+            return jsonify({'error': 'Apenas administradores podem atualizar chamados.'}), 403
+        flash('Apenas administradores podem atualizar chamados.', 'danger')
+        return redirect(voltar)
+    
+    dados = (request.get_json(silent=True) or {}) if request.is_json else request.form
+    tecnico = str(dados.get('tecnico_id') or '')
+    try:
+        try:
+            ids = [int(id) for id in (dados.get('ids') or [] if request.is_json
+                                      else request.form.getlist('ids'))]
+            tecnico_id = int(tecnico) if tecnico not in ('', 'nenhum') else None
+        except (TypeError, ValueError):
+            raise ValueError('Chamados ou técnico inválidos.')
+        resultado = atualizar_em_lote(
+            ids, current_user,
+            status=dados.get('status') or None,
+            prioridade=dados.get('prioridade') or None,
+            tecnico_id=tecnico_id,
+            remover_tecnico=tecnico == 'nenhum',
+            comentario=(dados.get('comentario') or '').strip() or None
+        )
+    except ValueError as e:
+        if request.is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'danger')
+        return redirect(voltar)
+    
+    if request.is_json:
+        return jsonify(resultado)
+    
+    if resultado['atualizados']:
+        flash(f"{len(resultado['atualizados'])} chamado(s) atualizado(s) com sucesso!", 'success')
+    else:
+        flash('Nenhuma alteração realizada.', 'info')
+    return redirect(voltar)
+
+@bp.route('/eventos')
+@login_required
+def stream_eventos():
+    """Alterações de chamados e contadores visíveis ao usuário (text/event-stream)"""
+    if not eventos.disponivel():
+        abort(404)
+    if not eventos.aceitar():
+        return Response('Limite de conexões de eventos atingido.\n', status=503,
+                        mimetype='text/plain', headers={'Retry-After': '30'})
+    
+    # Sem stream_with_context: o app context (e a conexão do banco) é liberado
+    # quando a view retorna, não quando a conexão fecha
+    fluxo = eventos.transmitir(current_user.id, current_user.is_admin,
+                               request.headers.get('Last-Event-ID'))
+    return Response(fluxo, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/estatisticas')
+@login_required
+def api_estatisticas():
+    estatisticas = contadores.estatisticas(current_user.id)
+    return jsonify(estatisticas_visiveis(current_user, estatisticas))
+
+@bp.route('/api/estatisticas/cache', methods=['GET', 'POST'])
+@login_required
+def api_estatisticas_cache():
+    """Métricas do cache de contadores; POST reconstrói a partir do banco"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    if request.method == 'POST':
+        contadores.reconstruir()
+    return jsonify(contadores.metricas())
+
+@bp.route('/api/chamados')
+@login_required
+@somente_leitura
+def api_chamados():
+    """Lista chamados em streaming (JSON ou NDJSON) com filtros, projeção e cursor.
+    
+    Parâmetros: status, prioridade, fields=a,b,c, since=<ISO 8601>,
+    limite=N (1 a 1000) e cursor=<token>, formato=ndjson.
+    """
+    try:
+        limite = request.args.get('limite', type=int)
+        if limite is not None and limite < 1:
+            raise ValueError(f'limite deve ser maior que zero: {limite}')
+        campos = campos_solicitados(request.args.get('fields'))
+        since = request.args.get('since')
+        since = datetime.fromisoformat(since) if since else None
+        cursor = request.args.get('cursor')
+        dados_cursor = decodificar_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # O poller usa este instante como `since` da próxima sincronização
+    cabecalhos = {'X-Sincronizado-Em': datetime.utcnow().isoformat()}
+    
+    # Mesma URL e nada mudou no escopo do usuário: 304 sem consultar o banco
+    condicional = cache_http.condicional_escopo(current_user, 'api', request.query_string,
+                                                request.accept_mimetypes.best, pagina=False)
+    if condicional.nao_modificado:
+        return condicional.resposta_304(cabecalhos)
+    
+    consulta = filtrar_chamados(selecionar_campos(campos), current_user, request.args)
+    if since:
+        consulta = consulta.filter(Chamado.data_atualizacao >= since)
+    if dados_cursor:
+        consulta = consulta.filter(apos_cursor(dados_cursor))
+    consulta = consulta.order_by(Chamado.data_criacao.desc(), Chamado.id.desc())
+    
+    if limite:
+        limite = min(limite, 1000)
+        linhas = db.session.execute(consulta.limit(limite + 1)).all()
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            pagina = dados_cursor['pagina'] + 1 if dados_cursor else 2
+            proximo = codificar_cursor(linhas[-1]._data_criacao, linhas[-1]._id, pagina, 'n')
+            argumentos = dict(request.args.items(), cursor=proximo)
+            cabecalhos['X-Proximo-Cursor'] = proximo
+            cabecalhos['Link'] = '<{}>; rel="next"'.format(
+                url_for('chamados.api_chamados', _external=True, **argumentos))
+    else:
+        # Leitura em lotes (cursor do servidor no PostgreSQL): memória constante
+        linhas = db.session.execute(consulta.execution_options(yield_per=500))
+    
+    if request.args.get('formato') == 'ndjson' or \
+            request.accept_mimetypes.best == 'application/x-ndjson':
+        return condicional.aplicar(Response(stream_with_context(gerar_ndjson(linhas, campos)),
+                                            mimetype='application/x-ndjson', headers=cabecalhos))
+    return condicional.aplicar(Response(stream_with_context(gerar_json(linhas, campos)),
+                                        mimetype='application/json', headers=cabecalhos))
@@ -0,0 +1,35 @@
+"""Relatórios de SLA e tempo de resolução (admin e técnicos), lidos das tabelas de resumo"""
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+
+from analise import AGRUPAMENTOS, FAIXAS_HORAS, periodo
+from replicas import somente_leitura
+from extensoes import analise
+
+bp = Blueprint('relatorios', __name__)
+
+@bp.route('/api/relatorios/sla')
+@login_required
+@somente_leitura
+def relatorio_sla():
+    """?de=AAAA-MM-DD&ate=AAAA-MM-DD (padrão: últimos 30 dias)&agrupar=prioridade|tecnico|transicao"""
+    if not (current_user.is_admin or current_user.is_tecnico):
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    agrupar = request.args.get('agrupar', 'prioridade')
+    if agrupar not in AGRUPAMENTOS:
+        return jsonify({'error': f'Agrupamento inválido: use {", ".join(AGRUPAMENTOS)}'}), 400
+    try:
+        de, ate = periodo(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'de': de.isoformat(),
+        'ate': ate.isoformat(),
+        'agrupar': agrupar,
+        'grupos': analise.relatorio(de, ate, agrupar),
+        'backlog': analise.serie_backlog(de, ate),
+        'faixas_horas': FAIXAS_HORAS,
+        'atualizado_em': analise.versao() or None
+    })
@@ -0,0 +1,217 @@
+"""Rotas de administração de usuários (apenas admin)"""
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from models import db, Usuario, Chamado
+from forms import CadastroUsuarioForm
+from lote_chamados import desativar_usuario
+from senhas import SenhasOcupadas
+from extensoes import cache_usuarios, senhas
+from rotas_auth import resposta_senhas_ocupadas
+
+bp = Blueprint('usuarios', __name__)
+
+@bp.route('/usuarios')
+@login_required
+def listar_usuarios():
+    if not current_user.is_admin:
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('chamados.dashboard'))
+    
+    usuarios = Usuario.query.filter_by(ativo=True).all()
+    return render_template('usuarios.html', usuarios=usuarios)
+
+@bp.route('/usuarios/novo', methods=['GET', 'POST'])
+@login_required
+def novo_usuario():
+    if not current_user.is_admin:
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('chamados.dashboard'))
+    
+    form = CadastroUsuarioForm()
+    
+    if form.validate_on_submit():
+        try:
+            senha_hash = senhas.gerar(form.senha.data)
+        except SenhasOcupadas:
+            return resposta_senhas_ocupadas('cadastro_usuario.html', form)
+        
+        usuario = Usuario(
+            nome=form.nome.data,
+            email=form.email.data,
+            senha_hash=senha_hash,
+            is_admin=form.is_admin.data,
+            is_tecnico=form.is_tecnico.data,
+            ativo=True
+        )
+        
+        try:
+            db.session.add(usuario)
+            db.session.commit()
+        except IntegrityError:
+            # Email cadastrado por outro processo depois da validação
+            db.session.rollback()
+            form.email.errors.append('Email já cadastrado.')
+            return render_template('cadastro_usuario.html', form=form)
+        
+        flash(f'Usuário {usuario.nome} cadastrado com sucesso!', 'success')
+        return redirect(url_for('usuarios.listar_usuarios'))
+    
+    return render_template('cadastro_usuario.html', form=form)
+
+@bp.route('/usuarios/<int:id>/toggle', methods=['POST'])
+@login_required
+def toggle_usuario(id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    usuario = Usuario.query.get_or_404(id)
+    
+    if usuario.id == current_user.id:
+        return jsonify({'error': 'Não é possível desativar o próprio usuário'}), 400
+    
+    usuario.ativo = not usuario.ativo
+    db.session.commit()
+    cache_usuarios.invalidar(usuario.id)
+    
+    return jsonify({
+        'success': True,
+        'ativo': usuario.ativo,
+        'mensagem': f'Usuário {"ativado" if usuario.ativo else "desativado"} com sucesso!'
+    })
+
+@bp.route('/usuarios/<int:id>/excluir', methods=['GET', 'POST'])
+@login_required
+def excluir_usuario(id):
+    """Página de confirmação de exclusão de usuário"""
+    if not current_user.is_admin:
+        flash('Acesso negado. Apenas administradores podem excluir usuários.', 'danger')
+        return redirect(url_for('usuarios.listar_usuarios'))
+    
+    if current_user.id == id:
+        flash('Você não pode excluir seu próprio usuário.', 'danger')
+        return redirect(url_for('usuarios.listar_usuarios'))
+    
+    usuario = Usuario.query.get_or_404(id)
+    
+    chamados_criados = Chamado.query.filter_by(usuario_id=id).count()
+    chamados_tecnicos = Chamado.query.filter_by(tecnico_id=id).count()
+    
+    return render_template('confirmar_exclusao_usuario.html',
+                         usuario=usuario,
+                         chamados_criados=chamados_criados,
+                         chamados_tecnicos=chamados_tecnicos)
+
+@bp.route('/usuarios/<int:id>/excluir-permanente', methods=['POST'])
+@login_required
+def excluir_usuario_permanente(id):
+    """Exclusão permanente (apenas se não tiver chamados)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    if current_user.id == id:
+        return jsonify({'error': 'Auto-exclusão não permitida'}), 400
+    
+    usuario = Usuario.query.get_or_404(id)
+    
+    chamados_criados = Chamado.query.filter_by(usuario_id=id).count()
+    chamados_tecnicos = Chamado.query.filter_by(tecnico_id=id).count()
+    
+    if chamados_criados > 0 or chamados_tecnicos > 0:
+        return jsonify({
+            'error': 'Usuário possui chamados associados. Use exclusão suave (soft delete).'
+        }), 400
+    
+    try:
+        nome = usuario.nome
+        db.session.delete(usuario)
+        db.session.commit()
+        cache_usuarios.invalidar(id)
+        
+        return jsonify({
+            'success': True,
+            'mensagem': f'Usuário {nome} excluído permanentemente com sucesso!'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/usuarios/<int:id>/soft-delete', methods=['POST'])
+@login_required
+def soft_delete_usuario(id):
+    """Exclusão suave - mantém histórico mas desativa o usuário"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    if current_user.id == id:
+        return jsonify({'error': 'Auto-exclusão não permitida'}), 400
+    
+    usuario = Usuario.query.get_or_404(id)
+    
+    # Soft delete e liberação dos chamados abertos do técnico em uma transação;
+    # com redistribuir=1 os chamados vão para os técnicos ativos menos carregados
+    redistribuir = request.form.get('redistribuir') == '1'
+    
+    try:
+        resultado = desativar_usuario(usuario, current_user, redistribuir=redistribuir)
+        cache_usuarios.invalidar(usuario.id)
+        
+        mensagem = f'Usuário {usuario.nome} desativado com sucesso!'
+        if resultado['redistribuidos']:
+            mensagem += (f" {resultado['liberados']} chamado(s) redistribuído(s) entre "
+                         f"{len(resultado['redistribuidos'])} técnico(s).")
+        elif resultado['liberados']:
+            mensagem += f" {resultado['liberados']} chamado(s) liberado(s) para reatribuição."
+        
+        return jsonify({
+            'success': True,
+            'mensagem': mensagem,
+            'liberados': resultado['liberados'],
+            'redistribuidos': resultado['redistribuidos']
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/usuarios/excluidos')
+@login_required
+def usuarios_excluidos():
+    """Listar usuários excluídos (soft delete)"""
+    if not current_user.is_admin:
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('chamados.dashboard'))
+    
+    usuarios_excluidos = Usuario.query.filter_by(ativo=False)\
+                                      .options(joinedload(Usuario.excluidor)).all()
+    return render_template('usuarios_excluidos.html', usuarios=usuarios_excluidos)
+
+@bp.route('/usuarios/<int:id>/restaurar', methods=['POST'])
+@login_required
+def restaurar_usuario(id):
+    """Restaurar usuário excluído (soft delete)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    usuario = Usuario.query.get_or_404(id)
+    
+    if usuario.ativo:
+        return jsonify({'error': 'Usuário já está ativo'}), 400
+    
+    try:
+        usuario.ativo = True
+        usuario.data_exclusao = None
+        usuario.excluido_por = None
+        if usuario.email.startswith(f"excluido_{usuario.id}_"):
+            usuario.email = usuario.email.replace(f"excluido_{usuario.id}_", "")
+        
+        db.session.commit()
+        cache_usuarios.invalidar(usuario.id)
+        
+        return jsonify({
+            'success': True,
+            'mensagem': f'Usuário {usuario.nome} restaurado com sucesso!'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,153 @@
+"""Hash e verificação de senhas fora das threads de requisição.
+
+O PBKDF2/scrypt do werkzeug é propositalmente caro em CPU. Aqui ele roda
+em um pool de processos limitado (SENHA_PROCESSOS) e cada requisição
+precisa de uma vaga (SENHA_FILA_MAXIMA) para usar o pool; sem vaga em
+SENHA_ESPERA segundos a requisição é recusada com `SenhasOcupadas`. O login
+reserva a vaga com `vaga()` antes de consultar o usuário, então a recusa não
+depende da conta, e emails inexistentes verificam um hash fictício para que o
+tempo de resposta não revele se a conta existe.
+O pool limita quantos hashes rodam ao mesmo tempo (a CPU fica livre para o
+resto do servidor), mas não devolve a thread: a requisição fica bloqueada
+esperando o resultado. Por isso a fila é limitada e quem passa de
+SENHA_ESPERA é recusado: um pico de logins ocupa no máximo SENHA_FILA_MAXIMA
+threads de requisição, e as demais seguem atendendo os chamados.
+
+Hashes gravados com parâmetros diferentes de SENHA_METODO são refeitos no
+próximo login bem-sucedido. Este módulo não importa a aplicação: ele é
+carregado nos processos do pool.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class SenhasOcupadas(Exception):
+    """Pool de hash de senhas sem vaga para esta requisição"""
+
+
+# Funções executadas nos processos do pool
+
+def _gerar(senha, metodo):
+    return generate_password_hash(senha, method=metodo)
+
+
+def _autenticar(senha_hash, senha, metodo, prefixo):
+    """(senha confere, novo hash quando os parâmetros do hash estão desatualizados)"""
+    if not check_password_hash(senha_hash, senha):
+        return False, None
+    if _prefixo(senha_hash) != prefixo:
+        return True, generate_password_hash(senha, method=metodo)
+    return True, None
+
+
+def _prefixo(senha_hash):
+    """Método e parâmetros do hash, ex.: 'pbkdf2:sha256:600000'"""
+    return senha_hash.split('$', 1)[0]
+
+
+class ServicoSenhas:
+    """Hash de senhas em um pool de processos com limite de requisições simultâneas"""
+    
+    def __init__(self, app=None):
+        self._executor = None
+        self._trava = threading.Lock()
+        self._local = threading.local()
+        self.em_uso = 0
+        self.recusadas = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.metodo = app.config['SENHA_METODO']
+        self.processos = app.config['SENHA_PROCESSOS']
+        self.espera = app.config['SENHA_ESPERA']
+        self._vagas = threading.BoundedSemaphore(app.config['SENHA_FILA_MAXIMA'])
+        self._hash_ficticio = None
+        app.extensions['senhas'] = self
+    
+    def _referencia(self):
+        """Hash de referência: dá o prefixo normalizado do método configurado e
+        é verificado quando o email não existe, no mesmo tempo de uma conta real.
+        
+        Calculado no pool no primeiro uso, não na inicialização: custa o mesmo
+        que um login e atrasaria a partida de cada processo.
+        """
+        if self._hash_ficticio is None:
+            self._hash_ficticio = self._executar(_gerar, 'senha-ficticia', self.metodo)
+        return self._hash_ficticio
+    
+    @property
+    def prefixo(self):
+        return _prefixo(self._referencia())
+    
+    @contextmanager
+    def vaga(self):
+        """Reserva uma vaga no pool para o bloco; levanta SenhasOcupadas se não houver"""
+        if getattr(self._local, 'reservada', False):
+            yield
+            return
+        if not self._vagas.acquire(timeout=self.espera):
+            with self._trava:
+                self.recusadas += 1
+            raise SenhasOcupadas()
+        with self._trava:
+            self.em_uso += 1
+        self._local.reservada = True
+        try:
+            yield
+        finally:
+            self._local.reservada = False
+            with self._trava:
+                self.em_uso -= 1
+            self._vagas.release()
+    
+    def _executar(self, funcao, *args):
+        with self.vaga():
+            if not self.processos:
+                return funcao(*args)
+            try:
+                return self._pool().submit(funcao, *args).result()
+            except BrokenProcessPool:
+                # Um processo do pool morreu: recria o pool e tenta de novo
+                with self._trava:
+                    self._executor = None
+                return self._pool().submit(funcao, *args).result()
+    
+    def _pool(self):
+        with self._trava:
+            if self._executor is None:
+                # spawn: não herda as threads e conexões do processo web
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+    
+    def gerar(self, senha):
+        return self._executar(_gerar, senha, self.metodo)
+    
+    def autenticar(self, senha_hash, senha):
+        """(senha confere, novo hash ou None); `senha_hash` None verifica o hash fictício"""
+        if senha_hash is None:
+            self._executar(_autenticar, self._referencia(), senha, self.metodo, self.prefixo)
+            return False, None
+        return self._executar(_autenticar, senha_hash, senha, self.metodo, self.prefixo)
+    
+    def verificar(self, senha_hash, senha):
+        return self.autenticar(senha_hash, senha)[0]
+    
+    def precisa_atualizar(self, senha_hash):
+        return _prefixo(senha_hash) != self.prefixo
+    
+    def encerrar(self):
+        with self._trava:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def metricas(self):
+        return {'em_uso': self.em_uso, 'recusadas': self.recusadas}
@@ -0,0 +1,80 @@
+// Atualização ao vivo da listagem e do dashboard: recebe as alterações de
+// chamados e contadores de /eventos (server-sent events) e as aplica na
+// página, sem recarregar. Linhas marcadas com data-chamado-id, células com
+// data-campo e contadores com data-contador.
+(function () {
+    var script = document.currentScript;
+    if (!window.EventSource || !script) {
+        return;
+    }
+
+    var STATUS = {
+        aberto: ['bg-warning', 'Aberto'],
+        em_andamento: ['bg-info', 'Em Andamento'],
+        resolvido: ['bg-success', 'Resolvido']
+    };
+    var PRIORIDADES = {
+        baixa: ['bg-success', 'Baixa'],
+        media: ['bg-info', 'Média'],
+        alta: ['bg-warning', 'Alta'],
+        urgente: ['bg-danger', 'Urgente']
+    };
+
+    function badge(mapa, valor, padrao) {
+        var item = mapa[valor] || padrao || ['bg-secondary', valor];
+        return $('<span class="badge"></span>').addClass(item[0]).text(item[1]);
+    }
+
+    function avisar(texto) {
+        $('#aviso-eventos').removeClass('d-none').find('.texto').text(texto);
+    }
+
+    var novos = 0;
+
+    function atualizarChamado(dados) {
+        var chamado = dados.chamado;
+        var linha = $('tr[data-chamado-id="' + chamado.id + '"]');
+        if (!linha.length) {
+            if (dados.acao === 'criado') {
+                novos += 1;
+                avisar(novos + ' chamado(s) novo(s).');
+            }
+            return;
+        }
+        var titulo = linha.find('[data-campo="titulo"]');
+        var limite = titulo.data('limite');
+        titulo.text(chamado.titulo.length > limite ? chamado.titulo.slice(0, limite) + '...' : chamado.titulo);
+        linha.find('[data-campo="status"]').empty().append(badge(STATUS, chamado.status));
+        linha.find('[data-campo="prioridade"]').empty().append(badge(PRIORIDADES, chamado.prioridade, PRIORIDADES.urgente));
+        linha.find('[data-campo="tecnico"]').text(chamado.tecnico || 'Não atribuído');
+    }
+
+    function somar(nome, delta) {
+        if (!delta) {
+            return;
+        }
+        $('[data-contador="' + nome + '"]').each(function () {
+            $(this).text(parseInt($(this).text(), 10) + delta);
+        });
+    }
+
+    var fonte = new EventSource(script.dataset.url);
+
+    fonte.addEventListener('chamado', function (evento) {
+        atualizarChamado(JSON.parse(evento.data));
+    });
+
+    fonte.addEventListener('contadores', function (evento) {
+        var dados = JSON.parse(evento.data);
+        somar('total', dados.total);
+        somar('meus', dados.meus);
+        $.each(dados.por_status, somar);
+    });
+
+    // Mensagens perdidas (conexão lenta ou reconexão tardia): a página pode
+    // estar desatualizada e deixa de receber alterações
+    fonte.addEventListener('recarregar', function () {
+        fonte.close();
+        avisar('Há alterações que não puderam ser aplicadas.');
+    });
+})();
@@ -0,0 +1,206 @@
+"""Fixtures dos testes: aplicação sobre um SQLite temporário e servidor SMTP local"""
+import socketserver
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from comandos import inicializar_banco
+from models import db, Usuario, Chamado, HistoricoChamado
+from extensoes import (cache_http, cache_usuarios, contadores, fragmentos, analise, senhas,
+                       disponibilidade_email)
+
+CONFIG_TESTES = {
+    'TESTING': True,
+    'WTF_CSRF_ENABLED': False,
+    'EMAIL_WORKER_INTERNO': False,
+    # A fila de escrita é uma thread por processo presa ao primeiro app
+    'SQLITE_FILA_ESCRITA': False,
+    'SENHA_PROCESSOS': 0,
+    'SENHA_METODO': 'pbkdf2:sha256:1000',
+    'MAIL_SERVER': '127.0.0.1',
+    'MAIL_USE_TLS': False,
+    'MAIL_USERNAME': None,
+    'MAIL_PASSWORD': None,
+    'MAIL_DEFAULT_SENDER': 'chamados@teste.local',
+}
+
+
+def _limpar_extensoes():
+    # As extensões são globais (extensoes.py): nada de um banco vaza para o próximo
+    for cache in (cache_http.cache, cache_usuarios.cache, contadores.cache, analise.cache):
+        if cache is not None:
+            cache.limpar()
+    fragmentos.limpar()
+    disponibilidade_email._filtro = None
+
+
+@pytest.fixture
+def criar_app(tmp_path):
+    """Fábrica: `criar_app(**config)` cria a aplicação com banco novo e o admin inicial"""
+    apps = []
+    
+    def criar(**config):
+        aplicacao = create_app({**CONFIG_TESTES,
+                                'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / f"chamados{len(apps)}.db"}',
+                                **config})
+        with aplicacao.app_context():
+            inicializar_banco()
+        apps.append(aplicacao)
+        return aplicacao
+    
+    yield criar
+    for aplicacao in apps:
+        with aplicacao.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+    senhas.encerrar()
+    _limpar_extensoes()
+
+
+@pytest.fixture
+def app(criar_app):
+    return criar_app()
+
+
+@pytest.fixture
+def limpar_caches():
+    """Esvazia os caches das extensões (a próxima requisição parte do zero)"""
+    return _limpar_extensoes
+
+
+SENHA_TESTES = 'senha123'
+STATUS = ('aberto', 'em_andamento', 'resolvido', 'fechado')
+PRIORIDADES = ('baixa', 'media', 'alta', 'urgente')
+
+
+@pytest.fixture
+def semear():
+    """`semear(chamados, usuarios=3, tecnicos=2)`: usuários (senha SENHA_TESTES) e
+    chamados com técnico, comentários e histórico; retorna {'usuarios': [ids], 'tecnicos': [ids]}
+    """
+    def semear(chamados, usuarios=3, tecnicos=2):
+        senha_hash = generate_password_hash(SENHA_TESTES, method='pbkdf2:sha256:1000')
+        inicio = db.session.query(Usuario).count()
+        novos = [Usuario(nome=f'Usuário {inicio + i}', email=f'usuario{inicio + i}@teste.local',
+                         senha_hash=senha_hash, is_tecnico=i < tecnicos, ativo=True)
+                 for i in range(usuarios + tecnicos)]
+        db.session.add_all(novos)
+        db.session.flush()
+        ids_tecnicos = [usuario.id for usuario in novos[:tecnicos]]
+        ids_usuarios = [usuario.id for usuario in novos[tecnicos:]]
+        
+        agora = datetime.utcnow()
+        for n in range(chamados):
+            criado = agora - timedelta(hours=chamados - n)
+            status = STATUS[n % len(STATUS)]
+            chamado = Chamado(titulo=f'Chamado {n}', descricao=f'Descrição {n}', status=status,
+                              prioridade=PRIORIDADES[n % len(PRIORIDADES)],
+                              usuario_id=ids_usuarios[n % len(ids_usuarios)],
+                              tecnico_id=ids_tecnicos[n % len(ids_tecnicos)] if status != 'aberto' else None,
+                              data_criacao=criado, data_atualizacao=criado)
+            db.session.add(chamado)
+            db.session.flush()
+            db.session.add(HistoricoChamado(chamado_id=chamado.id, usuario_id=chamado.usuario_id,
+                                            acao='criacao', descricao='Chamado criado', data_acao=criado))
+            if status != 'aberto':
+                db.session.add(HistoricoChamado(
+                    chamado_id=chamado.id, usuario_id=chamado.tecnico_id, acao='atualizacao',
+                    descricao=f'Status alterado de aberto para {status}. Comentário: ok',
+                    data_acao=criado + timedelta(minutes=30)))
+        db.session.commit()
+        return {'usuarios': ids_usuarios, 'tecnicos': ids_tecnicos}
+    
+    return semear
+
+
+@pytest.fixture
+def outro_processo():
+    """`outro_processo(app, usuario_id, titulo=...)`: grava um chamado por outra conexão,
+    sem os eventos da sessão nem a memória deste processo (como outro worker); retorna o id
+    """
+    def gravar(app, usuario_id, titulo='Gravado por outro worker'):
+        with app.app_context():
+            caminho = db.engine.url.database
+        agora = datetime.utcnow().isoformat(sep=' ')
+        conexao = sqlite3.connect(caminho)
+        try:
+            with conexao:
+                cursor = conexao.execute(
+                    "INSERT INTO chamados (titulo, descricao, status, prioridade, data_criacao, "
+                    "data_atualizacao, usuario_id) VALUES (?, 'Descrição', 'aberto', 'media', ?, ?, ?)",
+                    (titulo, agora, agora, usuario_id))
+            return cursor.lastrowid
+        finally:
+            conexao.close()
+    
+    return gravar
+
+
+class _SessaoSMTP(socketserver.StreamRequestHandler):
+    """Diálogo SMTP mínimo (EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)"""
+    
+    def responder(self, linha):
+        self.wfile.write(linha.encode() + b'\r\n')
+    
+    def handle(self):
+        servidor = self.server
+        servidor.conexoes += 1
+        self.responder('220 smtp.teste ESMTP')
+        destinatarios = []
+        while True:
+            linha = self.rfile.readline().decode().strip()
+            if not linha:
+                return
+            comando = linha.split(' ', 1)[0].upper()
+            if comando in ('EHLO', 'HELO'):
+                self.responder('250 smtp.teste')
+            elif comando == 'MAIL':
+                destinatarios = []
+                self.responder('250 OK')
+            elif comando == 'RCPT':
+                endereco = linha.split(':', 1)[1].strip().strip('<>')
+                if endereco in servidor.recusados:
+                    self.responder('550 Caixa inexistente')
+                else:
+                    destinatarios.append(endereco)
+                    self.responder('250 OK')
+            elif comando == 'DATA':
+                self.responder('354 Termine com <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                servidor.mensagens.append(destinatarios)
+                self.responder('250 OK')
+            elif comando in ('RSET', 'NOOP'):
+                self.responder('250 OK')
+            elif comando == 'QUIT':
+                self.responder('221 Tchau')
+                return
+            else:
+                self.responder('502 Comando desconhecido')
+
+
+class ServidorSMTP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SessaoSMTP)
+        self.porta = self.server_address[1]
+        self.conexoes = 0
+        self.mensagens = []
+        self.recusados = set()
+
+
+@pytest.fixture
+def smtp():
+    """Servidor SMTP local: conexões recebidas, mensagens (destinatários) e endereços recusados"""
+    servidor = ServidorSMTP()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
@@ -0,0 +1,134 @@
+"""Resumos de SLA: percentis por faixa, atualização incremental, reconstrução e relatório"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from analise import contar_faixas, percentil_faixas, percentis, somar_faixas
+from extensoes import analise
+from models import db, Chamado, HistoricoChamado
+
+INICIO = datetime(2026, 1, 5, 8, 0)
+AGORA = datetime(2026, 1, 7, 0, 0)
+DIA = date(2026, 1, 5)
+
+
+def _chamado(dados, prioridade='alta', horas=None, reaberto=False):
+    """Chamado criado em INICIO e, com `horas`, resolvido `horas` depois pelo primeiro técnico"""
+    tecnico = dados['tecnicos'][0]
+    chamado = Chamado(titulo='SLA', descricao='Descrição', prioridade=prioridade,
+                      status='aberto' if horas is None or reaberto else 'resolvido',
+                      usuario_id=dados['usuarios'][0], tecnico_id=tecnico,
+                      data_criacao=INICIO, data_atualizacao=INICIO)
+    db.session.add(chamado)
+    db.session.flush()
+    db.session.add(HistoricoChamado(chamado_id=chamado.id, usuario_id=chamado.usuario_id,
+                                    acao='criacao', descricao='Chamado criado', data_acao=INICIO))
+    if horas is not None:
+        resolvido = INICIO + timedelta(hours=horas)
+        chamado.data_resolucao = chamado.data_atualizacao = resolvido
+        db.session.add(HistoricoChamado(chamado_id=chamado.id, usuario_id=tecnico, acao='atualizacao',
+                                        descricao='Status alterado de aberto para resolvido',
+                                        data_acao=resolvido))
+    if reaberto:
+        db.session.add(HistoricoChamado(chamado_id=chamado.id, usuario_id=tecnico, acao='atualizacao',
+                                        descricao='Status alterado de resolvido para aberto',
+                                        data_acao=INICIO + timedelta(hours=horas + 1)))
+    db.session.commit()
+    return chamado.id
+
+
+@pytest.fixture
+def dados(app, semear):
+    with app.app_context():
+        return semear(0)
+
+
+def test_percentil_interpola_dentro_da_faixa():
+    contagens = contar_faixas([1.5, 1.5, 30])
+    assert sum(contagens) == 3
+    assert percentil_faixas(contagens, 50) == pytest.approx(1.75)
+    assert percentil_faixas(contagens, 90) == pytest.approx(40.8)
+    assert percentil_faixas(contar_faixas([1000]), 50) == 720.0
+    assert percentil_faixas(contar_faixas([]), 50) is None
+    assert somar_faixas([contar_faixas([1.5]), contar_faixas([1.5, 30])]) == contagens
+
+
+def test_percentis_exatos_interpolam_como_numpy():
+    assert percentis([4, 1, 3, 2], [50, 90, 100]) == pytest.approx([2.5, 3.7, 4])
+    assert percentis([], [50]) == [None]
+
+
+def test_atualizacao_incremental_igual_a_reconstrucao(app, dados):
+    with app.app_context():
+        for horas in (1.5, 1.5, 30):
+            _chamado(dados, horas=horas)
+        _chamado(dados, prioridade='baixa', horas=2, reaberto=True)
+        assert analise.atualizar(AGORA) == 9
+        
+        _chamado(dados, horas=1.5)
+        assert analise.atualizar(AGORA) == 2
+        assert analise.atualizar(AGORA) == 0
+        incremental = {agrupar: analise.relatorio(DIA, DIA + timedelta(days=1), agrupar)
+                       for agrupar in ('prioridade', 'tecnico', 'transicao')}
+        
+        assert analise.reconstruir(dias_backlog=0, agora=AGORA) == 11
+        for agrupar, resultado in incremental.items():
+            assert analise.relatorio(DIA, DIA + timedelta(days=1), agrupar) == resultado
+    
+    por_prioridade = incremental['prioridade']
+    assert [item['prioridade'] for item in por_prioridade] == ['baixa', 'alta']
+    baixa, alta = por_prioridade
+    assert (baixa['criados'], baixa['resolvidos'], baixa['reabertos']) == (1, 1, 1)
+    assert (alta['criados'], alta['resolvidos'], alta['reabertos']) == (4, 4, 0)
+    assert alta['horas_media'] == pytest.approx((1.5 * 3 + 30) / 4)
+    assert alta['horas_p50'] == pytest.approx(percentil_faixas(contar_faixas([1.5, 1.5, 1.5, 30]), 50))
+    assert incremental['tecnico'][0]['resolvidos'] == 5
+    assert [(item['de'], item['para'], item['quantidade']) for item in incremental['transicao']] == [
+        ('aberto', 'resolvido', 5), ('resolvido', 'aberto', 1)]
+
+
+def test_reconstrucao_refaz_o_backlog_dos_dias_anteriores(app, dados):
+    with app.app_context():
+        _chamado(dados)
+        _chamado(dados, horas=1.5)
+        _chamado(dados, horas=30)
+        analise.reconstruir(dias_backlog=2, agora=AGORA)
+        serie = analise.serie_backlog(DIA, AGORA.date())
+    
+    assert [(dia['dia'], dia['abertos']) for dia in serie] == [
+        ('2026-01-05', 2), ('2026-01-06', 1), ('2026-01-07', 1)]
+    assert serie[0]['idade_p90_horas'] == pytest.approx(16)
+    assert serie[1]['idade_p90_horas'] == pytest.approx(40)
+
+
+def test_comandos_atualizar_e_reconstruir(app, dados):
+    with app.app_context():
+        _chamado(dados, horas=1.5)
+    executor = app.test_cli_runner()
+    resultado = executor.invoke(args=['atualizar-analise'])
+    assert '(2 registros de histórico)' in resultado.output
+    assert '(0 registros de histórico)' in executor.invoke(args=['atualizar-analise']).output
+    resultado = executor.invoke(args=['reconstruir-analise', '--dias-backlog', '0'])
+    assert '(2 registros de histórico, backlog de 0 dias)' in resultado.output
+
+
+def test_relatorio_sla_por_api(app, dados):
+    with app.app_context():
+        _chamado(dados, horas=1.5)
+        analise.atualizar(AGORA)
+    
+    def cliente(usuario_id):
+        cliente = app.test_client()
+        with cliente.session_transaction() as sessao:
+            sessao['_user_id'] = str(usuario_id)
+            sessao['_fresh'] = True
+        return cliente
+    
+    resposta = cliente(1).get('/api/relatorios/sla?de=2026-01-05&ate=2026-01-06')
+    assert resposta.status_code == 200
+    grupos = resposta.get_json()['grupos']
+    assert [(grupo['prioridade'], grupo['resolvidos']) for grupo in grupos] == [('alta', 1)]
+    assert grupos[0]['horas_p50'] == pytest.approx(1.5)
+    assert cliente(1).get('/api/relatorios/sla?agrupar=status').status_code == 400
+    assert cliente(1).get('/api/relatorios/sla?de=2026-01-06&ate=2026-01-05').status_code == 400
+    assert cliente(dados['usuarios'][0]).get('/api/relatorios/sla').status_code == 403
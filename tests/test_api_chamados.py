@@ -0,0 +1,62 @@
+"""/api/chamados: NDJSON, projeção de campos, sincronização incremental e escopo do usuário"""
+import json
+import time
+
+import pytest
+
+from models import db, Chamado
+
+
+@pytest.fixture
+def app_com_dados(app, semear):
+    with app.app_context():
+        app.dados = semear(12)
+    return app
+
+
+def _cliente(app, usuario_id=1):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return cliente
+
+
+def test_ndjson_com_campos_selecionados(app_com_dados):
+    resposta = _cliente(app_com_dados).get('/api/chamados?formato=ndjson&fields=id,status,tecnico')
+    assert resposta.mimetype == 'application/x-ndjson'
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert len(linhas) == 12
+    assert all(set(linha) == {'id', 'status', 'tecnico'} for linha in linhas)
+    assert {linha['tecnico'] is None for linha in linhas if linha['status'] == 'aberto'} == {True}
+
+
+def test_campo_desconhecido_responde_400(app_com_dados):
+    resposta = _cliente(app_com_dados).get('/api/chamados?fields=id,senha_hash')
+    assert resposta.status_code == 400
+    assert 'senha_hash' in resposta.get_json()['error']
+
+
+def test_since_traz_so_o_que_mudou_desde_a_ultima_sincronizacao(app_com_dados):
+    cliente = _cliente(app_com_dados)
+    primeira = cliente.get('/api/chamados?fields=id')
+    assert len(primeira.get_json()) == 12
+    sincronizado_em = primeira.headers['X-Sincronizado-Em']
+    
+    time.sleep(0.01)
+    with app_com_dados.app_context():
+        chamado = db.session.get(Chamado, primeira.get_json()[3]['id'])
+        chamado.prioridade = 'urgente'
+        db.session.commit()
+        alterado = chamado.id
+    
+    segunda = cliente.get(f'/api/chamados?fields=id,prioridade&since={sincronizado_em}')
+    assert segunda.get_json() == [{'id': alterado, 'prioridade': 'urgente'}]
+
+
+def test_solicitante_so_recebe_os_proprios_chamados(app_com_dados):
+    solicitante = app_com_dados.dados['usuarios'][0]
+    resposta = _cliente(app_com_dados, solicitante).get('/api/chamados?fields=id,criador')
+    with app_com_dados.app_context():
+        proprios = {chamado.id for chamado in Chamado.query.filter_by(usuario_id=solicitante)}
+    assert {linha['id'] for linha in resposta.get_json()} == proprios
@@ -0,0 +1,64 @@
+"""create_app: nada de banco ou threads ao criar; init-db e worker de emails sob demanda"""
+import threading
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.pool import Pool
+
+from app import create_app
+from extensoes import entregador_emails
+from models import db, Usuario
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {'TESTING': True, 'SENHA_PROCESSOS': 0, 'SENHA_METODO': 'pbkdf2:sha256:1000',
+            'SQLITE_FILA_ESCRITA': False, 'EMAIL_WORKER_INTERNO': False,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "chamados.db"}'}
+
+
+@pytest.fixture
+def conexoes():
+    abertas = []
+    
+    def registrar(*args):
+        abertas.append(args)
+    
+    event.listen(Pool, 'connect', registrar)
+    yield abertas
+    event.remove(Pool, 'connect', registrar)
+
+
+def test_criar_app_nao_abre_conexao_nem_inicia_threads(config, conexoes):
+    threads = set(threading.enumerate())
+    create_app(config)
+    assert conexoes == []
+    assert set(threading.enumerate()) == threads
+
+
+def test_init_db_cria_o_esquema_e_o_admin_uma_vez(config):
+    app = create_app(config)
+    cli = app.test_cli_runner()
+    primeira = cli.invoke(args=['init-db'])
+    assert 'Usuário admin criado' in primeira.output
+    segunda = cli.invoke(args=['init-db'])
+    assert segunda.exit_code == 0 and 'admin criado' not in segunda.output
+    with app.app_context():
+        assert {'usuarios', 'chamados', 'historico_chamados'} <= set(inspect(db.engine).get_table_names())
+        assert Usuario.query.filter_by(is_admin=True).count() == 1
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_worker_de_emails_nasce_na_primeira_requisicao(config):
+    app = create_app({**config, 'EMAIL_WORKER_INTERNO': True, 'EMAIL_FILA_INTERVALO': 60})
+    with app.app_context():
+        db.create_all()
+    assert 'entregador-emails' not in {thread.name for thread in threading.enumerate()}
+    try:
+        app.test_client().get('/login')
+        assert 'entregador-emails' in {thread.name for thread in threading.enumerate()}
+    finally:
+        entregador_emails.parar()
+        with app.app_context():
+            db.engine.dispose()
@@ -0,0 +1,42 @@
+"""Benchmark: percentis, comparação com a execução base e cenários pelo cliente de teste"""
+import json
+
+from werkzeug.security import generate_password_hash
+
+from benchmark import EMAIL_ADMIN, SENHA_BENCHMARK, comparar, executar_cliente, percentil, resumir
+from models import db, Usuario
+
+
+def test_percentil_pelo_posto_mais_proximo():
+    valores = [v / 1000 for v in range(100, 0, -1)]
+    assert percentil(valores, 50) == 0.05
+    assert percentil(valores, 95) == 0.095
+    assert percentil(valores, 99) == 0.099
+    assert percentil([0.2], 99) == 0.2
+    assert percentil([], 50) is None
+
+
+def test_comparar_aponta_so_o_p95_acima_da_tolerancia(tmp_path):
+    base = tmp_path / 'base.json'
+    base.write_text(json.dumps({'cenarios': {'dashboard': resumir([0.010] * 20, 0, 1),
+                                             'listar_chamados': resumir([0.010] * 20, 0, 1)}}))
+    atual = {'dashboard': resumir([0.013] * 20, 0, 1),
+             'listar_chamados': resumir([0.011] * 20, 0, 1),
+             'cenario_novo': resumir([0.5] * 20, 0, 1)}
+    regressoes = comparar(atual, base, tolerancia=1.2)
+    assert [(nome, round(razao, 2)) for nome, _, _, razao in regressoes] == [('dashboard', 1.3)]
+
+
+def test_cenarios_pelo_cliente_de_teste(app, semear):
+    with app.app_context():
+        semear(5)
+        admin = Usuario.query.filter_by(email=EMAIL_ADMIN).one()
+        admin.senha_hash = generate_password_hash(SENHA_BENCHMARK, method='pbkdf2:sha256:1000')
+        db.session.commit()
+    cenarios = ['dashboard', 'listar_chamados', 'detalhe_chamado', 'novo_chamado', 'api_chamados']
+    resultados = executar_cliente(app, requisicoes=3, aquecimento=1, cenarios=cenarios)
+    assert list(resultados) == cenarios
+    for resultado in resultados.values():
+        assert resultado['requisicoes'] == 3
+        assert resultado['erros'] == 0
+        assert resultado['p50_ms'] <= resultado['p95_ms'] <= resultado['p99_ms']
@@ -0,0 +1,64 @@
+"""Busca textual: FTS5, índice em memória e chamados gravados por outros workers"""
+import pytest
+
+from busca import IndiceFTS5, IndiceMemoria
+from extensoes import busca
+from models import db, Chamado, HistoricoChamado
+
+
+@pytest.fixture
+def app_com_dados(app, semear):
+    with app.app_context():
+        dados = semear(8)
+        solicitante = dados['usuarios'][0]
+        titulo = Chamado(titulo='Impressora sem toner', descricao='Não imprime', usuario_id=solicitante)
+        comentario = Chamado(titulo='Monitor piscando', descricao='Tela apaga', usuario_id=solicitante,
+                             localizacao='3º andar')
+        db.session.add_all([titulo, comentario])
+        db.session.flush()
+        db.session.add(HistoricoChamado(chamado_id=comentario.id, usuario_id=solicitante,
+                                        acao='atualizacao', descricao='Comentário: trocar a impressora'))
+        db.session.commit()
+        app.ids = {'titulo': titulo.id, 'comentario': comentario.id}
+        app.solicitante = solicitante
+    return app
+
+
+@pytest.fixture
+def indice_memoria(monkeypatch):
+    """Índice em memória no lugar do FTS5 (SQLite compilado sem FTS5), relido a cada busca"""
+    indice = IndiceMemoria(intervalo=0)
+    monkeypatch.setattr(busca, '_indice', indice)
+    return indice
+
+
+def _resultado(app, termos):
+    with app.app_context():
+        return [chamado.id for chamado in busca.paginar(Chamado.query, termos).items]
+
+
+def test_fts5_ranqueia_titulo_acima_do_historico(app_com_dados):
+    with app_com_dados.app_context():
+        assert isinstance(busca.indice, IndiceFTS5)
+    ids = app_com_dados.ids
+    assert _resultado(app_com_dados, 'impress') == [ids['titulo'], ids['comentario']]
+    assert _resultado(app_com_dados, 'IMPRESSORA trocar') == [ids['comentario']]
+    assert _resultado(app_com_dados, 'nao imprime') == [ids['titulo']]
+
+
+def test_memoria_da_o_mesmo_resultado_que_o_fts5(app_com_dados, indice_memoria):
+    ids = app_com_dados.ids
+    assert _resultado(app_com_dados, 'impress') == [ids['titulo'], ids['comentario']]
+    assert _resultado(app_com_dados, 'IMPRESSORA trocar') == [ids['comentario']]
+    assert _resultado(app_com_dados, '3º andar') == [ids['comentario']]
+
+
+def test_memoria_rele_o_que_outro_worker_gravou(app_com_dados, indice_memoria, outro_processo):
+    assert _resultado(app_com_dados, 'roteador') == []
+    novo = outro_processo(app_com_dados, app_com_dados.solicitante, titulo='Roteador travado')
+    assert _resultado(app_com_dados, 'roteador') == [novo]
+    
+    # Dentro do intervalo o índice não consulta o banco de novo
+    indice_memoria.intervalo = 3600
+    outro_processo(app_com_dados, app_com_dados.solicitante, titulo='Roteador sem sinal')
+    assert _resultado(app_com_dados, 'roteador') == [novo]
@@ -0,0 +1,55 @@
+"""Respostas condicionais (ETag e 304) da listagem e do detalhe"""
+import pytest
+
+from models import Chamado
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente
+
+
+@pytest.fixture
+def app_um_processo(criar_app, semear):
+    app = criar_app(PROCESSO_UNICO=True)
+    with app.app_context():
+        semear(5)
+    return app
+
+
+def test_revalidacao_sem_alteracao_responde_304(app_um_processo):
+    cliente = _cliente(app_um_processo)
+    resposta = cliente.get('/chamados')
+    assert resposta.status_code == 200 and resposta.headers['ETag']
+    
+    revalidada = cliente.get('/chamados', headers={'If-None-Match': resposta.headers['ETag']})
+    assert revalidada.status_code == 304
+
+
+def test_cache_em_memoria_com_varios_workers_nao_envia_etag(app, semear):
+    with app.app_context():
+        semear(5)
+    resposta = _cliente(app).get('/chamados')
+    assert resposta.status_code == 200
+    assert 'ETag' not in resposta.headers and 'Last-Modified' not in resposta.headers
+
+
+def test_pagina_com_mensagem_flash_nao_envia_etag(app_um_processo):
+    with app_um_processo.app_context():
+        chamado_id = Chamado.query.first().id
+    cliente = _cliente(app_um_processo)
+    anterior = cliente.get(f'/chamados/{chamado_id}').headers['ETag']
+    
+    with cliente.session_transaction() as sessao:
+        sessao['_flashes'] = [('success', 'Chamado atualizado com sucesso!')]
+    com_flash = cliente.get(f'/chamados/{chamado_id}', headers={'If-None-Match': anterior})
+    assert com_flash.status_code == 200
+    assert b'Chamado atualizado com sucesso!' in com_flash.data
+    assert 'ETag' not in com_flash.headers and 'Last-Modified' not in com_flash.headers
+    assert com_flash.cache_control.no_cache
+    
+    # Mensagem exibida: a próxima revalidação volta a valer
+    assert cliente.get(f'/chamados/{chamado_id}', headers={'If-None-Match': anterior}).status_code == 304
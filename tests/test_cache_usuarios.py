@@ -0,0 +1,36 @@
+"""Cache do usuário logado: desativação feita por outro worker vale na hora"""
+from sqlalchemy import update
+
+from extensoes import cache_usuarios
+from models import db, Usuario
+
+
+def _desativar_em_outro_worker(usuario_id):
+    # Direto no banco, sem `invalidar`: o cache deste processo não fica sabendo
+    db.session.execute(update(Usuario).where(Usuario.id == usuario_id).values(ativo=False))
+    db.session.commit()
+
+
+def test_cache_em_memoria_confere_ativo(app):
+    with app.app_context():
+        assert cache_usuarios.carregar(1).ativo
+        db.session.remove()
+        _desativar_em_outro_worker(1)
+        acertos = cache_usuarios.acertos
+        
+        assert cache_usuarios.carregar(1) is None
+        assert cache_usuarios.acertos == acertos + 1
+
+
+def test_processo_unico_confia_no_cache(criar_app):
+    app = criar_app(PROCESSO_UNICO=True)
+    with app.app_context():
+        assert cache_usuarios.carregar(1).ativo
+        db.session.remove()
+        _desativar_em_outro_worker(1)
+        db.session.remove()
+        
+        # Só `invalidar` (chamado pelas rotas deste processo) derruba a sessão
+        assert cache_usuarios.carregar(1) is not None
+        cache_usuarios.invalidar(1)
+        assert cache_usuarios.carregar(1) is None
@@ -0,0 +1,58 @@
+"""Orçamento de instruções SQL por página e ausência de N+1 sobre um banco semeado"""
+import pytest
+
+from comandos import ORCAMENTO_CONSULTAS
+from contador_sql import consultas_da_requisicao, verificar_orcamentos
+from models import Usuario, Chamado
+
+
+@pytest.fixture
+def app_com_dados(app, semear):
+    with app.app_context():
+        app.dados = semear(60, usuarios=4, tecnicos=3)
+    return app
+
+
+def _cliente(app, usuario_id):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return cliente
+
+
+def _admin_id(app):
+    with app.app_context():
+        return Usuario.query.filter_by(is_admin=True).one().id
+
+
+def test_paginas_dentro_do_orcamento(app_com_dados):
+    orcamentos = dict(ORCAMENTO_CONSULTAS)
+    with app_com_dados.app_context():
+        ultimo = Chamado.query.order_by(Chamado.id.desc()).first()
+    orcamentos[f'/chamados/{ultimo.id}'] = 5
+    assert verificar_orcamentos(app_com_dados, _admin_id(app_com_dados), orcamentos) == {}
+
+
+def test_paginas_do_solicitante_dentro_do_orcamento(app_com_dados):
+    solicitante = app_com_dados.dados['usuarios'][0]
+    paginas = {url: maximo for url, maximo in ORCAMENTO_CONSULTAS.items() if not url.startswith('/usuarios')}
+    assert verificar_orcamentos(app_com_dados, solicitante, paginas) == {}
+
+
+@pytest.mark.parametrize('url', ['/chamados', '/api/chamados?limite=100', '/dashboard'])
+def test_instrucoes_nao_crescem_com_as_linhas(app, semear, limpar_caches, url):
+    """N+1: a mesma página com 5 e com 50 chamados executa as mesmas instruções"""
+    admin_id = _admin_id(app)
+    with app.app_context():
+        semear(5)
+    limpar_caches()
+    resposta, poucos = consultas_da_requisicao(_cliente(app, admin_id), url)
+    assert resposta.status_code == 200
+    
+    with app.app_context():
+        semear(45)
+    limpar_caches()
+    resposta, muitos = consultas_da_requisicao(_cliente(app, admin_id), url)
+    assert resposta.status_code == 200
+    assert muitos.total == poucos.total
@@ -0,0 +1,66 @@
+"""Contadores do dashboard: consulta agregada nas falhas e incrementos após o commit"""
+import pytest
+
+from contador_sql import ContadorConsultas
+from estatisticas import STATUS_CHAMADO
+from extensoes import contadores
+from models import db, Chamado
+
+
+@pytest.fixture
+def app_um_processo(criar_app, semear):
+    app = criar_app(PROCESSO_UNICO=True)
+    with app.app_context():
+        app.dados = semear(12)
+    return app
+
+
+def _contagens(**filtros):
+    return {status: Chamado.query.filter_by(status=status, **filtros).count() for status in STATUS_CHAMADO}
+
+
+def test_falha_recalcula_geral_e_solicitante_em_uma_consulta(app_um_processo):
+    solicitante = app_um_processo.dados['usuarios'][0]
+    with app_um_processo.app_context():
+        with ContadorConsultas() as contador:
+            estatisticas = contadores.estatisticas(solicitante)
+        assert contador.total == 1
+        assert estatisticas['por_status'] == _contagens()
+        assert estatisticas['usuario']['por_status'] == _contagens(usuario_id=solicitante)
+        assert estatisticas['total'] == 12
+        
+        with ContadorConsultas() as contador:
+            assert contadores.estatisticas(solicitante) == estatisticas
+        assert contador.total == 0
+
+
+def test_commit_incrementa_os_contadores_em_cache(app_um_processo):
+    solicitante = app_um_processo.dados['usuarios'][0]
+    with app_um_processo.app_context():
+        contadores.estatisticas(solicitante)
+        db.session.add(Chamado(titulo='Novo', descricao='x', usuario_id=solicitante))
+        chamado = Chamado.query.filter_by(usuario_id=solicitante, status='aberto').first()
+        chamado.status = 'resolvido'
+        db.session.commit()
+        
+        with ContadorConsultas() as contador:
+            estatisticas = contadores.estatisticas(solicitante)
+        assert contador.total == 0
+        assert estatisticas['por_status'] == _contagens()
+        assert estatisticas['usuario']['por_status'] == _contagens(usuario_id=solicitante)
+
+
+def test_cache_em_memoria_com_varios_workers_le_do_banco(app, semear, outro_processo):
+    with app.app_context():
+        solicitante = semear(4)['usuarios'][0]
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(solicitante)
+        sessao['_fresh'] = True
+    antes = cliente.get('/api/estatisticas').get_json()
+    
+    outro_processo(app, solicitante)
+    depois = cliente.get('/api/estatisticas').get_json()
+    assert depois['total'] == antes['total'] + 1
+    assert depois['usuario']['por_status']['aberto'] == antes['usuario']['por_status']['aberto'] + 1
+    assert contadores.metricas()['compartilhado'] is False
@@ -0,0 +1,77 @@
+"""Desativação de técnico: fila liberada ou redistribuída pela carga em uma transação"""
+import pytest
+
+from estatisticas import STATUS_CHAMADO
+from extensoes import contadores
+from lote_chamados import distribuir_por_carga
+from models import db, Usuario, Chamado, HistoricoChamado
+
+
+@pytest.fixture
+def app_com_fila(criar_app, semear):
+    app = criar_app(PROCESSO_UNICO=True)
+    with app.app_context():
+        app.dados = semear(18, usuarios=2, tecnicos=3)
+        tecnico = app.dados['tecnicos'][0]
+        # Um chamado aberto já atribuído, além dos em andamento e resolvidos
+        db.session.add(Chamado(titulo='Aberto atribuído', descricao='x', tecnico_id=tecnico,
+                               usuario_id=app.dados['usuarios'][0]))
+        db.session.commit()
+        app.fila = {c.id: c.status for c in Chamado.query.filter(Chamado.tecnico_id == tecnico,
+                                                                  Chamado.status.in_(['aberto', 'em_andamento']))}
+    return app
+
+
+def _desativar(app, usuario_id, **dados):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente.post(f'/usuarios/{usuario_id}/soft-delete', data=dados)
+
+
+def test_distribuir_entrega_ao_menos_carregado():
+    distribuicao = distribuir_por_carga([1, 2, 3, 4, 5], {10: 3, 20: 0, 30: 1})
+    assert distribuicao == {20: [1, 2, 4], 30: [3, 5]}
+
+
+def test_fila_liberada_volta_para_aberto_sem_tecnico(app_com_fila):
+    tecnico = app_com_fila.dados['tecnicos'][0]
+    with app_com_fila.app_context():
+        contadores.estatisticas(1)
+    
+    resposta = _desativar(app_com_fila, tecnico)
+    assert resposta.get_json()['liberados'] == len(app_com_fila.fila) > 1
+    
+    with app_com_fila.app_context():
+        usuario = db.session.get(Usuario, tecnico)
+        assert not usuario.ativo and usuario.email.startswith('excluido_')
+        for id in app_com_fila.fila:
+            chamado = db.session.get(Chamado, id)
+            assert (chamado.status, chamado.tecnico_id) == ('aberto', None)
+            ultimo = HistoricoChamado.query.filter_by(chamado_id=id)\
+                                           .order_by(HistoricoChamado.id.desc()).first()
+            assert 'Técnico removido automaticamente' in ultimo.descricao
+            assert ('Status alterado de em_andamento para aberto' in ultimo.descricao) == \
+                (app_com_fila.fila[id] == 'em_andamento')
+        # Resolvidos e fechados continuam com o técnico
+        assert Chamado.query.filter_by(tecnico_id=tecnico).count() > 0
+        esperado = {status: Chamado.query.filter_by(status=status).count() for status in STATUS_CHAMADO}
+        assert contadores.estatisticas(1)['por_status'] == esperado
+
+
+def test_fila_redistribuida_entre_os_tecnicos_ativos(app_com_fila):
+    tecnico, *outros = app_com_fila.dados['tecnicos']
+    resposta = _desativar(app_com_fila, tecnico, redistribuir='1')
+    redistribuidos = {int(id): total for id, total in resposta.get_json()['redistribuidos'].items()}
+    assert set(redistribuidos) <= set(outros)
+    assert sum(redistribuidos.values()) == len(app_com_fila.fila)
+    
+    with app_com_fila.app_context():
+        for id in app_com_fila.fila:
+            chamado = db.session.get(Chamado, id)
+            assert chamado.tecnico_id in outros
+        cargas = [Chamado.query.filter(Chamado.tecnico_id == outro,
+                                       Chamado.status.in_(['aberto', 'em_andamento'])).count()
+                  for outro in outros]
+        assert max(cargas) - min(cargas) <= 1
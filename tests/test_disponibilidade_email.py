@@ -0,0 +1,84 @@
+"""Filtro de emails cadastrados: alterações de outros workers e carga na inicialização"""
+import os
+import runpy
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from sqlalchemy import insert, update
+
+from extensoes import disponibilidade_email
+from models import db, Usuario
+
+
+def _outro_worker(comando):
+    # Pelo Core, sem os eventos de sessão deste processo
+    db.session.execute(comando)
+    db.session.commit()
+
+
+def _vencer_intervalo():
+    disponibilidade_email._atualizado_em = 0
+
+
+def test_troca_de_email_marca_o_instante(app):
+    with app.app_context():
+        usuario = db.session.get(Usuario, 1)
+        assert usuario.email_alterado_em is None
+        usuario.nome = 'Outro nome'
+        db.session.commit()
+        assert usuario.email_alterado_em is None
+        
+        usuario.email = 'novo@teste.local'
+        db.session.commit()
+        assert usuario.email_alterado_em is not None
+
+
+def test_le_usuarios_novos_e_emails_trocados_em_outros_workers(app, semear):
+    with app.app_context():
+        ids = semear(0, usuarios=2, tecnicos=0)['usuarios']
+        assert not disponibilidade_email.cadastrado('perfil@teste.local')
+        
+        # Ainda no intervalo: o filtro deste worker não sabe das alterações
+        _outro_worker(update(Usuario).where(Usuario.id == ids[0])
+                      .values(email='perfil@teste.local', email_alterado_em=db.func.current_timestamp()))
+        _outro_worker(insert(Usuario).values(nome='Novo', email='novo@teste.local', senha_hash='x'))
+        assert not disponibilidade_email.cadastrado('perfil@teste.local')
+        
+        _vencer_intervalo()
+        assert disponibilidade_email.cadastrado('perfil@teste.local')
+        assert disponibilidade_email.cadastrado('novo@teste.local')
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_aquecer_no_boot(app):
+    disponibilidade_email._filtro = None
+    # Gancho do gunicorn ao iniciar cada worker
+    ganchos = runpy.run_path(os.path.join(RAIZ, 'gunicorn.conf.py'))
+    ganchos['post_worker_init'](SimpleNamespace(wsgi=app))
+    assert disponibilidade_email._filtro is not None
+    with app.app_context():
+        assert disponibilidade_email.cadastrado('admin@empresa.com')
+
+
+def test_aquecer_no_boot_sem_tabelas(app):
+    # Deploy novo: o wsgi.py carrega antes do init-db
+    with app.app_context():
+        db.drop_all()
+    disponibilidade_email._filtro = None
+    disponibilidade_email.aquecer_no_boot(app)
+    assert disponibilidade_email._filtro is None
+
+
+def test_importar_o_wsgi_nao_abre_conexao(tmp_path):
+    # --preload importa o wsgi.py no master: nenhuma conexão pode ser herdada pelos workers
+    codigo = ("from sqlalchemy import event; from sqlalchemy.pool import Pool; conexoes = []; "
+              "event.listen(Pool, 'connect', lambda *a: conexoes.append(a)); "
+              "import wsgi; assert not conexoes, conexoes")
+    ambiente = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path / "chamados.db"}',
+                    EMAIL_WORKER_INTERNO='False')
+    processo = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=ambiente,
+                              capture_output=True, text=True)
+    assert processo.returncode == 0, processo.stderr
@@ -0,0 +1,26 @@
+"""Estáticos: o build não depende da CDN e o uso da CDN aparece no log"""
+import logging
+
+import comandos
+from estaticos import BIBLIOTECAS
+
+
+def test_build_falha_sem_as_bibliotecas(app, monkeypatch, tmp_path):
+    app.static_folder = str(tmp_path)
+    # Sem acesso externo
+    monkeypatch.setattr(comandos, 'baixar_bibliotecas',
+                        lambda pasta, forcar=False: ([], {caminho: OSError('sem rede') for caminho in BIBLIOTECAS}))
+    resultado = app.test_cli_runner().invoke(args=['construir-estaticos'])
+    assert resultado.exit_code == 1
+    assert '[FALHA] static/vendor/jquery/jquery.min.js' in resultado.output
+    assert not (tmp_path / 'dist').exists()
+
+
+def test_aviso_ao_iniciar_com_bibliotecas_na_cdn(criar_app, caplog):
+    with caplog.at_level(logging.WARNING, logger='chamados.estaticos'):
+        app = criar_app(ESTATICOS_COMPILADOS=False)
+    estaticos = app.extensions['estaticos']
+    assert estaticos.cdn
+    assert any('CDN' in registro.getMessage() for registro in caplog.records)
+    with app.test_request_context():
+        assert estaticos.static_url('vendor/jquery/jquery.min.js') == BIBLIOTECAS['vendor/jquery/jquery.min.js']
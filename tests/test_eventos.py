@@ -0,0 +1,45 @@
+"""Atualização ao vivo: só ligada com broker compartilhado e servidor de threads"""
+import pytest
+
+THREADS = {'wsgi.multithread': True}
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente
+
+
+def _inclui_script(cliente, url, **kwargs):
+    return b'eventos.js' in cliente.get(url, **kwargs).data
+
+
+def test_desligada_por_padrao(app):
+    cliente = _cliente(app)
+    assert not _inclui_script(cliente, '/dashboard', environ_overrides=THREADS)
+    assert cliente.get('/eventos', environ_overrides=THREADS).status_code == 404
+
+
+def test_broker_em_memoria_com_varios_workers_nao_liga(criar_app):
+    cliente = _cliente(criar_app(EVENTOS_ATIVO=True))
+    assert not _inclui_script(cliente, '/chamados', environ_overrides=THREADS)
+    assert cliente.get('/eventos', environ_overrides=THREADS).status_code == 404
+
+
+@pytest.mark.parametrize('url', ['/dashboard', '/chamados'])
+def test_ligada_so_em_servidor_de_threads(criar_app, url):
+    cliente = _cliente(criar_app(EVENTOS_ATIVO=True, PROCESSO_UNICO=True))
+    assert _inclui_script(cliente, url, environ_overrides=THREADS)
+    # Worker síncrono (wsgi.multithread falso): cada aba prenderia o processo
+    assert not _inclui_script(cliente, url)
+
+
+def test_fluxo_de_eventos(criar_app):
+    cliente = _cliente(criar_app(EVENTOS_ATIVO=True, PROCESSO_UNICO=True, EVENTOS_DURACAO=0))
+    resposta = cliente.get('/eventos', environ_overrides=THREADS)
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/event-stream'
+    assert resposta.data.startswith(b'retry: ')
+    assert cliente.get('/eventos').status_code == 404
@@ -0,0 +1,101 @@
+"""Exportação em CSV e XLSX: filtros, histórico, lotes e conteúdo que planilhas aceitam"""
+import csv
+import io
+import zipfile
+from datetime import datetime
+from xml.etree import ElementTree
+
+import pytest
+
+from models import db, Chamado, HistoricoChamado
+
+FORMATO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+@pytest.fixture
+def app_com_dados(criar_app, semear):
+    # Lotes de 2 linhas: o streaming passa por vários lotes
+    app = criar_app(EXPORTACAO_LOTE=2)
+    with app.app_context():
+        app.dados = semear(6)
+        perigoso = Chamado(titulo='=HYPERLINK("http://x")', descricao='linha 1\nlinha 2; "aspas"',
+                           usuario_id=app.dados['usuarios'][0], data_criacao=datetime(2024, 9, 15, 8, 30),
+                           data_atualizacao=datetime(2024, 9, 15, 8, 30))
+        db.session.add(perigoso)
+        db.session.commit()
+        app.perigoso = perigoso.id
+        app.historico = HistoricoChamado.query.count()
+    return app
+
+
+def _cliente(app, usuario_id=1):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return cliente
+
+
+def _csv(resposta):
+    texto = resposta.get_data().decode('utf-8')
+    assert texto.startswith('\ufeff')
+    return list(csv.DictReader(io.StringIO(texto[1:]), delimiter=';'))
+
+
+def test_csv_com_uma_linha_por_chamado_e_celulas_seguras(app_com_dados):
+    resposta = _cliente(app_com_dados).get('/chamados/exportar?formato=csv')
+    assert resposta.mimetype == 'text/csv'
+    assert 'attachment; filename="chamados-' in resposta.headers['Content-Disposition']
+    linhas = _csv(resposta)
+    assert len(linhas) == 7
+    perigoso = next(linha for linha in linhas if linha['id'] == str(app_com_dados.perigoso))
+    assert perigoso['titulo'] == '\'=HYPERLINK("http://x")'
+    assert perigoso['descricao'] == 'linha 1\nlinha 2; "aspas"'
+    assert perigoso['data_criacao'] == '15/09/2024 08:30'
+
+
+def test_csv_com_historico_e_periodo(app_com_dados):
+    linhas = _csv(_cliente(app_com_dados).get('/chamados/exportar?historico=1'))
+    # Uma linha por entrada do histórico; o chamado sem histórico sai uma vez
+    assert len(linhas) == app_com_dados.historico + 1
+    assert {linha['historico_acao'] for linha in linhas} == {'criacao', 'atualizacao', ''}
+    
+    setembro = _csv(_cliente(app_com_dados).get('/chamados/exportar?de=2024-09-01&ate=2024-09-15'))
+    assert [linha['id'] for linha in setembro] == [str(app_com_dados.perigoso)]
+
+
+def test_data_invalida_volta_para_a_listagem(app_com_dados):
+    resposta = _cliente(app_com_dados).get('/chamados/exportar?de=15/09/2024')
+    assert resposta.status_code == 302
+    assert _cliente(app_com_dados).get('/chamados/exportar?formato=pdf').status_code == 302
+
+
+def test_solicitante_exporta_so_os_proprios_chamados(app_com_dados):
+    solicitante = app_com_dados.dados['usuarios'][0]
+    linhas = _csv(_cliente(app_com_dados, solicitante).get('/chamados/exportar'))
+    with app_com_dados.app_context():
+        proprios = {str(c.id) for c in Chamado.query.filter_by(usuario_id=solicitante)}
+    assert {linha['id'] for linha in linhas} == proprios
+
+
+def test_xlsx_abre_como_planilha(app_com_dados):
+    resposta = _cliente(app_com_dados).get('/chamados/exportar?formato=xlsx&status=todos')
+    assert resposta.mimetype == FORMATO_XLSX
+    with zipfile.ZipFile(io.BytesIO(resposta.get_data())) as pacote:
+        assert pacote.testzip() is None
+        assert {'[Content_Types].xml', 'xl/workbook.xml', 'xl/styles.xml'} <= set(pacote.namelist())
+        planilha = ElementTree.fromstring(pacote.read('xl/worksheets/sheet1.xml'))
+    
+    linhas = planilha.findall('s:sheetData/s:row', NS)
+    assert len(linhas) == 8
+    cabecalho = [c.findtext('s:is/s:t', namespaces=NS) for c in linhas[0]]
+    assert cabecalho[:3] == ['id', 'titulo', 'descricao']
+    perigoso = next(linha for linha in linhas[1:]
+                    if linha[0].findtext('s:v', namespaces=NS) == str(app_com_dados.perigoso))
+    # Texto inline (não vira fórmula) e data como número de série com estilo
+    assert perigoso[1].get('t') == 'inlineStr'
+    assert perigoso[1].findtext('s:is/s:t', namespaces=NS) == '=HYPERLINK("http://x")'
+    data = perigoso[cabecalho.index('data_criacao')]
+    assert data.get('s') == '1'
+    assert float(data.findtext('s:v', namespaces=NS)) == pytest.approx(45550.354167)
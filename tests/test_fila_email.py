@@ -0,0 +1,112 @@
+"""Fila de saída de emails: reserva por token, backoff e uma conexão SMTP por lote"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from fila_email import enfileirar_email, processar_fila, _reservar_lote
+from models import db, EmailPendente
+
+
+@pytest.fixture
+def app_smtp(criar_app, smtp):
+    return criar_app(MAIL_PORT=smtp.porta, MAIL_SUPPRESS_SEND=False, EMAIL_FILA_LOTE=10,
+                     EMAIL_BACKOFF_BASE=30, EMAIL_BACKOFF_MAXIMO=3600, EMAIL_MAX_TENTATIVAS=3)
+
+
+def _enfileirar(*destinatarios):
+    for destinatario in destinatarios:
+        enfileirar_email('Teste', [destinatario], '<p>corpo</p>')
+
+
+def test_reserva_lote_com_token(app):
+    with app.app_context():
+        _enfileirar('a@x.com', 'b@x.com', 'c@x.com')
+        
+        primeiro = _reservar_lote(2, 300)
+        assert [email.destinatarios for email in primeiro] == ['a@x.com', 'b@x.com']
+        assert len({email.reserva for email in primeiro}) == 1
+        assert all(email.status == 'enviando' for email in primeiro)
+        assert all(email.proxima_tentativa > datetime.utcnow() for email in primeiro)
+        
+        # Outro worker só encontra o que sobrou, com outro token
+        segundo = _reservar_lote(2, 300)
+        assert [email.destinatarios for email in segundo] == ['c@x.com']
+        assert segundo[0].reserva != primeiro[0].reserva
+        assert _reservar_lote(2, 300) == []
+
+
+def test_reserva_expirada_volta_para_a_fila(app):
+    with app.app_context():
+        _enfileirar('a@x.com')
+        reservado, = _reservar_lote(10, 300)
+        token = reservado.reserva
+        
+        # Worker que reservou morreu: a reserva vence e o email é retomado
+        reservado.proxima_tentativa = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        retomado, = _reservar_lote(10, 300)
+        assert retomado.id == reservado.id
+        assert retomado.reserva != token
+
+
+def test_lote_usa_uma_conexao(app_smtp, smtp):
+    with app_smtp.app_context():
+        _enfileirar('a@x.com', 'b@x.com', 'c@x.com')
+        assert processar_fila() == 3
+        
+        assert smtp.conexoes == 1
+        assert smtp.mensagens == [['a@x.com'], ['b@x.com'], ['c@x.com']]
+        assert {email.status for email in EmailPendente.query} == {'enviado'}
+        assert all(email.reserva is None and email.data_envio for email in EmailPendente.query)
+
+
+def test_falha_smtp_agenda_nova_tentativa_com_backoff(app_smtp, smtp):
+    smtp.recusados.add('b@x.com')
+    with app_smtp.app_context():
+        _enfileirar('a@x.com', 'b@x.com')
+        inicio = datetime.utcnow()
+        processar_fila()
+        
+        recusado = EmailPendente.query.filter_by(destinatarios='b@x.com').one()
+        assert EmailPendente.query.filter_by(destinatarios='a@x.com').one().status == 'enviado'
+        assert recusado.status == 'pendente'
+        assert recusado.tentativas == 1
+        assert recusado.ultimo_erro
+        assert recusado.reserva is None
+        espera = (recusado.proxima_tentativa - inicio).total_seconds()
+        assert 29 <= espera <= 32
+        
+        # Ainda no backoff: não é reservado de novo
+        assert processar_fila() == 0
+        
+        # Vencido o prazo, a segunda falha dobra a espera
+        recusado.proxima_tentativa = datetime.utcnow()
+        db.session.commit()
+        inicio = datetime.utcnow()
+        processar_fila()
+        db.session.refresh(recusado)
+        assert recusado.tentativas == 2
+        assert 59 <= (recusado.proxima_tentativa - inicio).total_seconds() <= 62
+        
+        # EMAIL_MAX_TENTATIVAS esgotado: o email é descartado
+        recusado.proxima_tentativa = datetime.utcnow()
+        db.session.commit()
+        processar_fila()
+        db.session.refresh(recusado)
+        assert recusado.tentativas == 3
+        assert recusado.status == 'falhou'
+
+
+def test_servidor_fora_do_ar_devolve_o_lote(criar_app, smtp):
+    porta = smtp.porta
+    smtp.shutdown()
+    smtp.server_close()
+    app = criar_app(MAIL_PORT=porta, MAIL_SUPPRESS_SEND=False)
+    with app.app_context():
+        _enfileirar('a@x.com', 'b@x.com')
+        assert processar_fila() == 2
+        
+        emails = EmailPendente.query.all()
+        assert {email.status for email in emails} == {'pendente'}
+        assert {email.tentativas for email in emails} == {1}
+        assert all(email.proxima_tentativa > datetime.utcnow() for email in emails)
@@ -0,0 +1,90 @@
+"""Fila única de escrita do SQLite: group commit, espera limitada e thread que morre"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from banco_sqlite import FilaEscrita, EscritaExpirada
+from models import db, Usuario
+
+
+@pytest.fixture
+def fila(criar_app):
+    app = criar_app(SQLITE_FILA_ESCRITA=True, SQLITE_ESCRITA_ESPERA=5)
+    return FilaEscrita(app)
+
+
+def _renomear(usuario_id, nome):
+    db.session.get(Usuario, usuario_id).nome = nome
+    return nome
+
+
+def _falhar():
+    raise ValueError('inválido')
+
+
+def _segurar(iniciou, liberar):
+    """Ocupa a thread de escrita até `liberar`"""
+    iniciou.set()
+    liberar.wait()
+
+
+def test_falha_de_uma_escrita_nao_derruba_o_grupo(fila):
+    iniciou, liberar = threading.Event(), threading.Event()
+    with fila.app.app_context(), ThreadPoolExecutor(3) as executor:
+        # A primeira escrita segura a thread enquanto as outras duas formam um grupo
+        bloqueio = executor.submit(fila.executar, _segurar, iniciou, liberar)
+        iniciou.wait()
+        boa = executor.submit(fila.executar, _renomear, 1, 'Novo nome')
+        ruim = executor.submit(fila.executar, _falhar)
+        while fila._fila.qsize() < 2:
+            pass
+        liberar.set()
+        
+        bloqueio.result()
+        assert boa.result() == 'Novo nome'
+        with pytest.raises(ValueError):
+            ruim.result()
+        assert db.session.get(Usuario, 1).nome == 'Novo nome'
+
+
+def test_espera_expirada_descarta_a_escrita_da_fila(fila):
+    iniciou, liberar = threading.Event(), threading.Event()
+    with fila.app.app_context(), ThreadPoolExecutor(1) as executor:
+        bloqueio = executor.submit(fila.executar, _segurar, iniciou, liberar)
+        iniciou.wait()
+        fila.espera = 0.2
+        with pytest.raises(EscritaExpirada):
+            fila.executar(_renomear, 1, 'Nunca gravado')
+        liberar.set()
+        bloqueio.result()
+        
+        assert fila.executar(_renomear, 1, 'Depois') == 'Depois'
+        assert fila.escritas == 2
+        assert db.session.get(Usuario, 1).nome == 'Depois'
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_thread_que_morre_falha_pendentes_e_e_recriada(fila):
+    iniciou, liberar = threading.Event(), threading.Event()
+    
+    def _derrubar():
+        _segurar(iniciou, liberar)
+        raise SystemExit()  # fora do `except Exception` da gravação
+    
+    with fila.app.app_context(), ThreadPoolExecutor(2) as executor:
+        derrubada = executor.submit(fila.executar, _derrubar)
+        iniciou.wait()
+        pendente = executor.submit(fila.executar, _renomear, 1, 'Na fila')
+        while not fila._fila.qsize():
+            pass
+        primeira_thread = fila._thread
+        liberar.set()
+        
+        for futuro in (derrubada, pendente):
+            with pytest.raises(RuntimeError, match='encerrada'):
+                futuro.result()
+        primeira_thread.join()
+        
+        assert fila.executar(_renomear, 1, 'Recriada') == 'Recriada'
+        assert fila._thread is not primeira_thread
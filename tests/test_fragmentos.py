@@ -0,0 +1,42 @@
+"""Fragmentos de templates: cache só com versões compartilhadas e invalidação pelas escritas"""
+from extensoes import fragmentos
+from models import db, Chamado
+
+
+def _cliente(app, usuario_id=1):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return cliente
+
+
+def test_sem_cache_compartilhado_listagem_mostra_o_que_outro_worker_gravou(app, semear, outro_processo):
+    with app.app_context():
+        dados = semear(5)
+    assert not fragmentos.ativo
+    cliente = _cliente(app)
+    assert 'Gravado por outro worker' not in cliente.get('/chamados').get_data(as_text=True)
+    
+    outro_processo(app, dados['usuarios'][0])
+    assert 'Gravado por outro worker' in cliente.get('/chamados').get_data(as_text=True)
+    assert fragmentos.metricas()['itens'] == 0
+
+
+def test_processo_unico_reaproveita_linhas_ate_a_proxima_escrita(criar_app, semear):
+    app = criar_app(PROCESSO_UNICO=True)
+    with app.app_context():
+        dados = semear(5)
+    assert fragmentos.ativo
+    cliente = _cliente(app)
+    primeira = cliente.get('/chamados').get_data(as_text=True)
+    assert fragmentos.metricas()['itens'] == 1
+    assert cliente.get('/chamados').get_data(as_text=True) == primeira
+    assert fragmentos.metricas()['itens'] == 1
+    
+    with app.app_context():
+        db.session.add(Chamado(titulo='Aberto pelo ORM', descricao='Descrição',
+                               usuario_id=dados['usuarios'][0]))
+        db.session.commit()
+    assert 'Aberto pelo ORM' in cliente.get('/chamados').get_data(as_text=True)
+    assert fragmentos.metricas()['itens'] == 2
@@ -0,0 +1,87 @@
+"""Atualização em lote: um UPDATE por conjunto, histórico por chamado e validação da entrada"""
+import pytest
+
+from estatisticas import STATUS_CHAMADO
+from extensoes import contadores
+from models import Chamado, HistoricoChamado
+
+
+@pytest.fixture
+def app_com_dados(criar_app, semear):
+    app = criar_app(PROCESSO_UNICO=True, CHAMADOS_LOTE_MAXIMO=20)
+    with app.app_context():
+        app.dados = semear(12, usuarios=3, tecnicos=2)
+    return app
+
+
+def _cliente(app, usuario_id=1):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return cliente
+
+
+def test_lote_altera_registra_historico_e_ignora_o_que_nao_muda(app_com_dados):
+    with app_com_dados.app_context():
+        contadores.estatisticas(1)
+        tecnico = app_com_dados.dados['tecnicos'][0]
+        chamados = Chamado.query.order_by(Chamado.id).all()
+        ids = [c.id for c in chamados]
+        ja_resolvidos = {c.id for c in chamados if c.status == 'resolvido'}
+        # Já resolvidos com o mesmo técnico não mudam
+        mantidos = {c.id for c in chamados if c.status == 'resolvido' and c.tecnico_id == tecnico}
+        historico_antes = HistoricoChamado.query.count()
+        assert mantidos
+    
+    resposta = _cliente(app_com_dados).post('/chamados/lote', json={
+        'ids': ids + [9999], 'status': 'resolvido', 'tecnico_id': tecnico})
+    assert resposta.status_code == 200
+    resultado = resposta.get_json()
+    assert resultado['nao_encontrados'] == [9999]
+    assert set(resultado['atualizados']) == set(ids) - mantidos
+    
+    with app_com_dados.app_context():
+        for chamado in Chamado.query:
+            assert (chamado.status, chamado.tecnico_id) == ('resolvido', tecnico)
+            if chamado.id not in ja_resolvidos:
+                assert chamado.data_resolucao is not None
+        novos = HistoricoChamado.query.filter(HistoricoChamado.id > historico_antes)\
+                                      .order_by(HistoricoChamado.chamado_id).all()
+        assert [h.chamado_id for h in novos] == sorted(resultado['atualizados'])
+        aberto = next(h for h in novos if 'de aberto para resolvido' in h.descricao)
+        assert 'Chamado atribuído a' in aberto.descricao
+        
+        # Contadores em cache recebem as variações do lote sem recontar
+        esperado = {status: Chamado.query.filter_by(status=status).count() for status in STATUS_CHAMADO}
+        assert contadores.estatisticas(1)['por_status'] == esperado
+
+
+def test_comentario_sem_alteracao_entra_no_historico(app_com_dados):
+    with app_com_dados.app_context():
+        id = Chamado.query.first().id
+    resposta = _cliente(app_com_dados).post('/chamados/lote', json={'ids': [id], 'comentario': 'Verificado'})
+    assert resposta.get_json()['atualizados'] == [id]
+    with app_com_dados.app_context():
+        ultimo = HistoricoChamado.query.order_by(HistoricoChamado.id.desc()).first()
+        assert (ultimo.chamado_id, ultimo.descricao) == (id, 'Comentário: Verificado')
+
+
+@pytest.mark.parametrize('dados, erro', [
+    ({'ids': [], 'status': 'fechado'}, 'Nenhum chamado'),
+    ({'ids': list(range(1, 22)), 'status': 'fechado'}, 'no máximo 20'),
+    ({'ids': [1], 'status': 'cancelado'}, 'Status inválido'),
+    ({'ids': [1], 'tecnico_id': 1}, 'Técnico inválido'),
+])
+def test_entrada_invalida_responde_400_sem_alterar(app_com_dados, dados, erro):
+    resposta = _cliente(app_com_dados).post('/chamados/lote', json=dados)
+    assert resposta.status_code == 400
+    assert erro in resposta.get_json()['error']
+    with app_com_dados.app_context():
+        assert Chamado.query.filter_by(status='fechado').count() == 3
+
+
+def test_solicitante_nao_atualiza_em_lote(app_com_dados):
+    solicitante = app_com_dados.dados['usuarios'][0]
+    resposta = _cliente(app_com_dados, solicitante).post('/chamados/lote', json={'ids': [1], 'status': 'fechado'})
+    assert resposta.status_code == 403
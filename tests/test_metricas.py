@@ -0,0 +1,47 @@
+"""/metrics: latência, instruções SQL e templates por endpoint no formato do Prometheus"""
+from contador_sql import consultas_da_requisicao
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente
+
+
+def _valor(texto, serie):
+    """Valor da série (nome com rótulos) no texto exportado; 0 se ausente"""
+    for linha in texto.splitlines():
+        if linha.startswith(serie + ' '):
+            return float(linha.rsplit(' ', 1)[1])
+    return 0
+
+
+def test_requisicao_registra_latencia_sql_e_template(app, semear):
+    with app.app_context():
+        semear(5)
+    cliente = _cliente(app)
+    rotulo = '{endpoint="chamados.listar_chamados"}'
+    antes = cliente.get('/metrics').get_data(as_text=True)
+    
+    resposta, contador = consultas_da_requisicao(cliente, '/chamados')
+    assert resposta.status_code == 200
+    
+    depois = cliente.get('/metrics').get_data(as_text=True)
+    serie_latencia = 'http_requisicao_segundos_count{endpoint="chamados.listar_chamados",metodo="GET",status="200"}'
+    assert _valor(depois, serie_latencia) == _valor(antes, serie_latencia) + 1
+    assert _valor(depois, f'http_requisicao_sql_instrucoes_sum{rotulo}') - \
+        _valor(antes, f'http_requisicao_sql_instrucoes_sum{rotulo}') == contador.total
+    assert _valor(depois, f'http_requisicao_template_segundos_sum{rotulo}') > \
+        _valor(antes, f'http_requisicao_template_segundos_sum{rotulo}')
+    assert '# TYPE http_requisicao_segundos histogram' in depois
+
+
+def test_token_protege_o_endpoint(criar_app):
+    app = criar_app(METRICAS_TOKEN='segredo')
+    cliente = app.test_client()
+    assert cliente.get('/metrics').status_code == 403
+    resposta = cliente.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/plain'
@@ -0,0 +1,80 @@
+"""Notificações da atualização em lote: mesmo registro, janela e resumo das individuais"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from extensoes import notificacoes
+from lote_chamados import atualizar_em_lote
+from models import db, Usuario, Chamado, EmailPendente, Notificacao
+
+TECNICO_EMAIL = 'tecnico@teste.local'
+
+
+@pytest.fixture
+def app_lote(criar_app, semear):
+    app = criar_app(TECNICO_EMAIL=TECNICO_EMAIL, NOTIFICACOES_JANELA=300)
+    with app.app_context():
+        app.dados = semear(8, usuarios=2, tecnicos=1)
+    return app
+
+
+def _vencer(resumo=False):
+    db.session.execute(update(Notificacao).where(Notificacao.resumo.is_(resumo))
+                       .values(enviar_em=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def _emails():
+    return {email.destinatarios: email.assunto for email in EmailPendente.query}
+
+
+def _lote(app, ids, **alteracoes):
+    admin = Usuario.query.filter_by(is_admin=True).one()
+    return atualizar_em_lote(ids, admin, tecnico_id=app.dados['tecnicos'][0], **alteracoes)
+
+
+def test_lote_gera_um_email_por_destinatario(app_lote):
+    with app_lote.app_context():
+        ids = [chamado.id for chamado in Chamado.query.filter_by(status='aberto')]
+        resultado = _lote(app_lote, ids, prioridade='urgente')
+        assert len(ids) > 1
+        assert resultado['notificacoes'] == 2 * len(ids)
+        assert EmailPendente.query.count() == 0
+        
+        # Ainda na janela: nada sai
+        assert notificacoes.consolidar() == 0
+        _vencer()
+        assert notificacoes.consolidar() == 1
+        tecnico = db.session.get(Usuario, app_lote.dados['tecnicos'][0])
+        # Mesmos chamados e alterações para os dois: um email endereçado a ambos
+        assert _emails() == {f'{TECNICO_EMAIL},{tecnico.email}': f'{len(ids)} chamado(s) atualizado(s)'}
+
+
+def test_lote_respeita_o_resumo_do_tecnico(app_lote):
+    with app_lote.app_context():
+        tecnico = db.session.get(Usuario, app_lote.dados['tecnicos'][0])
+        tecnico.notificacoes_resumo = True
+        db.session.commit()
+        ids = [chamado.id for chamado in Chamado.query.filter_by(status='aberto')]
+        _lote(app_lote, ids, prioridade='urgente')
+        
+        _vencer()
+        assert notificacoes.consolidar() == 1
+        assert list(_emails()) == [TECNICO_EMAIL]
+        
+        _vencer(resumo=True)
+        assert notificacoes.consolidar() == 1
+        assert _emails()[tecnico.email].startswith('Resumo de chamados')
+
+
+def test_lote_se_junta_a_alteracao_individual_na_janela(app_lote):
+    with app_lote.app_context():
+        chamado = Chamado.query.filter_by(status='aberto').first()
+        notificacoes.registrar(chamado, 'Chamado atualizado', 'Comentário: primeiro')
+        db.session.commit()
+        _lote(app_lote, [chamado.id], status='em_andamento')
+        
+        _vencer()
+        assert notificacoes.consolidar() == 2  # TECNICO_EMAIL (duas alterações) e técnico (uma)
+        assert _emails()[TECNICO_EMAIL].endswith('2 atualizações')
@@ -0,0 +1,63 @@
+"""Paginação por cursor (data_criacao, id) da listagem e de /api/chamados"""
+from datetime import datetime
+
+import pytest
+
+from models import db, Chamado
+from paginacao import paginar_por_cursor
+
+
+@pytest.fixture
+def app_com_dados(app, semear):
+    with app.app_context():
+        dados = semear(22)
+        # Empate em data_criacao: o id desempata
+        empate = datetime(2020, 1, 1)
+        for n in range(3):
+            db.session.add(Chamado(titulo=f'Empate {n}', descricao='x', usuario_id=dados['usuarios'][0],
+                                   data_criacao=empate, data_atualizacao=empate))
+        db.session.commit()
+        app.ordem = [chamado.id for chamado in
+                     Chamado.query.order_by(Chamado.data_criacao.desc(), Chamado.id.desc())]
+    return app
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente
+
+
+def test_cursor_percorre_todas_as_paginas_nos_dois_sentidos(app_com_dados):
+    with app_com_dados.app_context():
+        paginas = [paginar_por_cursor(Chamado.query, per_page=10)]
+        while paginas[-1].has_next:
+            paginas.append(paginar_por_cursor(Chamado.query, per_page=10, cursor=paginas[-1].next_cursor))
+        assert [pagina.page for pagina in paginas] == [1, 2, 3]
+        assert [c.id for pagina in paginas for c in pagina.items] == app_com_dados.ordem
+        
+        # Voltando da terceira página chega-se à segunda com os mesmos itens
+        anterior = paginar_por_cursor(Chamado.query, per_page=10, cursor=paginas[2].prev_cursor)
+        assert anterior.page == 2
+        assert [c.id for c in anterior.items] == [c.id for c in paginas[1].items]
+
+
+def test_api_segue_o_cursor_ate_a_ultima_linha(app_com_dados):
+    cliente = _cliente(app_com_dados)
+    ids, url = [], '/api/chamados?limite=7&fields=id'
+    while url:
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200
+        ids += [linha['id'] for linha in resposta.get_json()]
+        cursor = resposta.headers.get('X-Proximo-Cursor')
+        url = f'/api/chamados?limite=7&fields=id&cursor={cursor}' if cursor else None
+    assert ids == app_com_dados.ordem
+
+
+@pytest.mark.parametrize('limite', ['0', '-5'])
+def test_api_recusa_limite_nao_positivo(app_com_dados, limite):
+    resposta = _cliente(app_com_dados).get(f'/api/chamados?limite={limite}')
+    assert resposta.status_code == 400
+    assert 'X-Proximo-Cursor' not in resposta.headers
@@ -0,0 +1,27 @@
+"""Planos das consultas frequentes (EXPLAIN QUERY PLAN) sobre um banco semeado"""
+import pytest
+from sqlalchemy import text
+
+from models import db
+from planos import verificar_planos
+
+
+@pytest.fixture
+def app_com_dados(app, semear):
+    with app.app_context():
+        semear(60, usuarios=4, tecnicos=3)
+    return app
+
+
+def test_consultas_frequentes_usam_indices(app_com_dados):
+    # Sem ANALYZE, como o verificar-indices: com estatísticas de uma tabela pequena
+    # o planejador prefere ler tudo, o que não diz nada sobre a produção
+    with app_com_dados.app_context():
+        assert verificar_planos() == {}
+
+
+def test_verificacao_aponta_indice_ausente(app_com_dados):
+    with app_com_dados.app_context():
+        db.session.execute(text('DROP INDEX ix_historico_chamado_data'))
+        db.session.commit()
+        assert 'histórico do chamado' in verificar_planos()
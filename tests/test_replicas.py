@@ -0,0 +1,69 @@
+"""Leitura em réplica: views @somente_leitura na réplica, escritas e leituras logo após no primário"""
+import sqlite3
+
+import pytest
+
+from models import db, Chamado
+from extensoes import replicas
+
+
+@pytest.fixture
+def app_replica(criar_app, semear, tmp_path):
+    replica = tmp_path / 'replica.db'
+    app = criar_app(SQLALCHEMY_BINDS={'replica_0': f'sqlite:///{replica}'}, REPLICA_JANELA_ESCRITA=60)
+    with app.app_context():
+        semear(3)
+        # Cópia do primário com títulos diferentes: dá para saber de onde veio cada leitura
+        primario = sqlite3.connect(db.engine.url.database)
+        with sqlite3.connect(replica) as destino:
+            primario.backup(destino)
+            destino.execute("UPDATE chamados SET titulo = 'réplica: ' || titulo")
+        primario.close()
+    return app
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = '1'
+        sessao['_fresh'] = True
+    return cliente
+
+
+def _titulos(cliente):
+    resposta = cliente.get('/api/chamados?limite=100&fields=id,titulo')
+    assert resposta.status_code == 200
+    return {chamado['titulo'] for chamado in resposta.get_json()}
+
+
+def test_views_somente_leitura_leem_da_replica(app_replica):
+    assert len(replicas.engines) == 1
+    titulos = _titulos(_cliente(app_replica))
+    assert titulos and all(titulo.startswith('réplica: ') for titulo in titulos)
+
+
+def test_escrita_vai_para_o_primario_e_fixa_as_leituras(app_replica):
+    with app_replica.app_context():
+        chamado_id = Chamado.query.filter_by(status='aberto').first().id
+    cliente = _cliente(app_replica)
+    resposta = cliente.post(f'/chamados/{chamado_id}/atualizar', data={'status': 'em_andamento'})
+    assert resposta.status_code == 302
+    
+    with app_replica.app_context():
+        assert db.session.get(Chamado, chamado_id).status == 'em_andamento'
+        replica = db.engines['replica_0']
+        with replica.connect() as conexao:
+            status = conexao.execute(db.select(Chamado.status).where(Chamado.id == chamado_id)).scalar()
+        assert status == 'aberto'
+    
+    # Logo após escrever, o mesmo usuário lê do primário (vê a própria alteração)
+    titulos = _titulos(cliente)
+    assert titulos and not any(titulo.startswith('réplica: ') for titulo in titulos)
+    
+    # Vencida a janela, volta para a réplica
+    with cliente.session_transaction() as sessao:
+        sessao['_primario_ate'] = 0
+    assert all(titulo.startswith('réplica: ') for titulo in _titulos(cliente))
+    
+    # Outro usuário (sem escrita recente) nunca deixou de ler da réplica
+    assert all(titulo.startswith('réplica: ') for titulo in _titulos(_cliente(app_replica)))
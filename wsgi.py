@@ -0,0 +1,4 @@
+"""Ponto de entrada WSGI: gunicorn wsgi:app (ganchos dos workers em gunicorn.conf.py)"""
+from app import create_app
+
+app = create_app()